@@ -1,9 +1,9 @@
 import pandas as pd
-import re
 import os
 from widgetTemp import DartWidgetGenerator
 from TemplateProvider import TemplateProvider 
 from datetime import datetime
+from excel_converter.identifiers import dart_identifier
 
 class DartCodeGenerator:
     """Generates Dart code for widgets, models, and localization."""
@@ -50,23 +50,7 @@ class DartCodeGenerator:
 
     def _sanitize_string(self, value):
         """Sanitizes a string for Dart compatibility."""
-        if pd.isna(value) or value is None:
-            return ""
-        
-        value = str(value).strip()
-        # Replace special characters with underscores
-        sanitized = re.sub(r'[^a-zA-Z0-9]', '_', value)
-        # Remove consecutive underscores
-        sanitized = re.sub(r'_+', '_', sanitized)
-        # Remove leading and trailing underscores
-        sanitized = sanitized.strip('_')
-        # Ensure it starts with a letter
-        if sanitized and not sanitized[0].isalpha():
-            sanitized = 'a' + sanitized
-        # Handle empty string
-        if not sanitized:
-            sanitized = 'empty'
-        return sanitized.lower()
+        return dart_identifier(value)
 
     def _get_data_list_conditionally_const(self, field_type, model):
         """Returns the corresponding data list or null based on the field type."""
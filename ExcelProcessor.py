@@ -1,6 +1,8 @@
 import pandas as pd
 import re
-from openpyxl import load_workbook
+import zipfile
+from excel_converter.xlsx import read_hidden_rows_and_columns
+from excel_converter.utils import clean_column_names, normalize_strings
 
 class ExcelProcessor:
     """Handles processing of the Excel file and data extraction."""
@@ -18,26 +20,37 @@ class ExcelProcessor:
         self.sheet_name = sheet_name
         self.df = None
 
-    def load_excel_skip_hidden_rows(self):
-        """Load Excel file while skipping hidden rows."""
-        # Load the workbook and sheet
-        workbook = load_workbook(self.file_path, data_only=True)
-        sheet = workbook[self.sheet_name]
-
-        # Identify hidden rows
-        hidden_rows = [row for row in sheet.row_dimensions if sheet.row_dimensions[row].hidden]
+    def load_excel_skip_hidden_rows(self, skip_hidden_columns=True):
+        """
+        Load Excel file while skipping hidden rows (including rows hidden by
+        a filter) and, by default, hidden columns.
 
+        The workbook is parsed only once, by pandas; hidden rows and columns
+        come from a scan of the row/column attributes in the sheet XML.
+        """
         # Read the Excel file with pandas
         df = pd.read_excel(self.file_path, sheet_name=self.sheet_name)
 
-        # Drop hidden rows by their index (Excel row numbers are 1-based)
-        df = df.drop(index=[row - 1 for row in hidden_rows if row <= len(df)])
-        
-        # Convert all object columns to string to avoid .str accessor errors
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str)
+        # Identify hidden rows and columns
+        try:
+            hidden_rows, hidden_columns = read_hidden_rows_and_columns(self.file_path, self.sheet_name)
+        except (zipfile.BadZipFile, KeyError) as e:
+            # Not an .xlsx file (e.g., legacy .xls); nothing to skip
+            print(f"Could not read hidden rows: {e}")
+            hidden_rows, hidden_columns = set(), set()
+
+        # Drop hidden rows: Excel row 1 is the header, so row r is index r - 2
+        hidden_index = [row - 2 for row in hidden_rows if 2 <= row < len(df) + 2]
+        df = df.drop(index=df.index[hidden_index])
+
+        # Drop hidden columns by position (column A is position 0)
+        if skip_hidden_columns and hidden_columns:
+            visible = [i for i in range(df.shape[1]) if i not in hidden_columns]
+            df = df.iloc[:, visible]
         
-        return df
+        # Convert every cell to a string (missing cells become pd.NA) to
+        # avoid .str accessor errors
+        return normalize_strings(df)
 
     def load_sheet(self):
         """Loads and cleans the Excel sheet."""
@@ -45,16 +58,7 @@ class ExcelProcessor:
         self.df = self.load_excel_skip_hidden_rows()
         
         # Clean column names: strip, lower, replace spaces with underscores, and remove non-alphanumeric characters
-        self.df.columns = (
-            self.df.columns.str.strip()
-                        .str.lower()
-                        .str.replace(r'\s+', '_', regex=True)
-                        .str.replace(r'[^\w]', '', regex=True)
-        )
-        
-        # Convert all columns to string type to avoid .str accessor errors
-        for col in self.df.columns:
-            self.df[col] = self.df[col].fillna('').astype(str)
+        self.df.columns = clean_column_names(self.df.columns)
         
         return self.df
 
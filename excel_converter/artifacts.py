@@ -0,0 +1,104 @@
+"""
+Content-addressed storage for generated artifacts.
+Generated Dart code and the question/field lists can be large, so they are
+written once to disk under the SHA-256 of their content and referenced by
+that hash. Identical output (e.g., regenerating an unchanged sheet) is
+stored only once, and pages or downloads read it back only when needed.
+"""
+import os
+import re
+import json
+import hashlib
+import tempfile
+from django.conf import settings
+
+_DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def get_artifact_root():
+    """
+    Returns the directory artifacts are stored in.
+
+    Configured with EXCEL_SETTINGS['artifact_dir'], defaulting to
+    MEDIA_ROOT/artifacts.
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    return excel_settings.get('artifact_dir') or os.path.join(settings.MEDIA_ROOT, 'artifacts')
+
+def artifact_path(digest):
+    """
+    Returns the file path of an artifact.
+
+    Args:
+        digest (str): SHA-256 hex digest of the artifact
+
+    Returns:
+        str: Path of the artifact file (e.g., '<root>/ab/abcdef...')
+
+    Raises:
+        ValueError: If digest is not a SHA-256 hex digest
+    """
+    if not isinstance(digest, str) or not _DIGEST_PATTERN.match(digest):
+        raise ValueError(f"Invalid artifact id: {digest!r}")
+    return os.path.join(get_artifact_root(), digest[:2], digest)
+
+def store_artifact(data):
+    """
+    Stores bytes under their SHA-256 digest.
+
+    Content that is already stored is not written again. New content is
+    written to a temporary file first and renamed into place, so readers
+    never see a partial artifact.
+
+    Args:
+        data (bytes): Artifact content
+
+    Returns:
+        str: The artifact id (SHA-256 hex digest)
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = artifact_path(digest)
+    if os.path.exists(path):
+        return digest
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return digest
+
+def store_text(text):
+    """Stores text as UTF-8 and returns its artifact id."""
+    return store_artifact(text.encode('utf-8'))
+
+def store_json(value):
+    """Stores a JSON-serializable value and returns its artifact id."""
+    return store_artifact(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def open_artifact(digest):
+    """
+    Opens an artifact for reading.
+
+    Returns:
+        file: Binary file object
+
+    Raises:
+        FileNotFoundError: If the artifact does not exist
+    """
+    return open(artifact_path(digest), 'rb')
+
+def read_text(digest):
+    """Reads a text artifact."""
+    with open_artifact(digest) as artifact:
+        return artifact.read().decode('utf-8')
+
+def read_json(digest):
+    """Reads a JSON artifact."""
+    with open_artifact(digest) as artifact:
+        return json.load(artifact)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the upload -> validate -> generate pipeline.
+Run them with `python manage.py benchmark_pipeline` (see runner.py).
+"""
@@ -0,0 +1,197 @@
+"""
+Timing of the pipeline stages on synthetic workbooks.
+Each stage is timed on its own over all sheets of a workbook, so a
+regression points at the stage that caused it. Reports are plain JSON and
+can be compared with compare_reports().
+"""
+import os
+import sys
+import platform
+import statistics
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+import pandas as pd
+from ..utils import get_excel_sheets, process_excel_file, process_excel_sheets
+from ..validators import validate_row_data
+from ..extractors import extract_sheet_entries
+from ..dart_generator import generate_dart_code
+from .workbooks import SIZES, LANGUAGES, build_workbook
+
+REPORT_VERSION = 1
+
+STAGES = ['get_excel_sheets', 'process_excel_file', 'process_excel_sheets', 'validate_row_data', 'extract_sheet_entries', 'generate_dart_code']
+
+# Column selections matching the synthetic workbooks
+BENCHMARK_METADATA = {
+    'database_column': 'Database',
+    'question_column': 'Questions in English',
+    'field_name_column': 'Field Names in English',
+    'datatype_column': 'Data Type',
+    'question_serial_column': 'Question no.',
+}
+
+def time_call(func, repeat=5):
+    """
+    Runs func repeat times.
+
+    Returns:
+        dict: 'min', 'median' and 'max' in seconds, and 'repeat'
+    """
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+        'repeat': repeat
+    }
+
+def required_row_columns(languages):
+    """Required columns for row validation, as validate_columns builds them."""
+    columns = [BENCHMARK_METADATA[key] for key in ('database_column', 'question_column', 'datatype_column', 'question_serial_column')]
+    columns += [f'Questions in {language}' for language in LANGUAGES[:languages]]
+    columns += [f'Field Names in {language}' for language in LANGUAGES[:languages]]
+    return columns
+
+def run_workbook(path, sheet_names, languages, repeat=5):
+    """
+    Times every stage on one workbook.
+
+    Args:
+        path (str): Path to the workbook
+        sheet_names (list): Sheets to process
+        languages (int): Languages besides English in the workbook
+        repeat (int): Runs per stage
+
+    Returns:
+        dict: Stage name -> time_call() result
+    """
+    required = required_row_columns(languages)
+    frames = {sheet: process_excel_file(path, sheet) for sheet in sheet_names}
+    class_names = {sheet: sheet.replace(' ', '') for sheet in sheet_names}
+
+    def run_all(func):
+        return lambda: [func(sheet) for sheet in sheet_names]
+
+    return {
+        'get_excel_sheets': time_call(lambda: get_excel_sheets(path), repeat),
+        'process_excel_file': time_call(run_all(lambda sheet: process_excel_file(path, sheet)), repeat),
+        'process_excel_sheets': time_call(lambda: process_excel_sheets(path, sheet_names), repeat),
+        'validate_row_data': time_call(run_all(lambda sheet: validate_row_data(frames[sheet], required)), repeat),
+        'extract_sheet_entries': time_call(
+            run_all(lambda sheet: extract_sheet_entries(frames[sheet], BENCHMARK_METADATA, class_names[sheet])), repeat),
+        'generate_dart_code': time_call(
+            run_all(lambda sheet: generate_dart_code(frames[sheet], class_names[sheet], preview=True, metadata=BENCHMARK_METADATA)), repeat),
+    }
+
+def run_benchmarks(sizes, repeat=5, workdir=None, seed=0, progress=None):
+    """
+    Builds a workbook for every size and times the pipeline on it.
+
+    Args:
+        sizes (dict): Size name -> {'sheets', 'rows', 'languages'}
+                      (e.g., {'small': SIZES['small']})
+        repeat (int): Runs per stage
+        workdir (str, optional): Directory to keep the workbooks in; a
+                                 temporary directory is used by default
+        seed (int): Random seed for the workbooks
+        progress (callable, optional): Called with a message per size
+
+    Returns:
+        dict: Report with 'version', 'created_at', 'environment' and
+              'results' (size -> {'params', 'file_bytes', 'stages'})
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = workdir or temp_dir
+        for name, params in sizes.items():
+            path = os.path.join(directory, f'benchmark_{name}.xlsx')
+            if progress:
+                progress(f"{name}: {params['sheets']} sheets x {params['rows']} rows x {params['languages']} languages")
+            sheet_names = build_workbook(path, seed=seed, **params)
+            results[name] = {
+                'params': dict(params),
+                'file_bytes': os.path.getsize(path),
+                'stages': run_workbook(path, sheet_names, params['languages'], repeat)
+            }
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'results': results
+    }
+
+def compare_reports(baseline, current, threshold=0.2, statistic='median'):
+    """
+    Compares the stage timings of two reports.
+
+    Only sizes and stages present in both reports are compared.
+
+    Args:
+        baseline (dict): Earlier report
+        current (dict): New report
+        threshold (float): Relative slowdown counted as a regression
+                           (0.2 = 20% slower)
+        statistic (str): 'min' or 'median'
+
+    Returns:
+        list: One dict per stage with 'size', 'stage', 'baseline',
+              'current', 'ratio' (current / baseline) and 'regression'
+    """
+    comparisons = []
+    for size, result in current.get('results', {}).items():
+        baseline_stages = baseline.get('results', {}).get(size, {}).get('stages', {})
+        for stage, timing in result.get('stages', {}).items():
+            if stage not in baseline_stages:
+                continue
+            before = baseline_stages[stage][statistic]
+            after = timing[statistic]
+            ratio = after / before if before else float('inf')
+            comparisons.append({
+                'size': size,
+                'stage': stage,
+                'baseline': before,
+                'current': after,
+                'ratio': ratio,
+                'regression': ratio > 1 + threshold
+            })
+    return comparisons
+
+def resolve_sizes(names, sheets=None, rows=None, languages=None):
+    """
+    Picks the workbook sizes to run.
+
+    Args:
+        names (list): Names from SIZES
+        sheets, rows, languages (int, optional): A custom size, added as
+                                                 'custom' when any is given
+
+    Returns:
+        dict: Size name -> parameters
+
+    Raises:
+        ValueError: For an unknown size name
+    """
+    sizes = {}
+    for name in names:
+        if name not in SIZES:
+            raise ValueError(f"Unknown size '{name}'. Available sizes: {', '.join(SIZES)}")
+        sizes[name] = SIZES[name]
+    if sheets or rows or languages is not None:
+        default = SIZES['small']
+        sizes['custom'] = {
+            'sheets': sheets or default['sheets'],
+            'rows': rows or default['rows'],
+            'languages': default['languages'] if languages is None else languages,
+        }
+    return sizes
@@ -0,0 +1,123 @@
+"""
+Synthetic survey workbooks for benchmarks.
+The layout follows the question sheets of media/uploads/U_find_31_12_24.xlsx:
+one row per question (number, label, database key, question text, data
+type) followed by rows holding its answer options, with every text column
+repeated for each extra language.
+"""
+import os
+import random
+from openpyxl import Workbook
+
+LANGUAGES = ['Sinhala', 'Tamil', 'Hindi', 'Bangla', 'Urdu', 'Nepali']
+
+DATA_TYPES = ['Text', 'Number', 'radio', 'Dropdown', 'Multiple choice', 'Image']
+
+# Answer options of choice questions, repeated across the sheet as in real surveys
+OPTION_SETS = [
+    ['Yes', 'No'],
+    ['Yes', 'No', "Don't know"],
+    ['Male', 'Female', 'Other'],
+    ['Daily', 'Weekly', 'Monthly', 'Never'],
+    ['Farming', 'Fishing', 'Trade', 'Labour', 'Other'],
+]
+
+# Workbook sizes used by the benchmark command
+SIZES = {
+    'small': {'sheets': 3, 'rows': 200, 'languages': 2},
+    'medium': {'sheets': 9, 'rows': 2000, 'languages': 2},
+    'large': {'sheets': 9, 'rows': 20000, 'languages': 3},
+}
+
+def workbook_columns(languages):
+    """
+    Returns the header row of a synthetic sheet.
+
+    Args:
+        languages (int): Number of languages besides English
+
+    Returns:
+        list: Column names (e.g., 'Questions in English', 'Questions in Sinhala')
+    """
+    extra = LANGUAGES[:languages]
+    columns = ['Question no.', 'Labels in English', 'Database']
+    columns += [f'Labels in {language}' for language in extra]
+    columns += ['Questions in English'] + [f'Questions in {language}' for language in extra]
+    columns += ['Mandatory/Not Mandatory', 'Data Type', 'Skip Logics']
+    columns += ['Field Names in English'] + [f'Field Names in {language}' for language in extra]
+    return columns
+
+def iter_sheet_rows(rows, languages, sheet_index=0, seed=0):
+    """
+    Generates the data rows of a synthetic sheet.
+
+    Args:
+        rows (int): Number of rows
+        languages (int): Number of languages besides English
+        sheet_index (int): Position of the sheet, used in database keys
+        seed (int): Random seed; the same arguments always give the same rows
+
+    Yields:
+        list: One row of cell values, aligned with workbook_columns()
+    """
+    rng = random.Random(f'{seed}-{sheet_index}')
+    extra = LANGUAGES[:languages]
+    blank = [None] * len(extra)
+    produced = 0
+    question = 0
+    while produced < rows:
+        question += 1
+        data_type = rng.choice(DATA_TYPES)
+        label = f'Question {question} of sheet {sheet_index + 1}'
+        yield (
+            [f'Q{question}', label, f's{sheet_index}_question_{question}']
+            + [f'{label} ({language})' for language in extra]
+            + [f'What is the answer to question {question}?']
+            + [f'Question {question} in {language}' for language in extra]
+            + [rng.choice(['Mandatory', None]), data_type, None]
+            + [None] + blank
+        )
+        produced += 1
+        if data_type in ('radio', 'Dropdown', 'Multiple choice'):
+            for option in rng.choice(OPTION_SETS):
+                if produced >= rows:
+                    break
+                yield (
+                    [None, None, None] + blank
+                    + [None] + blank
+                    + [None, None, None]
+                    + [option] + [f'{option} ({language})' for language in extra]
+                )
+                produced += 1
+
+def build_workbook(path, sheets=3, rows=200, languages=2, seed=0):
+    """
+    Writes a synthetic survey workbook.
+
+    Args:
+        path (str): Output .xlsx path
+        sheets (int): Number of sheets
+        rows (int): Data rows per sheet
+        languages (int): Languages besides English (at most len(LANGUAGES))
+        seed (int): Random seed
+
+    Returns:
+        list: Names of the sheets written
+
+    Example:
+        >>> build_workbook('/tmp/bench.xlsx', sheets=2, rows=50, languages=1)
+        ['Survey 1', 'Survey 2']
+    """
+    languages = min(languages, len(LANGUAGES))
+    workbook = Workbook(write_only=True)
+    sheet_names = []
+    for sheet_index in range(sheets):
+        name = f'Survey {sheet_index + 1}'
+        sheet = workbook.create_sheet(name)
+        sheet.append(workbook_columns(languages))
+        for row in iter_sheet_rows(rows, languages, sheet_index, seed):
+            sheet.append(row)
+        sheet_names.append(name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    workbook.save(path)
+    return sheet_names
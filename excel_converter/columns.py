@@ -0,0 +1,223 @@
+"""
+Column resolution for processed sheets.
+The question, field, data type, question number and database columns are
+found by matching the sheet's headers against alias lists. The headers are
+indexed once per distinct header row and every role is resolved in one
+pass; both the index and the resolved roles are cached, so the cached frame
+of a sheet and every chunk of a streamed sheet share them.
+"""
+import threading
+from functools import lru_cache
+from django.conf import settings
+from .identifiers import normalize_column_name
+
+# Aliases per role, most preferred first. 'question', 'field' and
+# 'question_no' match whole names (ignoring case and surrounding
+# whitespace), 'datatype' matches substrings, and 'english_question' /
+# 'english_field_names' match normalized names (see normalize_column_name).
+# Any role can be replaced with EXCEL_SETTINGS['column_aliases'].
+DEFAULT_COLUMN_ALIASES = {
+    'question': [
+        'Questions in English',
+        'questions_in_english',
+        'Questions',
+        'Question',
+        'Question no.',
+        'question_no',
+        'question_number',
+        'q_no',
+        'qno',
+    ],
+    'field': [
+        'Field Names in English',
+        'field_names_in_english',
+        'Field Names',
+        'Fields',
+        'Labels in English',  # Add common variations
+        'labels_in_english',
+        'Label',
+        'Labels',
+        'Field Label',
+        'Field Labels'
+    ],
+    'datatype': ['Data type', 'data type', 'datatype', 'Data Type', 'field type', 'Field Type', 'type'],
+    'question_no': ['Question no.', 'question_no', 'question_number', 'q_no', 'qno', 'sl', 'sl.no', 'serial'],
+    'english_question': ['questionsinenglish', 'questioninengish', 'englishquestion'],
+    'english_field_names': ['fieldnamesinenglish', 'fieldnames', 'fieldnamesineng'],
+}
+
+# Metadata keys holding the user's own choice for a role, which is tried
+# before the aliases
+METADATA_COLUMNS = {
+    'question': 'question_column',
+    'field': 'field_name_column',
+    'datatype': 'datatype_column',
+    'database': 'database_column',
+}
+
+def get_column_aliases():
+    """
+    Returns the alias table, with the roles configured in
+    EXCEL_SETTINGS['column_aliases'] replacing the defaults.
+
+    Returns:
+        dict: Role -> tuple of aliases
+    """
+    configured = getattr(settings, 'EXCEL_SETTINGS', {}).get('column_aliases') or {}
+    aliases = dict(DEFAULT_COLUMN_ALIASES)
+    aliases.update(configured)
+    return {role: tuple(names) for role, names in aliases.items()}
+
+class ColumnIndex:
+    """
+    Lookup structures for one header row, built in a single pass.
+
+    Use get_column_index() to share an index between frames with the same
+    columns.
+
+    Example:
+        >>> index = get_column_index(df.columns)
+        >>> index.resolve(metadata)['question']
+        'questions_in_english'
+    """
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.positions = {}
+        self._lowered = []
+        self._by_lower = {}
+        self._by_normalized = {}
+        self._normalized_positions = {}
+        for position, col in enumerate(self.columns):
+            lowered = str(col).lower()
+            normalized = normalize_column_name(col)
+            self.positions.setdefault(col, position)
+            self._lowered.append(lowered)
+            self._by_lower.setdefault(lowered.strip(), col)
+            # Later columns win, as in a dict built over the columns
+            self._by_normalized[normalized] = col
+            self._normalized_positions[normalized] = position
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def find(self, variations, skip_empty=False):
+        """
+        Finds the first column matching one of the variations, ignoring
+        case and surrounding whitespace. Variations are tried in order.
+
+        Args:
+            variations (iterable): Candidate names, most preferred first
+            skip_empty (bool): Ignore empty candidate names
+
+        Returns:
+            str: The matching column name, or None if nothing matches
+        """
+        for possible_col in variations:
+            if skip_empty and not possible_col:
+                continue
+            match = self._by_lower.get(possible_col.lower().strip())
+            if match is not None:
+                return match
+        return None
+
+    def find_containing(self, variations):
+        """
+        Finds the first column whose name contains one of the variations,
+        ignoring case. Variations are tried in order.
+
+        Returns:
+            str: The matching column name, or None if nothing matches
+        """
+        for variation in variations:
+            variation = variation.lower()
+            for lowered, col in zip(self._lowered, self.columns):
+                if variation in lowered:
+                    return col
+        return None
+
+    def find_normalized(self, names):
+        """
+        Finds the last column whose normalized name is one of names.
+
+        Returns:
+            str: The matching column name, or None if nothing matches
+        """
+        matches = [
+            self._normalized_positions[name]
+            for name in set(names) if name in self._normalized_positions
+        ]
+        return self.columns[max(matches)] if matches else None
+
+    def lookup(self, name):
+        """
+        Finds a column by normalized name (e.g., a required column or a
+        'Questions in <language>' column).
+
+        Returns:
+            str: The column name, or None if the sheet has no such column
+        """
+        return self._by_normalized.get(normalize_column_name(name))
+
+    def resolve(self, metadata=None, aliases=None):
+        """
+        Resolves every column role for this header row.
+
+        Args:
+            metadata (dict): Column selections made by the user
+            aliases (dict): Alias table, defaults to get_column_aliases()
+
+        Returns:
+            dict: Role -> column name (None when not found):
+                  'question', 'field', 'question_no', 'english_question',
+                  'english_field_names' and 'datatype' (the selected data
+                  type column, lowercased, when no column looks like one),
+                  plus 'database' (the selected database column, lowercased)
+        """
+        metadata = metadata or {}
+        if aliases is None:
+            aliases = get_column_aliases()
+        selected = tuple(metadata.get(key, '') for key in METADATA_COLUMNS.values())
+        key = (selected, tuple(sorted(aliases.items())))
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            question_column, field_name_column, datatype_column, database_column = selected
+            resolved = {
+                'question': self.find((question_column,) + aliases['question']),
+                'field': self.find((field_name_column,) + aliases['field'], skip_empty=True),
+                # Prefer a column that looks like a data type column
+                'datatype': self.find_containing(aliases['datatype']) or datatype_column.lower().strip(),
+                'question_no': self.find(aliases['question_no']),
+                'database': database_column.lower().strip(),
+                'english_question': self.find_normalized(aliases['english_question']),
+                'english_field_names': self.find_normalized(aliases['english_field_names']),
+            }
+            with self._lock:
+                self._resolved[key] = resolved
+        return resolved
+
+@lru_cache(maxsize=256)
+def _column_index(columns):
+    return ColumnIndex(columns)
+
+def get_column_index(columns):
+    """
+    Returns the shared ColumnIndex for a header row.
+
+    Args:
+        columns (iterable): Column names of the sheet (e.g., df.columns)
+
+    Returns:
+        ColumnIndex: Index cached per distinct tuple of column names
+    """
+    return _column_index(tuple(columns))
+
+def resolve_columns(columns, metadata=None):
+    """
+    Resolves every column role for a sheet; see ColumnIndex.resolve().
+
+    Example:
+        >>> roles = resolve_columns(df.columns, metadata)
+        >>> roles['datatype']
+        'data_type'
+    """
+    return get_column_index(columns).resolve(metadata)
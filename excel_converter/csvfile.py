@@ -0,0 +1,189 @@
+"""
+Low-level helpers for reading CSV uploads as a single-sheet workbook.
+CSV exports are read with pyarrow's parser when the whole file is needed and
+with pandas' C parser for headers and chunks, instead of going through an
+Excel reader, which is an order of magnitude faster than parsing the XML of
+an equivalent .xlsx.
+The encoding and delimiter are sniffed from the start of the file, since
+exports from different tools disagree on both.
+
+This module has no Django dependency so it can also be used by the
+standalone scripts in the project root.
+"""
+import csv
+import codecs
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from pandas._libs.parsers import STR_NA_VALUES
+
+CSV_EXTENSIONS = ('.csv',)
+
+# A CSV file holds one table, exposed under this sheet name
+CSV_SHEET_NAME = 'Sheet1'
+
+# Bytes read to detect the encoding and the delimiter
+SNIFF_BYTES = 1024 * 1024
+
+# Tried in order; latin-1 decodes any byte sequence, so it always matches
+FALLBACK_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+DELIMITERS = ',;\t|'
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+def is_csv(file_path):
+    """Returns True if the file is read as CSV, based on its extension."""
+    return str(file_path).lower().endswith(CSV_EXTENSIONS)
+
+def detect_encoding(sample):
+    """
+    Picks the text encoding of a file from its first bytes.
+
+    A byte order mark wins; otherwise the first of FALLBACK_ENCODINGS that
+    decodes the sample is used.
+
+    Args:
+        sample (bytes): Start of the file (may end in the middle of a character)
+
+    Returns:
+        str: Encoding name for pandas.read_csv (e.g., 'utf-8', 'cp1252')
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for encoding in FALLBACK_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            # final=False tolerates a character cut off at the end of the sample
+            decoder.decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+def detect_delimiter(text):
+    """
+    Picks the delimiter of CSV text, defaulting to a comma.
+
+    Args:
+        text (str): Start of the file, decoded
+
+    Returns:
+        str: One of DELIMITERS
+    """
+    # The last line of the sample is usually cut off
+    if '\n' in text:
+        text = text[:text.rindex('\n')]
+    try:
+        return csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+def sniff_csv(file_path):
+    """
+    Detects the encoding and delimiter of a CSV file.
+
+    Args:
+        file_path (str): Path to the CSV file
+
+    Returns:
+        dict: 'encoding' and 'sep' keyword arguments for pandas.read_csv
+
+    Example:
+        >>> sniff_csv('export.csv')
+        {'encoding': 'utf-8-sig', 'sep': ';'}
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES)
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+    return {'encoding': encoding, 'sep': detect_delimiter(text)}
+
+def _read_options(file_path):
+    """Options shared by every read: sniffed format and all values as text."""
+    return {
+        **sniff_csv(file_path),
+        'dtype': str,
+        # A stray byte in an otherwise sniffed encoding should not fail the upload
+        'encoding_errors': 'replace',
+    }
+
+def read_csv_header(file_path):
+    """
+    Reads only the header row of a CSV file.
+
+    Returns:
+        list: Column names as pandas.read_csv reports them (empty header
+              cells become 'Unnamed: N', like pandas.read_excel)
+    """
+    return _read_header(file_path, _read_options(file_path))
+
+def _read_header(file_path, options):
+    return list(pd.read_csv(file_path, nrows=0, engine='c', **options).columns)
+
+def _read_with_pyarrow(file_path, options, header):
+    """
+    Reads the rows after the header with pyarrow, every column as a string.
+
+    pandas' pyarrow engine lets pyarrow infer column types and only then
+    applies dtype=str, which turns '007' into '7' and '1' into '1.0' in a
+    column with empty cells, so pyarrow is called directly with string
+    columns and the C parser's missing-value rules.
+    """
+    column_names = [str(position) for position in range(len(header))]
+    table = pa_csv.read_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(encoding=options['encoding'], skip_rows=1, column_names=column_names),
+        parse_options=pa_csv.ParseOptions(delimiter=options['sep']),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in column_names},
+            null_values=list(STR_NA_VALUES),
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True
+        )
+    )
+    df = table.to_pandas()
+    df.columns = header
+    # Missing cells as NaN, like the C parser
+    return df.astype(object).where(df.notna(), np.nan)
+
+def read_csv(file_path):
+    """
+    Reads a whole CSV file with every value as text.
+
+    The rows are parsed by pyarrow (it is multi-threaded), with the C parser
+    as fallback for files it cannot handle (e.g., bytes that are invalid in
+    the sniffed encoding, which the C parser replaces, or rows longer than
+    the header). The header is always read by the C parser, so the column
+    names are the same either way.
+
+    Returns:
+        pandas.DataFrame: Raw data, missing cells as NaN
+    """
+    options = _read_options(file_path)
+    header = _read_header(file_path, options)
+    try:
+        return _read_with_pyarrow(file_path, options, header)
+    except Exception:
+        return pd.read_csv(file_path, engine='c', **options)
+
+def iter_csv_chunks(file_path, chunk_size):
+    """
+    Reads a CSV file in chunks of rows with the C parser.
+
+    Args:
+        file_path (str): Path to the CSV file
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        pandas.DataFrame: Consecutive raw chunks; their index continues from
+                          the previous chunk
+    """
+    with pd.read_csv(file_path, engine='c', chunksize=chunk_size, **_read_options(file_path)) as reader:
+        yield from reader
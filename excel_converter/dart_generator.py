@@ -3,24 +3,11 @@ Dart code generation functionality.
 This module handles the conversion of Excel data into Dart class code,
 creating properly formatted Dart models with JSON serialization support.
 """
-import re
+import logging
 import pandas as pd
+from .identifiers import sanitize_key, dart_field_name
 
-def sanitize_key(name):
-    """
-    Makes strings safe to use as Dart variable names by removing invalid characters.
-    
-    Args:
-        name (str): Original string (e.g., 'User Name!')
-    
-    Returns:
-        str: Valid Dart identifier (e.g., 'user_name')
-    
-    Example:
-        >>> sanitize_key('User Name!')
-        'user_name'
-    """
-    return re.sub(r'[^0-9a-zA-Z]+', '_', str(name).strip()).lower()
+logger = logging.getLogger(__name__)
 
 def generate_dart_code(df, class_name, preview=False, metadata=None):
     """
@@ -66,72 +53,87 @@ def generate_dart_code(df, class_name, preview=False, metadata=None):
         if not database_column:
             raise ValueError("Database column name is required")
         
-        # Normalize column names in DataFrame
-        df.columns = [col.strip().lower() for col in df.columns]
-        database_column = database_column.strip().lower()
-        
-        if database_column not in df.columns:
-            raise ValueError(f"Database column '{database_column}' not found in DataFrame. Available columns: {df.columns.tolist()}")
-        
-        # Get unique database values (these will be our class properties)
-        database_values = df[database_column].unique()
-        
-        # Filter out any empty or NaN values and clean the values
-        database_values = [str(val).strip() for val in database_values if pd.notna(val) and str(val).strip()]
-        
-        # Generate the Dart class code
-        code = [f"class {class_name} {{"]
+        return _render_dart_class(class_name, get_database_values(df, database_column))
         
-        # Add nullable fields
-        class_name_lower = class_name.lower()
-        code.append(f"  String? {class_name_lower}Id;")
-        
-        # Add other fields with nullable types from database values
-        for db_value in database_values:
-            var_name = db_value.lower().replace(' ', '_').replace('-', '_')
-            code.append(f"  String? {var_name};")
-        
-        code.append("")
-        
-        # Add fromJson constructor for JSON deserialization
-        code.append(f"  {class_name}.fromJson(Map<String, dynamic> json) {{")
-        code.append(f"    {class_name_lower}Id = json['{class_name_lower}Id'];")
-        for db_value in database_values:
-            var_name = db_value.lower().replace(' ', '_').replace('-', '_')
-            code.append(f"    {var_name} = json['{var_name}'];")
-        code.append("  }}")
-        
-        code.append("")
-        
-        # Add getDataTypeMap method for type information
-        code.append("  Map<String, String> getDataTypeMap() {")
-        code.append("    return {")
-        code.append(f"      '{class_name_lower}Id': 'String',")
-        for db_value in database_values:
-            var_name = db_value.lower().replace(' ', '_').replace('-', '_')
-            code.append(f"      '{var_name}': 'String',")
-        code.append("    };")
-        code.append("  }")
-        
-        code.append("")
-        
-        # Add toString method for debugging
-        code.append("  @override")
-        code.append("  String toString() {")
-        field_strings = []
-        field_strings.append(f"{class_name_lower}Id: ${class_name_lower}Id")
-        for db_value in database_values:
-            var_name = db_value.lower().replace(' ', '_').replace('-', '_')
-            field_strings.append(f"{var_name}: ${var_name}")
-        toString_content = ", ".join(field_strings)
-        code.append(f"    return '{class_name}({toString_content})';")
-        code.append("  }")
-        
-        code.append("}")
-        
-        return '\n'.join(code)
-        
-    except Exception as e:
-        print(f"Error generating Dart code: {e}")
-        print(f"DataFrame columns: {df.columns.tolist()}")  # Debug print
-        raise 
\ No newline at end of file
+    except Exception:
+        logger.exception("Error generating Dart code for %s (columns: %s)", class_name, df.columns.tolist())
+        raise
+
+def get_database_values(df, database_column):
+    """
+    Returns the distinct database values of a sheet, in order of first
+    appearance, which become the fields of the Dart class.
+    
+    Column names are compared after stripping and lowercasing, and empty or
+    missing values are skipped.
+    
+    Args:
+        df (pandas.DataFrame): The processed Excel data
+        database_column (str): Name of the database column
+    
+    Returns:
+        list: Stripped database values (e.g., ['name', 'age'])
+    
+    Raises:
+        ValueError: If the sheet has no such column
+    """
+    # Normalize column names without renaming the caller's DataFrame
+    columns = [col.strip().lower() for col in df.columns]
+    database_column = database_column.strip().lower()
+    
+    if database_column not in columns:
+        raise ValueError(f"Database column '{database_column}' not found in DataFrame. Available columns: {columns}")
+    
+    # Get unique database values (these will be our class properties)
+    database_values = df.iloc[:, columns.index(database_column)].unique()
+    
+    # Filter out any empty or NaN values and clean the values
+    return [str(val).strip() for val in database_values if pd.notna(val) and str(val).strip()]
+
+# One line (or toString entry) per field; the identifier is the only argument
+_FIELD_TEMPLATE = "\n  String? {0};"
+_FROM_JSON_TEMPLATE = "\n    {0} = json['{0}'];"
+_DATA_TYPE_TEMPLATE = "\n      '{0}': 'String',"
+_TO_STRING_TEMPLATE = ", {0}: ${0}"
+
+def _render_dart_class(class_name, database_values):
+    """
+    Renders a Dart class from its field values.
+    
+    Field names are computed once, then each section of the class is
+    rendered from the precompiled templates above and joined once, so the
+    class is built in one linear pass.
+    
+    Args:
+        class_name (str): Name for the Dart class (e.g., 'UserModel')
+        database_values (list): Field values, see get_database_values()
+    
+    Returns:
+        str: The Dart class code
+    """
+    var_names = [dart_field_name(db_value) for db_value in database_values]
+    class_name_lower = class_name.lower()
+    
+    def render(template):
+        return ''.join(map(template.format, var_names))
+    
+    return ''.join([
+        # Nullable fields
+        f"class {class_name} {{\n  String? {class_name_lower}Id;",
+        render(_FIELD_TEMPLATE),
+        # fromJson constructor for JSON deserialization
+        f"\n\n  {class_name}.fromJson(Map<String, dynamic> json) {{",
+        f"\n    {class_name_lower}Id = json['{class_name_lower}Id'];",
+        render(_FROM_JSON_TEMPLATE),
+        "\n  }}",
+        # getDataTypeMap method for type information
+        "\n\n  Map<String, String> getDataTypeMap() {\n    return {",
+        f"\n      '{class_name_lower}Id': 'String',",
+        render(_DATA_TYPE_TEMPLATE),
+        "\n    };\n  }",
+        # toString method for debugging
+        "\n\n  @override\n  String toString() {",
+        f"\n    return '{class_name}({class_name_lower}Id: ${class_name_lower}Id",
+        render(_TO_STRING_TEMPLATE),
+        ")';\n  }\n}",
+    ])
@@ -0,0 +1,155 @@
+"""
+Row-level diffs between two versions of a workbook.
+Survey files are re-uploaded many times with small edits. Each version's
+questions and fields are keyed by their generated key (derived from the
+database column), every entry gets a hashed signature, and the two
+versions are compared key by key with dictionary lookups, so a diff is
+linear in the number of entries.
+"""
+import logging
+from .utils import get_cached_sheet_names, load_cached_sheets, iter_sheet_chunks, use_streaming_engine, match_sheet_name
+from .extractors import extract_sheet_entries, extract_sheet_entries_chunks
+
+ENTRY_KINDS = ('questions', 'fields')
+
+logger = logging.getLogger(__name__)
+
+def entry_signatures(entries):
+    """
+    Hashes every entry, keyed by its 'key'.
+
+    Returns:
+        dict: key -> (signature, entry)
+    """
+    return {entry['key']: (hash(tuple(entry.items())), entry) for entry in entries}
+
+def diff_entries(old_entries, new_entries):
+    """
+    Compares two lists of questions or fields.
+
+    Args:
+        old_entries (list): Entries of the previous version
+        new_entries (list): Entries of the new version
+
+    Returns:
+        dict: 'added' and 'removed' (lists of entries) and 'changed'
+              (list of {'key', 'before', 'after'}), in sheet order
+
+    Example:
+        >>> diff_entries([{'key': 'age', 'field_type': 'Text'}],
+        ...              [{'key': 'age', 'field_type': 'Number'}])['changed'][0]['key']
+        'age'
+    """
+    old = entry_signatures(old_entries)
+    new = entry_signatures(new_entries)
+    return {
+        'added': [entry for key, (_, entry) in new.items() if key not in old],
+        'removed': [entry for key, (_, entry) in old.items() if key not in new],
+        'changed': [
+            {'key': key, 'before': old[key][1], 'after': entry}
+            for key, (signature, entry) in new.items()
+            if key in old and old[key][0] != signature
+        ]
+    }
+
+def diff_sheet_entries(old, new):
+    """
+    Compares the questions and fields of one sheet.
+
+    Args:
+        old (dict): 'questions' and 'fields' of the previous version
+        new (dict): 'questions' and 'fields' of the new version
+
+    Returns:
+        dict: One diff_entries() result per kind ('questions', 'fields')
+    """
+    return {kind: diff_entries(old.get(kind, []), new.get(kind, [])) for kind in ENTRY_KINDS}
+
+def summarize_diff(diff):
+    """
+    Counts the changes of a diff_sheet_entries() result.
+
+    Returns:
+        dict: e.g. {'questions': {'added': 1, 'removed': 0, 'changed': 2}, 'fields': {...}}
+    """
+    return {
+        kind: {change: len(entries) for change, entries in diff[kind].items()}
+        for kind in ENTRY_KINDS
+    }
+
+def has_changes(diff):
+    """Checks whether a diff_sheet_entries() result contains any change."""
+    return any(entries for kind in ENTRY_KINDS for entries in diff[kind].values())
+
+def load_sheet_entries(file_path, sheet_name, class_name, metadata):
+    """
+    Extracts the questions and fields of a sheet with the same engine the
+    generation jobs use.
+
+    Returns:
+        dict: 'questions' and 'fields'
+    """
+    if use_streaming_engine(file_path):
+        questions, fields = extract_sheet_entries_chunks(iter_sheet_chunks(file_path, sheet_name), metadata, class_name)
+    else:
+        df = load_cached_sheets(file_path, [sheet_name])[sheet_name]
+        questions, fields = extract_sheet_entries(df, metadata, class_name)
+    return {'questions': questions, 'fields': fields}
+
+def _find_sheet(sheet_names, sheet_name):
+    """Returns the matching sheet name, or None if the workbook has no such sheet."""
+    try:
+        return match_sheet_name(sheet_names, sheet_name)
+    except ValueError:
+        return None
+
+def diff_workbooks(old_path, new_path, sheets, metadata, sheet_classes=None):
+    """
+    Compares the selected sheets of two versions of a workbook.
+
+    Args:
+        old_path (str): Path to the previous version
+        new_path (str): Path to the new version
+        sheets (list): Sheet names to compare
+        metadata (dict): Column selections made by the user
+        sheet_classes (dict, optional): Dart class name per sheet, used for
+                                        the keys (defaults to the sheet name)
+
+    Returns:
+        list: One dict per sheet with 'sheet', 'status' ('added',
+              'removed', 'changed', 'unchanged' or 'error'), 'summary'
+              (see summarize_diff()) and 'changes' (see
+              diff_sheet_entries()), or 'error'
+    """
+    sheet_classes = sheet_classes or {}
+    old_sheets = get_cached_sheet_names(old_path)
+    new_sheets = get_cached_sheet_names(new_path)
+    empty = {'questions': [], 'fields': []}
+
+    results = []
+    for sheet in sheets:
+        class_name = sheet_classes.get(sheet) or sheet
+        try:
+            old_sheet = _find_sheet(old_sheets, sheet)
+            new_sheet = _find_sheet(new_sheets, sheet)
+            if not old_sheet and not new_sheet:
+                raise ValueError(f"Sheet '{sheet}' not found in either version")
+            old = load_sheet_entries(old_path, old_sheet, class_name, metadata) if old_sheet else empty
+            new = load_sheet_entries(new_path, new_sheet, class_name, metadata) if new_sheet else empty
+            diff = diff_sheet_entries(old, new)
+            if not old_sheet:
+                status = 'added'
+            elif not new_sheet:
+                status = 'removed'
+            else:
+                status = 'changed' if has_changes(diff) else 'unchanged'
+            results.append({
+                'sheet': sheet,
+                'status': status,
+                'summary': summarize_diff(diff),
+                'changes': diff
+            })
+        except Exception as e:
+            logger.exception("Error comparing sheet %s", sheet)
+            results.append({'sheet': sheet, 'status': 'error', 'error': str(e)})
+    return results
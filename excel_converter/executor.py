@@ -0,0 +1,192 @@
+"""
+Parallel execution of independent per-sheet work.
+Sheets of a workbook are validated and converted independently of each
+other, so the work for each sheet can be spread across CPU cores. A process
+pool is used by default, with a thread pool as fallback where processes are
+unavailable, and the results always come back in the original sheet order.
+"""
+import os
+import logging
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from django.conf import settings
+from .instrumentation import collect_worker_spans, merge_spans
+
+SUPPORTED_BACKENDS = ('process', 'thread', 'serial')
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_executor_settings():
+    """
+    Reads the executor configuration from EXCEL_SETTINGS.
+
+    Returns:
+        tuple: (backend, workers) where backend is 'process', 'thread' or
+               'serial' and workers is the maximum pool size
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    backend = excel_settings.get('sheet_executor', 'process')
+    if backend not in SUPPORTED_BACKENDS:
+        logger.warning("Unknown sheet executor '%s', using 'process'", backend)
+        backend = 'process'
+    workers = excel_settings.get('sheet_workers') or os.cpu_count() or 1
+    return backend, max(1, int(workers))
+
+def uses_processes(count):
+    """
+    Tells whether map_sheets() would send count sheets to worker processes,
+    so callers can prepare data that is expensive to pickle.
+    """
+    backend, workers = get_executor_settings()
+    return backend == 'process' and min(workers, count) > 1
+
+def _get_pool(backend, workers):
+    """Returns the shared pool for a backend, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(backend)
+        if pool is None:
+            if backend == 'process':
+                pool = ProcessPoolExecutor(max_workers=workers)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sheet')
+            _pools[backend] = pool
+        return pool
+
+def _discard_pool(backend, pool):
+    """Drops a pool that can no longer be used so the next call creates a new one."""
+    with _pools_lock:
+        if _pools.get(backend) is pool:
+            del _pools[backend]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_pools():
+    """Shuts down the shared pools (e.g., at process exit or in scripts)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+def _run_task(func, args):
+    """
+    Runs one sheet's work and captures its error instead of raising, so a
+    failing sheet does not abort the others. Instrumentation spans recorded
+    by the work are returned, since workers do not share the caller's
+    collector.
+
+    Returns:
+        tuple: (result, error, stages) where error is None on success
+    """
+    try:
+        result, stages = collect_worker_spans(func, *args)
+        return result, None, stages
+    except Exception as e:
+        logger.exception("Sheet task failed")
+        return None, str(e), {}
+
+def map_sheets(func, sheet_args, on_result=None):
+    """
+    Runs func once per sheet, in parallel when possible.
+
+    func must be a module-level function and its arguments picklable, since
+    they are sent to worker processes. If the process pool cannot be used
+    (no multiprocessing support, a worker crashed, arguments that cannot be
+    pickled), the affected sheets are run on the thread pool instead.
+
+    Args:
+        func (callable): Work for a single sheet
+        sheet_args (dict): Sheet name -> tuple of positional arguments for
+                           func, in the order results should be returned
+        on_result (callable): Optional, called in the calling thread with
+                              each sheet's result dict as soon as that sheet
+                              is done (in completion order)
+
+    Returns:
+        list: One dict per sheet, in input order, with 'sheet', 'result'
+              (None on failure) and 'error' (None on success)
+
+    Example:
+        >>> map_sheets(len, {'Sheet1': ('abc',), 'Sheet2': ('de',)})
+        [{'sheet': 'Sheet1', 'result': 3, 'error': None},
+         {'sheet': 'Sheet2', 'result': 2, 'error': None}]
+    """
+    sheets = list(sheet_args)
+    backend, workers = get_executor_settings()
+
+    outcomes = {}
+    def record(sheet, outcome):
+        outcomes[sheet] = outcome
+        merge_spans(outcome[2])
+        if on_result is not None:
+            on_result({'sheet': sheet, 'result': outcome[0], 'error': outcome[1]})
+
+    pending = sheets
+    # A pool only pays off when at least two sheets can run at the same time
+    if backend != 'serial' and min(workers, len(sheets)) > 1:
+        if backend == 'process':
+            pending = _run_in_pool('process', workers, func, sheet_args, pending, record)
+        if pending:
+            pending = _run_in_pool('thread', workers, func, sheet_args, pending, record)
+
+    # Anything the pools could not run is done here, one sheet at a time
+    for sheet in pending:
+        record(sheet, _run_task(func, sheet_args[sheet]))
+
+    return [
+        {'sheet': sheet, 'result': outcomes[sheet][0], 'error': outcomes[sheet][1]}
+        for sheet in sheets
+    ]
+
+def _run_in_pool(backend, workers, func, sheet_args, sheets, record):
+    """
+    Submits sheets to a shared pool and passes each outcome to record().
+
+    Returns:
+        list: Sheets that could not be run because of the pool itself
+              (never the sheets whose own work failed)
+    """
+    try:
+        pool = _get_pool(backend, workers)
+        futures = {pool.submit(_run_task, func, sheet_args[sheet]): sheet for sheet in sheets}
+    except Exception as e:
+        logger.warning("Could not use %s pool, falling back: %s", backend, e)
+        return list(sheets)
+
+    failed = []
+    broken = False
+    for future in as_completed(futures):
+        sheet = futures[future]
+        try:
+            outcome = future.result()
+        except Exception as e:
+            # _run_task never raises, so this is a pool or pickling problem
+            logger.warning("Sheet '%s' could not run in the %s pool: %s", sheet, backend, e)
+            failed.append(sheet)
+            broken = broken or isinstance(e, BrokenExecutor)
+            continue
+        record(sheet, outcome)
+
+    if broken:
+        _discard_pool(backend, pool)
+    return [sheet for sheet in sheets if sheet in failed]
+
+def merge_parse_errors(sheets, outcomes, errors):
+    """
+    Adds the sheets that could not be read to map_sheets() outcomes.
+
+    Args:
+        sheets (list): All selected sheets, in the order to return them
+        outcomes (list): map_sheets() outcomes of the sheets that were read
+        errors (dict): Sheet name -> error message of the other sheets
+
+    Returns:
+        list: One outcome dict per sheet in sheets, as map_sheets() returns them
+    """
+    outcomes = {outcome['sheet']: outcome for outcome in outcomes}
+    return [
+        outcomes[sheet] if sheet in outcomes else {'sheet': sheet, 'result': None, 'error': errors[sheet]}
+        for sheet in sheets
+    ]
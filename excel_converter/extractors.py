@@ -0,0 +1,225 @@
+"""
+Question and field extraction for generated apps.
+This module turns a processed sheet into the question and field lists used
+by the preview templates. Keys are derived for whole columns at once and
+de-duplicated with hashing, keeping the first occurrence of each key.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from .identifiers import identifier_keys
+from .columns import resolve_columns
+
+logger = logging.getLogger(__name__)
+
+# Hardcoded field types for specific questions
+HARDCODED_FIELD_TYPES = {
+    'natural_disasters_affected': 'Multiple Choice',
+    'latitude': 'Text',
+    'longitude': 'Text',
+    'lost_income_6_month': 'Dropdown',
+    'income_lost': 'Multiple Choice',
+    'loss_of_livelihood': 'Dropdown',
+    'loss_of_livelihood_type': 'Multiple Choice'
+}
+
+def _first_occurrences(keys, mask, state=None):
+    """
+    Positions of the rows selected by mask whose key has not been seen on an
+    earlier selected row (or, with state, in an earlier chunk).
+    """
+    positions = np.flatnonzero(mask.to_numpy())
+    positions = positions[~keys.iloc[positions].duplicated(keep='first').to_numpy()]
+    if state is not None:
+        seen = state.setdefault('seen_keys', set())
+        selected_keys = keys.iloc[positions].tolist()
+        new_key = np.fromiter((key not in seen for key in selected_keys), dtype=bool, count=len(selected_keys))
+        positions = positions[new_key]
+        seen.update(selected_keys)
+    return positions
+
+def _text_column(df, col, row_count):
+    """
+    Returns a column as strings with missing values as '', or all '' if it
+    does not exist. Categorical columns (see utils.intern_strings()) stay
+    categorical, so the string methods applied to them afterwards run once
+    per category.
+    """
+    if col not in df.columns:
+        return pd.Series([''] * row_count, index=df.index, dtype=object)
+    series = df[col]
+    if isinstance(series, pd.DataFrame):
+        # Duplicate column names; use the first one
+        series = series.iloc[:, 0]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if '' not in series.cat.categories:
+            series = series.cat.add_categories('')
+        return series.fillna('')
+    return series.fillna('').astype(str)
+
+def extract_questions(df, metadata, class_name, state=None):
+    """
+    Builds the question list for a sheet.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        metadata (dict): Column selections made by the user
+        class_name (str): Dart class name of the sheet, used as key suffix
+        state (dict, optional): Carries the keys already seen from one chunk
+                                of a sheet to the next (see
+                                extract_sheet_entries_chunks())
+
+    Returns:
+        list: One dict per question with 'question', 'key', 'database',
+              'field_type' and 'question_no', in sheet order
+    """
+    roles = resolve_columns(df.columns, metadata)
+    question_col = roles['question']
+    if question_col is None:
+        return []
+
+    row_count = len(df)
+    database_col = roles['database']
+    datatype_col = roles['datatype']
+    question_no_col = roles['question_no']
+
+    question_text = _text_column(df, question_col, row_count).str.strip()
+    database_values = _text_column(df, database_col, row_count)
+
+    # Field type: data type column, then hardcoded overrides, defaulting to Text
+    if datatype_col and datatype_col in df.columns:
+        field_types = _text_column(df, datatype_col, row_count).str.strip()
+        field_types = field_types.where(field_types != '', 'Text')
+    else:
+        if state is None or not state.get('warned'):
+            logger.warning("Datatype column '%s' not found in %s", datatype_col, df.columns.tolist())
+        if state is not None:
+            state['warned'] = True
+        field_types = pd.Series(['Text'] * row_count, index=df.index, dtype=object)
+    hardcoded = database_values.str.lower().map(HARDCODED_FIELD_TYPES)
+    field_types = hardcoded.where(hardcoded.notna(), field_types)
+
+    # Question number from the dedicated column, defaulting to row index + 1
+    default_numbers = pd.Series([idx + 1 for idx in df.index], index=df.index, dtype=object)
+    if question_no_col and question_no_col in df.columns:
+        numbers = _text_column(df, question_no_col, row_count).str.strip()
+        question_numbers = numbers.where(numbers != '', default_numbers)
+    else:
+        question_numbers = default_numbers
+
+    # Key: database value if present, otherwise the question text, plus model name
+    stripped_database = database_values.str.strip()
+    key_source = stripped_database.where(stripped_database != '', question_text)
+    keys = identifier_keys(key_source) + f"_{class_name.lower()}"
+
+    # Keep the first row for each key among rows that have a question
+    selected = _first_occurrences(keys, question_text != '', state)
+
+    return [
+        {
+            'question': question,
+            'key': key,
+            'database': database,
+            'field_type': field_type,
+            'question_no': question_no
+        }
+        for question, key, database, field_type, question_no in zip(
+            question_text.iloc[selected].tolist(),
+            keys.iloc[selected].tolist(),
+            database_values.iloc[selected].tolist(),
+            field_types.iloc[selected].tolist(),
+            question_numbers.iloc[selected].tolist(),
+        )
+    ]
+
+def extract_fields(df, metadata, state=None):
+    """
+    Builds the field (answer option) list for a sheet.
+
+    Each field is attached to the closest database value above it, so
+    options listed on the rows below a question share its database key.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        metadata (dict): Column selections made by the user
+        state (dict, optional): Carries the keys already seen and the last
+                                database value from one chunk of a sheet to
+                                the next (see extract_sheet_entries_chunks())
+
+    Returns:
+        list: One dict per field with 'field', 'key' and 'database_value',
+              in sheet order
+    """
+    roles = resolve_columns(df.columns, metadata)
+    field_col = roles['field']
+    if field_col is None:
+        return []
+
+    row_count = len(df)
+    database_col = roles['database']
+
+    field_text = _text_column(df, field_col, row_count).str.strip()
+
+    # Current database context: last non-empty database value at or above each row
+    stripped_database = _text_column(df, database_col, row_count).str.strip()
+    current_database = stripped_database.where(stripped_database != '')
+    if state is not None and state.get('database') is not None and row_count:
+        # Rows at the top of a chunk belong to the last database value of the previous one
+        if pd.isna(current_database.iloc[0]):
+            current_database.iloc[0] = state['database']
+    current_database = current_database.ffill()
+    if state is not None and row_count and pd.notna(current_database.iloc[-1]):
+        state['database'] = current_database.iloc[-1]
+    has_database = current_database.notna()
+
+    # Combine: fieldkey_databasevalue (e.g., farming_income_lost)
+    field_keys = identifier_keys(field_text)
+    database_keys = identifier_keys(current_database.fillna(''))
+    keys = field_keys.where(~has_database, field_keys + '_' + database_keys)
+
+    # Keep the first row for each key among rows that have a field
+    selected = _first_occurrences(keys, field_text != '', state)
+
+    return [
+        {
+            'field': field,
+            'key': key,
+            'database_value': database_value if has_value else None
+        }
+        for field, key, database_value, has_value in zip(
+            field_text.iloc[selected].tolist(),
+            keys.iloc[selected].tolist(),
+            current_database.iloc[selected].tolist(),
+            has_database.iloc[selected].tolist(),
+        )
+    ]
+
+def extract_sheet_entries(df, metadata, class_name):
+    """
+    Extracts both questions and fields from a sheet.
+
+    Returns:
+        tuple: (questions, fields), see extract_questions() and extract_fields()
+    """
+    return extract_questions(df, metadata, class_name), extract_fields(df, metadata)
+
+def extract_sheet_entries_chunks(chunks, metadata, class_name):
+    """
+    Chunked version of extract_sheet_entries() for sheets read with
+    utils.iter_sheet_chunks().
+
+    Keys already taken in earlier chunks are skipped and fields at the top
+    of a chunk are attached to the last database value of the previous
+    chunk, so the result is the same as for the whole sheet at once.
+
+    Returns:
+        tuple: (questions, fields), see extract_questions() and extract_fields()
+    """
+    questions = []
+    fields = []
+    question_state = {}
+    field_state = {}
+    for chunk in chunks:
+        questions.extend(extract_questions(chunk, metadata, class_name, question_state))
+        fields.extend(extract_fields(chunk, metadata, field_state))
+    return questions, fields
@@ -0,0 +1,100 @@
+"""
+Per-sheet fingerprints for incremental regeneration.
+A fingerprint is the SHA-256 of a sheet's processed content together with
+the column selections and the class name it is generated with. Each
+successful generation records which artifacts it produced for its
+fingerprint, next to the artifacts themselves, so a job that sees the same
+fingerprint again (e.g., after a re-upload that only changed another
+sheet) reuses the stored code, questions and fields instead of rebuilding.
+"""
+import os
+import re
+import json
+import hashlib
+import tempfile
+import pandas as pd
+from django.conf import settings
+from .artifacts import get_artifact_root, artifact_path
+
+# Part of every fingerprint; bump it when generation changes so that older
+# results are no longer reused
+FINGERPRINT_VERSION = 1
+
+_FINGERPRINT_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def incremental_generation_enabled():
+    """Checks EXCEL_SETTINGS['incremental_generation'] (on by default)."""
+    return bool(getattr(settings, 'EXCEL_SETTINGS', {}).get('incremental_generation', True))
+
+def sheet_fingerprint(df, class_name, metadata):
+    """
+    Fingerprints a processed sheet for generation.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        class_name (str): Dart class name chosen for the sheet
+        metadata (dict): Column selections made by the user
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'version': FINGERPRINT_VERSION,
+        'class_name': class_name,
+        'metadata': metadata,
+        'columns': [str(col) for col in df.columns],
+        'rows': len(df)
+    }, sort_keys=True, default=str).encode('utf-8'))
+    # One 64-bit hash per row, covering the row's position and every cell
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def fingerprint_path(fingerprint):
+    """
+    Returns the file recording the artifacts of a fingerprint.
+
+    Raises:
+        ValueError: If fingerprint is not a SHA-256 hex digest
+    """
+    if not isinstance(fingerprint, str) or not _FINGERPRINT_PATTERN.match(fingerprint):
+        raise ValueError(f"Invalid fingerprint: {fingerprint!r}")
+    return os.path.join(get_artifact_root(), 'fingerprints', fingerprint[:2], f"{fingerprint}.json")
+
+def load_fingerprint(fingerprint):
+    """
+    Looks up the artifacts generated for a fingerprint.
+
+    Returns:
+        dict: 'code_artifact' and 'entries_artifact', or None if the sheet
+              was never generated with this fingerprint or an artifact has
+              since been removed
+    """
+    try:
+        with open(fingerprint_path(fingerprint), 'r', encoding='utf-8') as record:
+            artifacts = json.load(record)
+        if all(os.path.exists(artifact_path(artifacts[key])) for key in ('code_artifact', 'entries_artifact')):
+            return artifacts
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+def save_fingerprint(fingerprint, code_artifact, entries_artifact):
+    """
+    Records the artifacts generated for a fingerprint.
+
+    The record is written to a temporary file and renamed into place, so
+    concurrent jobs never read a partial record.
+    """
+    path = fingerprint_path(fingerprint)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as record:
+            json.dump({'code_artifact': code_artifact, 'entries_artifact': entries_artifact}, record)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -2,7 +2,7 @@
 Forms for excel_converter app.
 """
 from django import forms
-from django.conf import settings
+from .uploads import get_max_upload_size
 
 class ExcelUploadForm(forms.Form):
     """Form for Excel file upload."""
@@ -28,8 +28,9 @@ class ExcelUploadForm(forms.Form):
         file = self.cleaned_data['file']
         
         # Check file size
-        if file.size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
-            raise forms.ValidationError('File size exceeds 16MB limit.')
+        max_size = get_max_upload_size()
+        if file.size > max_size:
+            raise forms.ValidationError(f'File size exceeds {max_size // (1024 * 1024)}MB limit.')
         
         # Check file extension
         ext = file.name.rsplit('.', 1)[1].lower() if '.' in file.name else ''
@@ -0,0 +1,153 @@
+"""
+Turning sheet labels into keys, Dart identifiers and lookup names.
+All sanitization rules live here with precompiled patterns. The scalar
+functions are memoized because sheets repeat the same labels (e.g., 'Yes'
+and 'No' options) many times, and the Series functions sanitize each
+distinct value of a column only once.
+"""
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Number of distinct labels remembered by each scalar function
+CACHE_SIZE = 8192
+
+_NON_ALNUM_RUN = re.compile(r'[^0-9a-zA-Z]+')
+_NON_ALNUM = re.compile(r'[^0-9a-zA-Z]')
+_NON_LOWER_ALNUM = re.compile(r'[^a-z0-9]')
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _identifier_key(text):
+    return _NON_ALNUM_RUN.sub('_', text.strip().lower()).strip('_')
+
+def identifier_key(name):
+    """
+    Converts a label to an identifier key.
+
+    The label is lowercased, runs of non-alphanumeric characters become a
+    single underscore and leading/trailing underscores are removed.
+
+    Args:
+        name: Label (converted to str)
+
+    Returns:
+        str: Key (e.g., 'Monthly Income (LKR)' -> 'monthly_income_lkr')
+    """
+    return _identifier_key(str(name))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _sanitize_key(text):
+    return _NON_ALNUM_RUN.sub('_', text.strip()).lower()
+
+def sanitize_key(name):
+    """
+    Makes strings safe to use as Dart variable names by replacing runs of
+    invalid characters with an underscore.
+
+    Unlike identifier_key(), leading/trailing underscores are kept.
+
+    Args:
+        name (str): Original string (e.g., 'User Name')
+
+    Returns:
+        str: Valid Dart identifier (e.g., 'user_name')
+
+    Example:
+        >>> sanitize_key('User Name')
+        'user_name'
+    """
+    return _sanitize_key(str(name))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _dart_identifier(text):
+    sanitized = _NON_ALNUM_RUN.sub('_', text.strip()).strip('_')
+    # Ensure it starts with a letter
+    if sanitized and not sanitized[0].isalpha():
+        sanitized = 'a' + sanitized
+    return (sanitized or 'empty').lower()
+
+def dart_identifier(value):
+    """
+    Converts a value to a Dart identifier that starts with a letter.
+
+    Args:
+        value: Cell value; missing values give ''
+
+    Returns:
+        str: Identifier (e.g., '2 Rooms' -> 'a2_rooms', '---' -> 'empty')
+    """
+    if value is None or pd.isna(value):
+        return ''
+    return _dart_identifier(str(value))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def dart_field_name(value):
+    """
+    Converts a database value to the field name used in generated models:
+    lowercased, with spaces and hyphens replaced by underscores.
+
+    Example:
+        >>> dart_field_name('Monthly-Income Total')
+        'monthly_income_total'
+    """
+    return value.lower().replace(' ', '_').replace('-', '_')
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_column_name(text):
+    return _NON_LOWER_ALNUM.sub('', text.lower())
+
+def normalize_column_name(column):
+    """Normalize column names by removing special characters, spaces and converting to lowercase."""
+    # Convert to string in case it's a number
+    return _normalize_column_name(str(column))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_sheet_name(text):
+    return _NON_ALNUM.sub('', text.strip())
+
+def normalize_sheet_name(name):
+    """
+    Cleans up Excel sheet names by removing spaces and special characters.
+    This helps match sheet names regardless of formatting differences.
+
+    Args:
+        name (str): Original sheet name (e.g., 'My Sheet!')
+
+    Returns:
+        str: Cleaned sheet name (e.g., 'MySheet')
+
+    Example:
+        >>> normalize_sheet_name('My Data Sheet!')
+        'MyDataSheet'
+    """
+    return _normalize_sheet_name(str(name))
+
+def map_distinct(values, func, missing=''):
+    """
+    Applies a scalar function once per distinct value of a Series.
+
+    Args:
+        values (pandas.Series): Values to convert
+        func (callable): Scalar function, e.g. identifier_key
+        missing: Result for missing values
+
+    Returns:
+        pandas.Series: Converted values (object dtype), aligned with the input
+    """
+    codes, uniques = pd.factorize(values)
+    converted = np.empty(len(uniques) + 1, dtype=object)
+    converted[:-1] = [func(value) for value in uniques]
+    # Missing values get code -1, which picks the trailing entry
+    converted[-1] = missing
+    return pd.Series(converted[codes], index=values.index, dtype=object)
+
+def identifier_keys(values):
+    """
+    Series version of identifier_key().
+
+    Example:
+        >>> identifier_keys(pd.Series(['Yes', 'No', 'Yes'])).tolist()
+        ['yes', 'no', 'yes']
+    """
+    return map_distinct(values, identifier_key)
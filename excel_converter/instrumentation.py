@@ -0,0 +1,333 @@
+"""
+Per-stage timing and memory instrumentation.
+Stages of a request (upload write, workbook parse, validation, extraction,
+code emission, ...) are wrapped in span() blocks. Each span records wall
+time, CPU time and, when enabled, peak memory allocated by Python
+(tracemalloc). InstrumentationMiddleware collects the spans of a request
+and reports them in a Server-Timing header and a structured log line.
+Totals per stage are kept for the optional Prometheus /metrics/ endpoint.
+"""
+import json
+import time
+import logging
+import threading
+import tracemalloc
+import contextvars
+from contextlib import ContextDecorator
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger('excel_converter.instrumentation')
+
+_current = contextvars.ContextVar('excel_instrumentation_collector', default=None)
+
+def get_instrumentation_settings():
+    """
+    Reads the instrumentation configuration from EXCEL_SETTINGS.
+
+    Returns:
+        dict: 'enabled', 'tracemalloc' and 'metrics' flags
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    return {
+        'enabled': bool(excel_settings.get('instrumentation', True)),
+        'tracemalloc': bool(excel_settings.get('instrumentation_tracemalloc', False)),
+        'metrics': bool(excel_settings.get('metrics_endpoint', False)),
+    }
+
+def peak_rss_kb():
+    """Returns the peak resident set size of the process in KB, or None where unavailable."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class Collector:
+    """
+    The spans recorded for one request, job or worker task.
+
+    Spans with the same name are added together.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._stack = []
+
+    def add(self, name, wall, cpu, peak_bytes=None, calls=1):
+        stage = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0, 'peak_bytes': None})
+        stage['wall'] += wall
+        stage['cpu'] += cpu
+        stage['calls'] += calls
+        if peak_bytes is not None:
+            stage['peak_bytes'] = max(stage['peak_bytes'] or 0, peak_bytes)
+
+    def merge(self, stages):
+        """Adds the stages recorded elsewhere (e.g., by a worker process)."""
+        for name, stage in stages.items():
+            self.add(name, stage['wall'], stage['cpu'], stage['peak_bytes'], stage['calls'])
+
+class collect:
+    """
+    Context manager that makes a new collector current.
+
+    Example:
+        >>> with collect() as collector:
+        ...     with span('workbook_parse'):
+        ...         load_cached_sheets(path, sheets)
+        >>> collector.stages['workbook_parse']['wall']
+    """
+
+    def __enter__(self):
+        self.collector = Collector()
+        self._token = _current.set(self.collector)
+        return self.collector
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current.reset(self._token)
+        return False
+
+class span(ContextDecorator):
+    """
+    Records a stage of the current request, as a context manager or
+    decorator. Does nothing when no collector is active.
+
+    Example:
+        >>> with span('validation'):
+        ...     validate_row_data(df, required_columns)
+        >>> @span('code_emission')
+        ... def generate_dart_code(...): ...
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        # One context per entry, so the same span object can be re-entered
+        collector = _current.get()
+        entry = {'collector': collector}
+        if collector is not None:
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                # Keep the enclosing span's peak before starting a new one
+                if collector._stack:
+                    parent = collector._stack[-1]
+                    parent['peak'] = max(parent['peak'], peak)
+                tracemalloc.reset_peak()
+                entry['memory_start'] = current
+                entry['peak'] = current
+            entry['wall'] = time.perf_counter()
+            entry['cpu'] = time.thread_time()
+            collector._stack.append(entry)
+        self._entries = getattr(self, '_entries', [])
+        self._entries.append(entry)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        entry = self._entries.pop()
+        collector = entry['collector']
+        if collector is None:
+            return False
+        wall = time.perf_counter() - entry['wall']
+        cpu = time.thread_time() - entry['cpu']
+        peak_bytes = None
+        if 'memory_start' in entry and tracemalloc.is_tracing():
+            peak = max(entry['peak'], tracemalloc.get_traced_memory()[1])
+            peak_bytes = max(0, peak - entry['memory_start'])
+        if collector._stack and collector._stack[-1] is entry:
+            collector._stack.pop()
+            if collector._stack and 'peak' in collector._stack[-1] and peak_bytes is not None:
+                parent = collector._stack[-1]
+                parent['peak'] = max(parent['peak'], entry['memory_start'] + peak_bytes)
+        collector.add(self.name, wall, cpu, peak_bytes)
+        return False
+
+def current_collector():
+    """Returns the active collector, or None."""
+    return _current.get()
+
+def collect_worker_spans(func, *args):
+    """
+    Runs func with its own collector, for tasks that may run in another
+    thread or process.
+
+    Returns:
+        tuple: (result, stages) where stages can be merged into the
+               caller's collector with merge_spans()
+    """
+    if not get_instrumentation_settings()['enabled']:
+        return func(*args), {}
+    with collect() as collector:
+        result = func(*args)
+    return result, collector.stages
+
+def merge_spans(stages):
+    """Adds stages recorded by collect_worker_spans() to the active collector."""
+    collector = _current.get()
+    if collector is not None and stages:
+        collector.merge(stages)
+
+def server_timing_header(stages, total=None):
+    """
+    Formats stages as a Server-Timing header value.
+
+    Returns:
+        str: e.g. 'workbook_parse;dur=120.5;desc="cpu=118.2ms calls=3", total;dur=130.1'
+    """
+    metrics = []
+    for name, stage in stages.items():
+        desc = f"cpu={stage['cpu'] * 1000:.1f}ms calls={stage['calls']}"
+        if stage['peak_bytes'] is not None:
+            desc += f" peak={stage['peak_bytes'] // 1024}KB"
+        metrics.append(f'{name};dur={stage["wall"] * 1000:.1f};desc="{desc}"')
+    if total is not None:
+        metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
+
+def log_stages(kind, name, stages, total, **fields):
+    """
+    Writes one structured (JSON) log line with the stages of a request or job.
+    """
+    record = {
+        'event': kind,
+        'name': name,
+        'total_ms': round(total * 1000, 1),
+        'peak_rss_kb': peak_rss_kb(),
+        'stages': {
+            stage_name: {
+                'wall_ms': round(stage['wall'] * 1000, 1),
+                'cpu_ms': round(stage['cpu'] * 1000, 1),
+                'calls': stage['calls'],
+                'peak_bytes': stage['peak_bytes'],
+            }
+            for stage_name, stage in stages.items()
+        },
+    }
+    record.update(fields)
+    logger.info(json.dumps(record, sort_keys=True))
+
+class MetricsRegistry:
+    """Process-wide totals per stage, exposed in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.requests = {}
+
+    def record(self, kind, stages, total):
+        with self._lock:
+            count, seconds = self.requests.get(kind, (0, 0.0))
+            self.requests[kind] = (count + 1, seconds + total)
+            for name, stage in stages.items():
+                totals = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+                totals['calls'] += stage['calls']
+                totals['wall'] += stage['wall']
+                totals['cpu'] += stage['cpu']
+
+    def render(self):
+        """Returns the metrics in Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                '# HELP excel_converter_runs_total Instrumented requests and jobs.',
+                '# TYPE excel_converter_runs_total counter',
+            ]
+            lines += [f'excel_converter_runs_total{{kind="{kind}"}} {count}' for kind, (count, _) in sorted(self.requests.items())]
+            lines += [
+                '# HELP excel_converter_run_seconds_total Wall time of instrumented requests and jobs.',
+                '# TYPE excel_converter_run_seconds_total counter',
+            ]
+            lines += [f'excel_converter_run_seconds_total{{kind="{kind}"}} {seconds:.6f}' for kind, (_, seconds) in sorted(self.requests.items())]
+            for metric, key, help_text in (
+                ('excel_converter_stage_calls_total', 'calls', 'Number of times a stage ran.'),
+                ('excel_converter_stage_seconds_total', 'wall', 'Wall time spent in a stage.'),
+                ('excel_converter_stage_cpu_seconds_total', 'cpu', 'CPU time spent in a stage.'),
+            ):
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+                for name, totals in sorted(self.stages.items()):
+                    value = totals[key]
+                    value = f'{value:.6f}' if isinstance(value, float) else value
+                    lines.append(f'{metric}{{stage="{name}"}} {value}')
+            rss = peak_rss_kb()
+            if rss is not None:
+                lines += [
+                    '# HELP excel_converter_peak_rss_kilobytes Peak resident set size of the process.',
+                    '# TYPE excel_converter_peak_rss_kilobytes gauge',
+                    f'excel_converter_peak_rss_kilobytes {rss}',
+                ]
+            return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+class instrument_run:
+    """
+    Collects the spans of a unit of work outside a request (e.g., a
+    generation job), then logs them and adds them to the metrics.
+
+    Example:
+        >>> with instrument_run('job', str(job.pk)):
+        ...     run the job
+    """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self._enabled = get_instrumentation_settings()['enabled']
+        if self._enabled:
+            self._collect = collect()
+            self.collector = self._collect.__enter__()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._enabled:
+            total = time.perf_counter() - self._start
+            self._collect.__exit__(exc_type, exc_value, traceback)
+            log_stages(self.kind, self.name, self.collector.stages, total)
+            metrics.record(self.kind, self.collector.stages, total)
+        return False
+
+class InstrumentationMiddleware:
+    """
+    Collects the spans of each request and reports them in a Server-Timing
+    header and a structured log line.
+
+    Add 'excel_converter.instrumentation.InstrumentationMiddleware' to
+    MIDDLEWARE; EXCEL_SETTINGS['instrumentation_tracemalloc'] turns on
+    per-stage peak memory (which slows requests down noticeably).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_instrumentation_settings()
+        if not config['enabled']:
+            return self.get_response(request)
+
+        started_tracing = False
+        if config['tracemalloc'] and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        start = time.perf_counter()
+        try:
+            with collect() as collector:
+                response = self.get_response(request)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        total = time.perf_counter() - start
+
+        if collector.stages:
+            # Other middleware (e.g., the debug toolbar) may report timings too
+            timing = server_timing_header(collector.stages, total)
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+            log_stages('request', request.path, collector.stages, total,
+                       method=request.method, status=response.status_code)
+            metrics.record('request', collector.stages, total)
+        return response
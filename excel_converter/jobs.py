@@ -0,0 +1,414 @@
+"""
+Background generation jobs.
+generate_database only records a GenerationJob; the sheets are processed
+here, outside the request, either by a small in-process worker pool or by
+the run_generation_jobs management command. Progress is written to the job
+row after every sheet so the browser can poll for it.
+
+A running job is also touched by a heartbeat while its sheets are
+processed, so a job whose worker stopped can be told apart from one busy
+with a long sheet (see fail_stale_jobs()). Every write of a running job is
+conditional on it still being running, so a job that was marked failed is
+never flipped back.
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from .models import GenerationJob
+from .utils import load_cached_sheets_with_errors, use_streaming_engine
+from .executor import map_sheets, merge_parse_errors
+from .sheet_tasks import generate_sheet, generate_sheet_stream
+from .artifacts import store_text, store_json, read_json
+from .fingerprints import incremental_generation_enabled, sheet_fingerprint, load_fingerprint, save_fingerprint
+from .uploads import resolve_upload_path, previous_content_id
+from .diffs import diff_sheet_entries, summarize_diff
+from .instrumentation import instrument_run, span
+
+SUPPORTED_MODES = ('thread', 'command')
+
+logger = logging.getLogger(__name__)
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_job_settings():
+    """
+    Reads the job configuration from EXCEL_SETTINGS.
+
+    Returns:
+        tuple: (mode, workers) where mode is 'thread' (run in this process)
+               or 'command' (left for the run_generation_jobs command)
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    mode = excel_settings.get('generation_job_mode', 'thread')
+    if mode not in SUPPORTED_MODES:
+        logger.warning("Unknown generation job mode '%s', using 'thread'", mode)
+        mode = 'thread'
+    workers = max(1, int(excel_settings.get('generation_job_workers', 2)))
+    return mode, workers
+
+def get_stale_after():
+    """Returns EXCEL_SETTINGS['generation_job_stale_after'] in seconds."""
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    return float(excel_settings.get('generation_job_stale_after', 30 * 60))
+
+def is_stale(job):
+    """Tells whether a job is running without a sign of life for too long."""
+    return (job.status == GenerationJob.STATUS_RUNNING
+            and job.updated_at < timezone.now() - timedelta(seconds=get_stale_after()))
+
+def fail_stale_jobs(job_ids=None):
+    """
+    Marks running jobs that have not been touched for
+    EXCEL_SETTINGS['generation_job_stale_after'] seconds as failed.
+
+    A job running on the in-process pool is lost when the process stops;
+    without this it would stay 'running' and its page would poll forever.
+    Live jobs are touched by their heartbeat (see run_job()), however long
+    a single sheet takes.
+
+    Args:
+        job_ids (list): Only consider these jobs (default: all)
+
+    Returns:
+        int: Number of jobs marked failed
+    """
+    now = timezone.now()
+    jobs = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING,
+        updated_at__lt=now - timedelta(seconds=get_stale_after())
+    )
+    if job_ids is not None:
+        jobs = jobs.filter(pk__in=job_ids)
+    return jobs.update(
+        status=GenerationJob.STATUS_FAILED,
+        error='The job was interrupted before it finished. Please start it again.',
+        finished_at=now,
+        updated_at=now
+    )
+
+def _get_worker_pool(workers):
+    """Returns the in-process job pool, creating it on first use."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generation-job')
+        return _worker_pool
+
+def submit_job(job):
+    """
+    Queues a pending job for processing.
+
+    In 'thread' mode the job starts right away on the in-process pool; in
+    'command' mode it stays pending until a run_generation_jobs worker
+    picks it up.
+
+    Args:
+        job (GenerationJob): A saved job in the pending state
+    """
+    mode, workers = get_job_settings()
+    fail_stale_jobs()
+    if mode == 'thread':
+        _get_worker_pool(workers).submit(_run_job_in_thread, job.pk)
+
+def _run_job_in_thread(job_id):
+    """Runs a job on a pool thread, which needs its own database connection."""
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+def claim_job(job_id):
+    """
+    Marks a pending job as running.
+
+    The update only succeeds for a job that is still pending, so a job is
+    never run twice even with several workers.
+
+    Returns:
+        bool: True if this caller now owns the job
+    """
+    now = timezone.now()
+    claimed = GenerationJob.objects.filter(pk=job_id, status=GenerationJob.STATUS_PENDING).update(
+        status=GenerationJob.STATUS_RUNNING,
+        started_at=now,
+        updated_at=now
+    )
+    return claimed == 1
+
+def update_running_job(job_id, **fields):
+    """
+    Updates a job only if it is still running, refreshing updated_at.
+
+    Returns:
+        bool: False if the job is no longer running (e.g., it was marked
+              failed as stale), in which case nothing was written
+    """
+    fields['updated_at'] = timezone.now()
+    return GenerationJob.objects.filter(pk=job_id, status=GenerationJob.STATUS_RUNNING).update(**fields) == 1
+
+@contextmanager
+def heartbeat(job_id):
+    """
+    Touches a running job every quarter of the stale timeout while the
+    block runs, so a sheet that takes longer than the timeout does not get
+    its job marked failed.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(get_stale_after() / 4):
+                update_running_job(job_id)
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, name='generation-job-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_job(job_id):
+    """
+    Claims and runs a generation job, recording progress as sheets finish.
+
+    Errors in a single sheet are stored with that sheet; only errors that
+    stop the whole job (e.g., the workbook cannot be read) mark it failed.
+    If the job was marked failed while it ran, its results are dropped.
+
+    Args:
+        job_id: Primary key of the job
+
+    Returns:
+        bool: True if the job was claimed and run
+    """
+    if not claim_job(job_id):
+        return False
+    job = GenerationJob.objects.get(pk=job_id)
+
+    # Stage timings of the job go to the log and the /metrics/ totals
+    with instrument_run('job', str(job.pk)), heartbeat(job.pk):
+        try:
+            full_path = resolve_upload_path(job.filename)
+            if not os.path.exists(full_path):
+                raise ValueError('Excel file not found')
+
+            progress = {sheet: {'status': 'pending', 'error': None} for sheet in job.sheets}
+            job.progress = progress
+            update_running_job(job.pk, progress=progress)
+
+            def record_progress(outcome):
+                progress[outcome['sheet']] = {
+                    'status': 'error' if outcome['error'] is not None else 'success',
+                    'error': outcome['error']
+                }
+                update_running_job(job.pk, progress=progress)
+
+            fingerprints = {}
+            reused = {}
+            if use_streaming_engine(full_path):
+                # Very large workbooks are read in chunks by each worker
+                sheet_args = {
+                    sheet: (full_path, sheet, job.sheet_classes[sheet], job.metadata)
+                    for sheet in job.sheets
+                }
+                outcomes = map_sheets(generate_sheet_stream, sheet_args, on_result=record_progress)
+            else:
+                # Read every selected sheet from a single open of the workbook;
+                # a sheet that cannot be read fails on its own
+                frames, parse_errors = load_cached_sheets_with_errors(full_path, job.sheets)
+                for sheet, error in parse_errors.items():
+                    record_progress({'sheet': sheet, 'error': error})
+                if incremental_generation_enabled():
+                    # Sheets generated before with the same content, columns
+                    # and class name reuse their artifacts
+                    with span('fingerprint'):
+                        for sheet in frames:
+                            fingerprints[sheet] = sheet_fingerprint(frames[sheet], job.sheet_classes[sheet], job.metadata)
+                            artifacts = load_fingerprint(fingerprints[sheet])
+                            if artifacts is not None:
+                                reused[sheet] = artifacts
+                                record_progress({'sheet': sheet, 'error': None})
+                sheet_args = {
+                    sheet: (frames[sheet], job.sheet_classes[sheet], job.metadata)
+                    for sheet in job.sheets if sheet in frames and sheet not in reused
+                }
+                outcomes = map_sheets(generate_sheet, sheet_args, on_result=record_progress)
+                outcomes = merge_parse_errors([sheet for sheet in job.sheets if sheet not in reused], outcomes, parse_errors)
+
+            # The generated code and question/field lists go to the artifact
+            # store; the job only keeps their ids
+            outcomes = {outcome['sheet']: outcome for outcome in outcomes}
+            generated_files = []
+            for sheet in job.sheets:
+                class_name = job.sheet_classes[sheet]
+                if sheet in reused:
+                    generated_files.append({
+                        'sheet': sheet,
+                        'class_name': class_name,
+                        'status': 'success',
+                        'reused': True,
+                        **reused[sheet]
+                    })
+                    continue
+                outcome = outcomes[sheet]
+                if outcome['error'] is not None:
+                    generated_files.append({
+                        'sheet': sheet,
+                        'class_name': class_name,
+                        'status': 'error',
+                        'error': outcome['error']
+                    })
+                    continue
+                result = outcome['result']
+                with span('artifact_store'):
+                    code_artifact = store_text(result['generated_code'])
+                    entries_artifact = store_json({
+                        'questions': result['questions'],
+                        'fields': result['fields']
+                    })
+                    if sheet in fingerprints:
+                        save_fingerprint(fingerprints[sheet], code_artifact, entries_artifact)
+                generated_files.append({
+                    'sheet': sheet,
+                    'class_name': class_name,
+                    'status': 'success',
+                    'code_artifact': code_artifact,
+                    'entries_artifact': entries_artifact
+                })
+
+            with span('diff'):
+                record_changes(job, generated_files, outcomes)
+
+            job.progress = progress
+            job.generated_files = generated_files
+            job.status = GenerationJob.STATUS_COMPLETED
+        except Exception as e:
+            logger.exception("Generation job %s failed", job.pk)
+            job.error = str(e)
+            job.status = GenerationJob.STATUS_FAILED
+
+    job.finished_at = timezone.now()
+    finished = update_running_job(
+        job.pk,
+        progress=job.progress,
+        generated_files=job.generated_files,
+        status=job.status,
+        error=job.error,
+        finished_at=job.finished_at
+    )
+    if not finished:
+        logger.warning("Generation job %s was marked failed while it ran; its results are dropped", job.pk)
+    return True
+
+def find_previous_job(job):
+    """
+    Finds the last completed job for the previous upload of the same
+    workbook (see uploads.previous_content_id()).
+
+    Returns:
+        GenerationJob: The job, or None
+    """
+    previous = previous_content_id(job.filename)
+    if previous is None:
+        return None
+    return (GenerationJob.objects
+            .filter(filename=previous, status=GenerationJob.STATUS_COMPLETED)
+            .order_by('-finished_at')
+            .first())
+
+def record_changes(job, generated_files, outcomes):
+    """
+    Adds to each generated sheet a summary of what changed since the
+    previous upload's job ('changes', see diffs.summarize_diff()).
+
+    Entries artifacts are content-addressed, so a sheet whose artifact id is
+    the same as before has no changes and is not read back.
+
+    Args:
+        job (GenerationJob): The running job
+        generated_files (list): Per-sheet summaries built by run_job()
+        outcomes (dict): map_sheets() outcomes by sheet
+    """
+    try:
+        previous_job = find_previous_job(job)
+        if previous_job is None:
+            return
+        previous_files = {
+            entry['sheet']: entry for entry in previous_job.generated_files
+            if entry.get('entries_artifact')
+        }
+        for entry in generated_files:
+            previous = previous_files.get(entry['sheet'])
+            if entry['status'] != 'success' or previous is None:
+                continue
+            if previous['entries_artifact'] == entry['entries_artifact']:
+                diff = diff_sheet_entries({}, {})
+            else:
+                outcome = outcomes.get(entry['sheet'])
+                new = outcome['result'] if outcome else read_json(entry['entries_artifact'])
+                diff = diff_sheet_entries(read_json(previous['entries_artifact']), new)
+            entry['changes'] = summarize_diff(diff)
+    except Exception as e:
+        # The summary is informational; never fail the job over it
+        logger.warning("Could not compare with the previous upload: %s", e)
+
+def run_pending_jobs(limit=None):
+    """
+    Runs pending jobs in creation order until none are left.
+
+    Args:
+        limit (int): Optional maximum number of jobs to run
+
+    Returns:
+        int: Number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        job_id = (GenerationJob.objects
+                  .filter(status=GenerationJob.STATUS_PENDING)
+                  .values_list('pk', flat=True)
+                  .first())
+        if job_id is None:
+            break
+        if run_job(job_id):
+            count += 1
+    return count
+
+def get_job_status(job):
+    """
+    Summarizes a job for the status endpoint.
+
+    Returns:
+        dict: 'id', 'status', 'error' and 'progress' with the number of
+              finished sheets and the state of each sheet in sheet order
+    """
+    sheets = [
+        {
+            'sheet': sheet,
+            'status': job.progress.get(sheet, {}).get('status', 'pending'),
+            'error': job.progress.get(sheet, {}).get('error')
+        }
+        for sheet in job.sheets
+    ]
+    return {
+        'id': str(job.pk),
+        'status': job.status,
+        'error': job.error or None,
+        'progress': {
+            'total': len(sheets),
+            'completed': sum(1 for sheet in sheets if sheet['status'] in ('success', 'error')),
+            'sheets': sheets
+        }
+    }
@@ -0,0 +1,64 @@
+"""
+Management command to benchmark the upload -> validate -> generate pipeline.
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from excel_converter.benchmarks.runner import run_benchmarks, compare_reports, resolve_sizes
+from excel_converter.benchmarks.workbooks import SIZES
+
+def write_comparison(command, comparisons, threshold):
+    """Prints a comparison table and raises CommandError on regressions."""
+    for row in comparisons:
+        line = f"{row['size']:<8} {row['stage']:<24} {row['baseline']:>9.4f}s -> {row['current']:>9.4f}s  x{row['ratio']:.2f}"
+        if row['regression']:
+            command.stdout.write(command.style.ERROR(f'{line}  REGRESSION'))
+        else:
+            command.stdout.write(line)
+    regressions = [row for row in comparisons if row['regression']]
+    if regressions:
+        raise CommandError(f'{len(regressions)} stage(s) more than {threshold:.0%} slower than the baseline')
+    command.stdout.write(command.style.SUCCESS('No regressions'))
+
+class Command(BaseCommand):
+    help = 'Time each pipeline stage on synthetic workbooks and optionally compare with a baseline report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', action='append', choices=list(SIZES), help='Workbook size to run (repeatable, default: small)')
+        parser.add_argument('--sheets', type=int, help='Sheets of a custom workbook size')
+        parser.add_argument('--rows', type=int, help='Rows per sheet of a custom workbook size')
+        parser.add_argument('--languages', type=int, help='Languages besides English of a custom workbook size')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per stage')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the workbooks')
+        parser.add_argument('--workdir', help='Keep the generated workbooks in this directory')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--baseline', help='Compare with this earlier JSON report')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression')
+        parser.add_argument('--statistic', choices=['min', 'median'], default='median', help='Timing compared with the baseline')
+
+    def handle(self, *args, **options):
+        names = options['size'] or ([] if options['sheets'] or options['rows'] or options['languages'] is not None else ['small'])
+        try:
+            sizes = resolve_sizes(names, options['sheets'], options['rows'], options['languages'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = run_benchmarks(
+            sizes,
+            repeat=options['repeat'],
+            workdir=options['workdir'],
+            seed=options['seed'],
+            progress=self.stdout.write
+        )
+        for size, result in report['results'].items():
+            for stage, timing in result['stages'].items():
+                self.stdout.write(f"{size:<8} {stage:<24} min {timing['min']:.4f}s  median {timing['median']:.4f}s")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline'], 'r', encoding='utf-8') as baseline:
+                comparisons = compare_reports(json.load(baseline), report, options['threshold'], options['statistic'])
+            write_comparison(self, comparisons, options['threshold'])
@@ -0,0 +1,24 @@
+"""
+Management command to compare two benchmark reports.
+"""
+import json
+from django.core.management.base import BaseCommand
+from excel_converter.benchmarks.runner import compare_reports
+from .benchmark_pipeline import write_comparison
+
+class Command(BaseCommand):
+    help = 'Compare a benchmark report with a baseline report; fails if a stage regressed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Earlier JSON report')
+        parser.add_argument('current', help='New JSON report')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression')
+        parser.add_argument('--statistic', choices=['min', 'median'], default='median', help='Timing to compare')
+
+    def handle(self, *args, **options):
+        reports = []
+        for path in (options['baseline'], options['current']):
+            with open(path, 'r', encoding='utf-8') as report:
+                reports.append(json.load(report))
+        comparisons = compare_reports(reports[0], reports[1], options['threshold'], options['statistic'])
+        write_comparison(self, comparisons, options['threshold'])
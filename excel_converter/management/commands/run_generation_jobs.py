@@ -0,0 +1,26 @@
+"""
+Management command to process pending generation jobs.
+"""
+import time
+from django.core.management.base import BaseCommand
+from excel_converter.jobs import run_pending_jobs, fail_stale_jobs
+
+class Command(BaseCommand):
+    help = "Process pending generation jobs (use with EXCEL_SETTINGS['generation_job_mode'] = 'command')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the pending jobs and exit')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between checks for new jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            # Jobs left running by a worker that stopped
+            failed = fail_stale_jobs()
+            if failed:
+                self.stdout.write(self.style.WARNING(f'Marked {failed} stale job(s) failed'))
+            count = run_pending_jobs()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'Processed {count} job(s)'))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:43
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('app_name', models.CharField(max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('sheets', models.JSONField(default=list)),
+                ('sheet_classes', models.JSONField(default=dict)),
+                ('metadata', models.JSONField(default=dict)),
+                ('progress', models.JSONField(default=dict)),
+                ('generated_files', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_converter', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadedWorkbook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_name', models.CharField(db_index=True, max_length=255)),
+                ('content_id', models.CharField(db_index=True, max_length=100)),
+                ('size', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_uploaded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('original_name', 'content_id')},
+            },
+        ),
+    ]
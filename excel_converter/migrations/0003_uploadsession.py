@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:12
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_converter', '0002_uploadedworkbook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('receiving', 'Receiving'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='receiving', max_length=20)),
+                ('original_name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('chunk_size', models.IntegerField()),
+                ('received_parts', models.JSONField(default=list)),
+                ('structure_checked', models.BooleanField(default=False)),
+                ('sheets', models.JSONField(default=list)),
+                ('content_id', models.CharField(blank=True, default='', max_length=100)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_converter', '0003_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='session_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
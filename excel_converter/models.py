@@ -0,0 +1,171 @@
+"""
+Database models for excel_converter app.
+"""
+import uuid
+from django.db import models
+from .artifacts import read_text, read_json
+
+class GenerationJob(models.Model):
+    """
+    A background run of database generation for the selected sheets.
+
+    The request that starts a job only stores its inputs; the work is done
+    by a worker (see jobs.py), which records per-sheet progress while it runs
+    and the generated files once it has finished.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    # Session that started the job; only that session can see its results
+    session_key = models.CharField(max_length=40, blank=True, default='', db_index=True)
+
+    # Inputs
+    app_name = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    sheets = models.JSONField(default=list)
+    sheet_classes = models.JSONField(default=dict)
+    metadata = models.JSONField(default=dict)
+
+    # Per-sheet progress: {sheet: {'status': ..., 'error': ...}}
+    progress = models.JSONField(default=dict)
+    # One summary per sheet; the generated content is kept in the artifact store
+    generated_files = models.JSONField(default=list)
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed whenever a sheet finishes and by the job's heartbeat, so jobs
+    # left behind by a stopped worker can be told apart from slow ones
+    # (see jobs.fail_stale_jobs)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.app_name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    def get_results(self, include_content=True):
+        """
+        Returns the results in the form the result and preview pages expect.
+
+        Args:
+            include_content (bool): Read the generated code, questions and
+                                    fields from the artifact store; without
+                                    it only the per-sheet summary is returned
+
+        Returns:
+            dict: 'app_name' and 'generated_files' (one dict per sheet)
+        """
+        generated_files = []
+        for entry in self.generated_files:
+            entry = dict(entry)
+            if include_content:
+                entry.setdefault('generated_code', '')
+                entry.setdefault('questions', [])
+                entry.setdefault('fields', [])
+                if entry.get('code_artifact'):
+                    entry['generated_code'] = read_text(entry['code_artifact'])
+                if entry.get('entries_artifact'):
+                    entry.update(read_json(entry['entries_artifact']))
+            generated_files.append(entry)
+        return {
+            'app_name': self.app_name,
+            'generated_files': generated_files
+        }
+
+    def get_code_artifact(self, filename):
+        """
+        Finds the artifact holding a generated Dart file.
+
+        Args:
+            filename (str): Download name of the file ('<ClassName>.dart')
+
+        Returns:
+            str: The artifact id, or None if the job has no such file
+        """
+        for entry in self.generated_files:
+            if entry.get('code_artifact') and f"{entry['class_name']}.dart" == filename:
+                return entry['code_artifact']
+        return None
+
+class UploadedWorkbook(models.Model):
+    """
+    Index of uploaded files: which stored content an original filename refers to.
+
+    Uploads are stored under the SHA-256 of their content (see uploads.py),
+    so the same name can point to different content over time, and the same
+    content can be uploaded under several names.
+    """
+    original_name = models.CharField(max_length=255, db_index=True)
+    # Name of the stored file: '<sha256><extension>'
+    content_id = models.CharField(max_length=100, db_index=True)
+    size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_uploaded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [('original_name', 'content_id')]
+
+    def __str__(self):
+        return f"{self.original_name} -> {self.content_id}"
+
+class UploadSession(models.Model):
+    """
+    A resumable upload sent in fixed-size parts (see upload_sessions.py).
+
+    The parts are written into a file of the final size as they arrive, in
+    any order; once every part is in, the file is moved into content-addressed
+    storage and content_id is set.
+    """
+    STATUS_RECEIVING = 'receiving'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RECEIVING, 'Receiving'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RECEIVING, db_index=True)
+    original_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    # Indexes of the parts written so far, sorted
+    received_parts = models.JSONField(default=list)
+    # Set once the file structure was checked from the received bytes
+    structure_checked = models.BooleanField(default=False)
+    sheets = models.JSONField(default=list)
+    content_id = models.CharField(max_length=100, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.original_name} ({self.status})"
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    @property
+    def missing_parts(self):
+        received = set(self.received_parts)
+        return [index for index in range(self.part_count) if index not in received]
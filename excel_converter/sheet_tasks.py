@@ -0,0 +1,152 @@
+"""
+Work done for a single sheet during validation and generation.
+These functions only take and return plain data (DataFrames, paths, lists,
+dicts), so they can run in a worker process through executor.map_sheets().
+The *_stream variants read the sheet themselves in chunks (see
+utils.iter_sheet_chunks()) instead of receiving the whole DataFrame.
+"""
+import pandas as pd
+from .utils import iter_sheet_chunks
+from .columns import get_column_index
+from .validators import validate_row_data, validate_row_data_chunks
+from .extractors import extract_sheet_entries, extract_sheet_entries_chunks
+from .dart_generator import generate_dart_code
+from .instrumentation import span
+
+def validate_sheet(df, columns_to_validate, required_row_columns):
+    """
+    Checks that a sheet has the selected columns and that its rows are filled in.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        columns_to_validate (list): Columns that must exist in the sheet
+        required_row_columns (list): Columns every question row must fill in
+
+    Returns:
+        dict: 'column_validation' ({'missing', 'present'}) and
+              'row_validation' (see validators.validate_row_data())
+    """
+    with span('validation'):
+        # Remove completely empty rows
+        df = df.dropna(how='all')
+
+        return {
+            'column_validation': check_columns(df.columns, columns_to_validate),
+            'row_validation': validate_row_data(df, required_row_columns)
+        }
+
+def validate_sheet_stream(file_path, sheet_name, columns_to_validate, required_row_columns):
+    """
+    Streaming version of validate_sheet() that reads the sheet in chunks.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str): Name of the sheet
+        columns_to_validate (list): Columns that must exist in the sheet
+        required_row_columns (list): Columns every question row must fill in
+
+    Returns:
+        dict: Same as validate_sheet()
+    """
+    columns = []
+    def chunks():
+        for chunk in iter_sheet_chunks(file_path, sheet_name):
+            # Later chunks can only add columns, so the last one has them all
+            columns[:] = list(chunk.columns)
+            yield chunk
+
+    # Includes reading the chunks, which cannot be timed apart from their use
+    with span('validation'):
+        row_validation = validate_row_data_chunks(chunks(), required_row_columns)
+    return {
+        'column_validation': check_columns(columns, columns_to_validate),
+        'row_validation': row_validation
+    }
+
+def check_columns(columns, columns_to_validate):
+    """
+    Checks which of the selected columns exist, comparing normalized names.
+
+    Returns:
+        dict: 'missing' and 'present' column lists
+    """
+    column_index = get_column_index(columns)
+
+    # Validate columns exist in sheet (using normalized names)
+    missing_columns = []
+    present_columns = []
+    for col in columns_to_validate:
+        if column_index.lookup(col) is not None:
+            present_columns.append(col)
+        else:
+            missing_columns.append(col)
+    return {
+        'missing': missing_columns,
+        'present': present_columns
+    }
+
+def generate_sheet(df, class_name, metadata):
+    """
+    Generates the Dart model and the question/field lists for a sheet.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        class_name (str): Dart class name chosen for the sheet
+        metadata (dict): Column selections made by the user
+
+    Returns:
+        dict: 'generated_code', 'questions' and 'fields'
+    """
+    with span('extraction'):
+        questions, fields = extract_sheet_entries(df, metadata, class_name)
+    with span('code_emission'):
+        code = generate_dart_code(df, class_name, preview=True, metadata=metadata)
+    return {
+        'generated_code': code,
+        'questions': questions,
+        'fields': fields
+    }
+
+def generate_sheet_stream(file_path, sheet_name, class_name, metadata):
+    """
+    Streaming version of generate_sheet() that reads the sheet in chunks.
+
+    Only the distinct database values are kept between chunks, which is all
+    the Dart model needs.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str): Name of the sheet
+        class_name (str): Dart class name chosen for the sheet
+        metadata (dict): Column selections made by the user
+
+    Returns:
+        dict: Same as generate_sheet()
+    """
+    database_col = (metadata or {}).get('database_column', '').strip().lower()
+    database_values = {}
+    first_chunk = []
+
+    def chunks():
+        for chunk in iter_sheet_chunks(file_path, sheet_name):
+            if not first_chunk:
+                first_chunk.append(chunk.head(0))
+            if database_col in chunk.columns:
+                database_values.update(dict.fromkeys(chunk[database_col].tolist()))
+            yield chunk
+
+    with span('extraction'):
+        questions, fields = extract_sheet_entries_chunks(chunks(), metadata, class_name)
+
+    # The database values in order of first appearance stand in for the sheet
+    if database_values:
+        model_df = pd.DataFrame({database_col: list(database_values)})
+    else:
+        model_df = first_chunk[0]
+    with span('code_emission'):
+        code = generate_dart_code(model_df, class_name, preview=True, metadata=metadata)
+    return {
+        'generated_code': code,
+        'questions': questions,
+        'fields': fields
+    }
@@ -0,0 +1,44 @@
+"""
+Test setup: Django with a throwaway SQLite database and media directory.
+Generation jobs are left pending ('command' mode) so tests run them with
+jobs.run_pending_jobs() instead of polling a background thread.
+"""
+import os
+import django
+import pytest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'excel_mapper.settings')
+os.environ.setdefault('DJANGO_DEBUG', 'False')
+os.environ.setdefault('EXCEL_GENERATION_JOB_MODE', 'command')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment
+)
+
+@pytest.fixture(scope='session', autouse=True)
+def django_environment(tmp_path_factory):
+    """Points the database and MEDIA_ROOT at temporary locations for the whole run."""
+    base = tmp_path_factory.mktemp('django')
+    media_root = base / 'media'
+    (media_root / 'uploads').mkdir(parents=True)
+    connections['default'].settings_dict.setdefault('TEST', {})['NAME'] = str(base / 'test.sqlite3')
+    with override_settings(MEDIA_ROOT=str(media_root)):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+@pytest.fixture
+def excel_settings():
+    """Lets a test change EXCEL_SETTINGS; the original values are restored afterwards."""
+    original = dict(settings.EXCEL_SETTINGS)
+    yield settings.EXCEL_SETTINGS
+    settings.EXCEL_SETTINGS.clear()
+    settings.EXCEL_SETTINGS.update(original)
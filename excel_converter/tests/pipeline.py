@@ -0,0 +1,129 @@
+"""
+Drives the upload -> validate -> generate flow through the views, the way a
+browser does, so the results can be compared with the baseline recorded in
+tests/baseline/ from the code before the performance work.
+
+The baseline files hold the result for every sheet of every sample workbook,
+as JSON: {workbook: {sheet: result}}. Dart code is stored as lists of lines
+(see code_lines()), and a request the views reject is stored as its status
+and body, so sheets that cannot be validated or generated are covered too.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from django.test import Client
+from ..jobs import run_pending_jobs
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / 'media' / 'uploads'
+BASELINE_DIR = Path(__file__).resolve().parent / 'baseline'
+
+# Column selections used for every sample workbook when the baseline was recorded
+VALIDATION_FORM = {
+    'columns': json.dumps(['Database', 'Questions in English', 'Data Type', 'Question no.']),
+    'database_column': 'Database',
+    'question_column': 'Questions in English',
+    'field_name_column': 'Field Names in English',
+    'datatype_column': 'Data Type',
+    'question_serial_column': 'Question no.',
+    'language_support': 'yes',
+    'question_languages': json.dumps(['English', 'Sinhala', 'Tamil']),
+    'field_languages': json.dumps(['English', 'Tamil']),
+}
+
+GENERATION_METADATA = {
+    'database_column': 'Database',
+    'question_column': 'Questions in English',
+    'field_name_column': 'Field Names in English',
+    'datatype_column': 'Data Type',
+    'question_serial_column': 'Question no.',
+    'language_support': 'no',
+    'question_languages': [],
+    'field_languages': [],
+}
+
+GENERATED_FILE_KEYS = ('sheet', 'class_name', 'status', 'error', 'generated_code', 'questions', 'fields')
+
+def load_baseline(name):
+    """Loads tests/baseline/<name>.json: {workbook: {sheet: result}}."""
+    with open(BASELINE_DIR / f'{name}.json', encoding='utf-8') as baseline:
+        return json.load(baseline)
+
+def code_lines(result):
+    """
+    The generated code of a generate_sheet() result as the Dart baseline
+    stores it: the lines of each generated file, or the rejected request.
+    """
+    if not isinstance(result, list):
+        return result
+    return [generated['generated_code'].split('\n') for generated in result]
+
+def class_name(sheet):
+    """The Dart class name the baseline used for a sheet."""
+    return 'C' + ''.join(char for char in sheet if char.isalnum())
+
+def upload_workbook(client, workbook):
+    """
+    Uploads a sample workbook through /get-sheets/.
+
+    Returns:
+        tuple: (filename, sheets) as returned by the view
+    """
+    with open(SAMPLE_DIR / workbook, 'rb') as upload:
+        data = client.post('/get-sheets/', {'file': upload}).json()
+    return data['filename'], data['sheets']
+
+def validate_sheet(client, filename, sheet):
+    """
+    Validates one sheet through /validate-columns/.
+
+    Returns:
+        dict: The validation result shown on the page, or the status and
+              body of the response if no page was rendered
+    """
+    response = client.post('/validate-columns/', dict(VALIDATION_FORM, filename=filename, sheets=json.dumps([sheet])))
+    if response.status_code == 200 and response.context:
+        return json.loads(json.dumps(response.context['validation_result'], default=str))
+    return {'status': response.status_code, 'body': response.content.decode()[:300]}
+
+def start_generation(client, filename, sheets):
+    """
+    Stores the inputs of generation in the client's session, as the column
+    and sheet pages do, and starts a job through /generate-database/.
+
+    Returns:
+        HttpResponse: The response of /generate-database/
+    """
+    session = client.session
+    session['filename'] = filename
+    session['selected_sheets'] = list(sheets)
+    session['ideal_sheet'] = sheets[0]
+    session['metadata'] = dict(GENERATION_METADATA, ideal_sheet=sheets[0])
+    session.save()
+    classes = {f'sheet_class_{sheet}': class_name(sheet) for sheet in sheets}
+    return client.post('/generate-database/', dict(classes, appName='App'))
+
+@lru_cache(maxsize=None)
+def generate_sheet(filename, sheet):
+    """
+    Generates the code of one sheet through /generate-database/ and reads
+    it back from /preview/, in a new browser session.
+
+    Results are cached, so the extraction and Dart tests share one run;
+    callers must not modify them.
+
+    Returns:
+        list: One dict per generated file (see GENERATED_FILE_KEYS), or a
+              dict with the status and body of a rejected request
+    """
+    client = Client()
+    response = start_generation(client, filename, [sheet])
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    run_pending_jobs()
+    preview = client.get('/preview/')
+    if preview.status_code != 200 or not preview.context:
+        return {'status': response.status_code, 'body': body}
+    files = [{key: generated.get(key) for key in GENERATED_FILE_KEYS} for generated in preview.context['generated_files']]
+    return json.loads(json.dumps(files, default=str))
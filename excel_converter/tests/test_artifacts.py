@@ -0,0 +1,80 @@
+"""
+Artifact store: generated content is stored once under its SHA-256, the
+session and the job hold only artifact ids, and the preview and downloads
+read the content back from the store.
+"""
+import hashlib
+import os
+import pytest
+from django.test import Client
+from ..artifacts import artifact_path, read_json, read_text, store_json, store_text
+from ..jobs import run_pending_jobs
+from ..models import GenerationJob
+from .pipeline import start_generation, upload_workbook
+
+WORKBOOK = 'Jononi Script Training (2).xlsx'
+
+@pytest.fixture
+def artifact_dir(excel_settings, tmp_path):
+    excel_settings['artifact_dir'] = str(tmp_path)
+    return tmp_path
+
+def stored_files(root):
+    return sorted(path.name for path in root.rglob('*') if path.is_file())
+
+def test_identical_content_is_stored_once(artifact_dir):
+    digest = store_text('class Household {}')
+    assert digest == hashlib.sha256(b'class Household {}').hexdigest()
+    assert store_text('class Household {}') == digest
+    assert artifact_path(digest) == os.path.join(str(artifact_dir), digest[:2], digest)
+    assert stored_files(artifact_dir) == [digest]
+    assert read_text(digest) == 'class Household {}'
+
+    entries = {'questions': [{'question': 'নাম'}], 'fields': []}
+    assert read_json(store_json(entries)) == entries
+    assert len(stored_files(artifact_dir)) == 2
+
+@pytest.mark.parametrize('digest', ['../../settings.py', 'ab', 'A' * 64, None])
+def test_only_artifact_ids_are_accepted(artifact_dir, digest):
+    with pytest.raises(ValueError):
+        artifact_path(digest)
+
+@pytest.fixture
+def generated(artifact_dir):
+    """A session whose generation job finished: (client, job)."""
+    client = Client()
+    filename, sheets = upload_workbook(client, WORKBOOK)
+    response = start_generation(client, filename, sheets)
+    job_id = response.json()['job_id']
+    run_pending_jobs()
+    return client, GenerationJob.objects.get(pk=job_id)
+
+def test_session_and_job_hold_only_artifact_ids(generated):
+    client, job = generated
+    assert job.status == GenerationJob.STATUS_COMPLETED
+    session = client.session
+    assert session['generation_job_id'] == str(job.pk)
+    assert 'generation_results' not in session
+    for entry in job.generated_files:
+        assert not {'generated_code', 'questions', 'fields'} & set(entry)
+        assert read_text(entry['code_artifact']).startswith(f"class {entry['class_name']} {{")
+
+    response = client.get('/generation-results/')
+    listed = response.context['generated_files']
+    assert [entry['sheet'] for entry in listed] == job.sheets
+    assert not any('generated_code' in entry for entry in listed)
+
+    preview = client.get('/preview/').context['generated_files']
+    assert [entry['generated_code'] for entry in preview] == [
+        read_text(entry['code_artifact']) for entry in job.generated_files
+    ]
+
+def test_downloads_are_read_from_the_store(generated):
+    client, job = generated
+    entry = job.generated_files[0]
+    response = client.get(f"/download/{entry['class_name']}.dart/")
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content).decode() == read_text(entry['code_artifact'])
+    assert client.get('/download/Missing.dart/').status_code == 404
+    # Another session cannot read the job's files
+    assert Client().get(f"/download/{entry['class_name']}.dart/").status_code == 404
@@ -0,0 +1,88 @@
+"""
+Benchmarks: the synthetic workbooks are reproducible and go through the
+pipeline like the real surveys, every stage is timed in the JSON report,
+and comparing reports flags the stages that got slower.
+"""
+import io
+import json
+import pandas as pd
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from ..benchmarks.runner import STAGES, BENCHMARK_METADATA, compare_reports, required_row_columns, resolve_sizes
+from ..benchmarks.workbooks import SIZES, build_workbook, workbook_columns
+from ..extractors import extract_sheet_entries
+from ..utils import process_excel_file
+from ..validators import validate_row_data
+
+def test_workbooks_are_reproducible(tmp_path):
+    sheets = build_workbook(tmp_path / 'a.xlsx', sheets=2, rows=40, languages=1, seed=3)
+    assert sheets == ['Survey 1', 'Survey 2']
+    build_workbook(tmp_path / 'b.xlsx', sheets=2, rows=40, languages=1, seed=3)
+    build_workbook(tmp_path / 'c.xlsx', sheets=2, rows=40, languages=1, seed=4)
+    read = lambda name: pd.read_excel(tmp_path / name, sheet_name=None)
+    first = read('a.xlsx')
+    assert list(first) == sheets
+    for df in first.values():
+        assert df.columns.tolist() == workbook_columns(1)
+        assert len(df) == 40
+    for sheet in sheets:
+        pd.testing.assert_frame_equal(read('b.xlsx')[sheet], first[sheet])
+    assert not all(read('c.xlsx')[sheet].equals(first[sheet]) for sheet in sheets)
+
+def test_workbooks_go_through_the_pipeline(tmp_path):
+    path = str(tmp_path / 'survey.xlsx')
+    [sheet] = build_workbook(path, sheets=1, rows=60, languages=2)
+    df = process_excel_file(path, sheet)
+    validation = validate_row_data(df, required_row_columns(2))
+    assert validation['valid_rows'] and not validation['invalid_rows']
+    questions, fields = extract_sheet_entries(df, BENCHMARK_METADATA, 'Survey1')
+    assert len(questions) == df['database'].str.len().gt(0).sum()
+    assert fields
+
+def report(timings):
+    """A report with the given median timings: {size: {stage: seconds}}."""
+    return {'results': {
+        size: {'stages': {stage: {'min': seconds, 'median': seconds} for stage, seconds in stages.items()}}
+        for size, stages in timings.items()
+    }}
+
+def test_compare_reports_flags_slower_stages():
+    baseline = report({'small': {'validate_row_data': 1.0, 'generate_dart_code': 2.0, 'old_stage': 1.0}})
+    current = report({'small': {'validate_row_data': 1.3, 'generate_dart_code': 2.2, 'new_stage': 1.0},
+                      'large': {'validate_row_data': 5.0}})
+    comparisons = compare_reports(baseline, current, threshold=0.2)
+    assert [(row['stage'], round(row['ratio'], 2), row['regression']) for row in comparisons] == [
+        ('validate_row_data', 1.3, True),
+        ('generate_dart_code', 1.1, False),
+    ]
+    assert not any(row['regression'] for row in compare_reports(baseline, current, threshold=0.5))
+
+def test_sizes_are_resolved():
+    assert resolve_sizes(['small']) == {'small': SIZES['small']}
+    assert resolve_sizes([], rows=10) == {'custom': dict(SIZES['small'], rows=10)}
+    assert resolve_sizes([], languages=0)['custom']['languages'] == 0
+    with pytest.raises(ValueError):
+        resolve_sizes(['huge'])
+
+def test_benchmark_commands_write_and_compare_reports(tmp_path):
+    output = tmp_path / 'report.json'
+    call_command('benchmark_pipeline', sheets=1, rows=20, languages=1, repeat=1, output=str(output), stdout=io.StringIO())
+    current = json.loads(output.read_text())
+    [(size, result)] = current['results'].items()
+    assert size == 'custom' and result['params'] == {'sheets': 1, 'rows': 20, 'languages': 1}
+    assert list(result['stages']) == STAGES
+    assert all(timing['repeat'] == 1 and timing['min'] <= timing['max'] for timing in result['stages'].values())
+
+    stdout = io.StringIO()
+    call_command('compare_benchmarks', str(output), str(output), stdout=stdout)
+    assert 'No regressions' in stdout.getvalue()
+
+    # A baseline where every stage was ten times faster
+    faster = json.loads(output.read_text())
+    for timing in faster['results']['custom']['stages'].values():
+        timing['median'] /= 10
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(faster))
+    with pytest.raises(CommandError, match=f'{len(STAGES)} stage'):
+        call_command('compare_benchmarks', str(baseline), str(output), stdout=io.StringIO())
@@ -0,0 +1,96 @@
+"""
+Column roles: the indexed resolver finds the same question, field, data
+type, question number and English columns as the nested alias loops it
+replaced, on the headers of every sample sheet; configured aliases replace
+the defaults, and the index is built once per header row.
+"""
+import pytest
+from ..columns import DEFAULT_COLUMN_ALIASES, get_column_index, resolve_columns
+from ..identifiers import normalize_column_name
+from ..utils import clean_column_names, get_cached_columns, get_cached_sheet_names
+from .pipeline import GENERATION_METADATA, SAMPLE_DIR, load_baseline
+
+def find_exact(columns, variations):
+    """The loops generate_database used for the question, field and question number columns."""
+    for possible_col in variations:
+        if possible_col:
+            for col in columns:
+                if col.lower().strip() == possible_col.lower().strip():
+                    return col
+    return None
+
+def find_data_type(columns):
+    for variation in DEFAULT_COLUMN_ALIASES['datatype']:
+        for col in columns:
+            if variation.lower() in col.lower():
+                return col
+    return None
+
+def find_english(columns):
+    """The loop validate_row_data used for the English question and field names columns."""
+    question_col = field_names_col = None
+    for col in columns:
+        if normalize_column_name(col) in DEFAULT_COLUMN_ALIASES['english_question']:
+            question_col = col
+        elif normalize_column_name(col) in DEFAULT_COLUMN_ALIASES['english_field_names']:
+            field_names_col = col
+    return question_col, field_names_col
+
+def resolve_with_loops(columns, metadata):
+    columns = list(columns)
+    english_question, english_field_names = find_english(columns)
+    return {
+        'question': find_exact(columns, [metadata['question_column']] + DEFAULT_COLUMN_ALIASES['question']),
+        'field': find_exact(columns, [metadata['field_name_column']] + DEFAULT_COLUMN_ALIASES['field']),
+        'datatype': find_data_type(columns) or metadata['datatype_column'].lower().strip(),
+        'question_no': find_exact(columns, DEFAULT_COLUMN_ALIASES['question_no']),
+        'database': metadata['database_column'].lower().strip(),
+        'english_question': english_question,
+        'english_field_names': english_field_names,
+    }
+
+def sample_headers():
+    headers = set()
+    for workbook in load_baseline('validation'):
+        path = str(SAMPLE_DIR / workbook)
+        for sheet in get_cached_sheet_names(path):
+            columns = [str(col) for col in get_cached_columns(path, sheet)]
+            headers.add(tuple(columns))
+            headers.add(tuple(clean_column_names(columns)))
+    return sorted(headers)
+
+HEADERS = [
+    ('Database', ' questions  ', 'QUESTION', 'Labels', 'Type of answer', 'SL'),
+    ('question_no', 'field_label', 'Data Type (select)', 'Questions in English', 'English Question'),
+    ('Question in Engish', 'Field Names', 'Field-Names in Eng', 'serial'),
+    ('a', 'b', 'c'),
+    (),
+]
+
+@pytest.mark.parametrize('metadata', [
+    GENERATION_METADATA,
+    dict(GENERATION_METADATA, question_column='SL', field_name_column='', datatype_column=' Kind '),
+])
+def test_roles_match_the_alias_loops(metadata):
+    headers = sample_headers() + HEADERS
+    assert len(headers) > 20
+    for columns in headers:
+        assert resolve_columns(columns, metadata) == resolve_with_loops(columns, metadata), columns
+
+def test_configured_aliases_replace_the_defaults(excel_settings):
+    columns = ('Prompt', 'Questions', 'Answer kind')
+    assert resolve_columns(columns)['question'] == 'Questions'
+    excel_settings['column_aliases'] = {'question': ['prompt'], 'datatype': ['kind']}
+    roles = resolve_columns(columns)
+    assert (roles['question'], roles['datatype']) == ('Prompt', 'Answer kind')
+    # Roles that are not configured keep their aliases
+    assert resolve_columns(('Field Names',))['field'] == 'Field Names'
+
+def test_index_is_shared_by_frames_with_the_same_header():
+    columns = ['Database', 'Questions in English', 'Data Type', 'Database']
+    index = get_column_index(columns)
+    assert get_column_index(tuple(columns)) is index
+    assert index.resolve(GENERATION_METADATA) is index.resolve(dict(GENERATION_METADATA))
+    assert index.positions == {'Database': 0, 'Questions in English': 1, 'Data Type': 2}
+    assert index.lookup('data type') == 'Data Type'
+    assert index.lookup('Questions in Tamil') is None
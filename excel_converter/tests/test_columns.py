@@ -0,0 +1,76 @@
+"""
+Column headers read from the first row only: get_excel_columns() lists the
+same columns as the frame pandas.read_excel builds from the whole sheet,
+including escaped header text and the 'Unnamed: N' columns of data wider
+than the header, and reads no further than the first row when the sheet's
+dimension says nothing lies beyond the header.
+"""
+import datetime
+import zipfile
+import pandas as pd
+import pytest
+from ..utils import get_excel_columns
+from ..xlsx import read_first_row, read_sheet_parts
+from .pipeline import SAMPLE_DIR
+from .test_xlsx_reader import rewrite_part, write_package
+
+WORKBOOKS = sorted(path.name for path in SAMPLE_DIR.glob('*.xlsx'))
+
+# Header cells: an escaped shared string (kept as is, like openpyxl), an
+# empty cell, an inline string, an error, a date and a whole float
+HEADER_ROW = (
+    '<row r="1"><c r="A1" t="s"><v>1</v></c><c r="C1" t="inlineStr"><is><t>in_x000D_line</t></is></c>'
+    '<c r="D1" t="e"><v>#N/A</v></c><c r="E1" s="1"><v>45000</v></c><c r="F1"><v>2.0</v></c></row>'
+)
+WIDE_ROW = '<row r="2"><c r="A2"><v>1</v></c><c r="H2" t="s"><v>0</v></c><c r="J2" t="s"><v>6</v></c></row>'
+
+def sheet_columns(path):
+    """(get_excel_columns(), pandas columns) of each worksheet of a workbook."""
+    with zipfile.ZipFile(path) as archive:
+        sheets = [sheet['name'] for sheet in read_sheet_parts(archive) if sheet['kind'] == 'worksheet']
+    for sheet in sheets:
+        expected = list(pd.read_excel(path, sheet_name=sheet, engine='openpyxl').columns)
+        yield sheet, get_excel_columns(str(path), sheet), expected
+
+def same_columns(columns, expected):
+    return len(columns) == len(expected) and all(
+        column == other or (pd.isna(column) and pd.isna(other))
+        for column, other in zip(columns, expected)
+    )
+
+@pytest.mark.parametrize('workbook', WORKBOOKS)
+def test_columns_match_read_excel_on_samples(workbook):
+    for sheet, columns, expected in sheet_columns(SAMPLE_DIR / workbook):
+        assert columns == expected, sheet
+
+# No dimension, a single cell (written by some tools whatever the data), a
+# range wider than the header but short of the data, and the exact range
+@pytest.mark.parametrize('dimension', [None, 'A1', 'A1:H2', 'A1:J2'])
+def test_header_is_converted_like_the_sheet_and_data_beyond_it_is_named(tmp_path, dimension):
+    path = write_package(tmp_path / 'header.xlsx', rows=[HEADER_ROW, WIDE_ROW], dimension=dimension)
+    [(_, columns, expected)] = sheet_columns(path)
+    assert same_columns(columns, expected), (columns, expected)
+    assert columns[:3] == ['a_x000D_b', 'Unnamed: 1', 'in_x000D_line']
+    assert pd.isna(columns[3])
+    assert columns[4:] == [datetime.datetime(2023, 3, 15), 2, 'Unnamed: 6', 'Unnamed: 7']
+
+def test_empty_first_row_gives_unnamed_columns(tmp_path):
+    path = write_package(tmp_path / 'header.xlsx', rows=[WIDE_ROW])
+    [(_, columns, expected)] = sheet_columns(path)
+    assert columns == expected == ['Unnamed: 0', 'Unnamed: 1', 'Unnamed: 2', 'Unnamed: 3',
+                                   'Unnamed: 4', 'Unnamed: 5', 'Unnamed: 6', 'Unnamed: 7']
+
+def test_only_the_first_row_is_read_when_the_dimension_fits(tmp_path):
+    rows = [HEADER_ROW, '<row r="2"><c r="A2"><v>1</v></c></row>']
+    source = write_package(tmp_path / 'header.xlsx', rows=rows, dimension='A1:F2')
+    # The rows after the header are never parsed, so a broken sheet body
+    # does not matter...
+    path = rewrite_part(source, tmp_path / 'broken.xlsx', 'xl/worksheets/sheet1.xml',
+                        lambda xml: xml.replace('</sheetData>', ''))
+    cells, columns = read_first_row(str(path), 'Data')
+    assert [cell['column'] for cell in cells] == [1, 3, 4, 5, 6] and columns == 6
+    # ...unless the dimension is wider than the header
+    path = rewrite_part(source, tmp_path / 'wide.xlsx', 'xl/worksheets/sheet1.xml',
+                        lambda xml: xml.replace('A1:F2', 'A1:H2').replace('</sheetData>', ''))
+    with pytest.raises(Exception):
+        read_first_row(str(path), 'Data')
@@ -0,0 +1,106 @@
+"""
+CSV uploads: the encoding and delimiter are sniffed, the file is read as a
+single 'Sheet1' with every value as text, whole and chunked reads agree,
+and a CSV goes through the views like the same table saved as .xlsx.
+"""
+import codecs
+import json
+import openpyxl
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from .. import csvfile
+from ..csvfile import detect_delimiter, detect_encoding, read_csv, read_csv_header, sniff_csv
+from ..utils import get_excel_columns, iter_sheet_chunks, process_excel_file
+from .pipeline import VALIDATION_FORM
+
+ROWS = [
+    ['Database', 'Questions in English', 'Data Type', 'Question no.', ''],
+    ['name', 'আপনার নাম কী?', 'Text', '1', ''],
+    ['age', 'Age; in years', 'Number', '2', ''],
+    ['', '', '', '', ''],
+    ['income', 'Income, monthly', 'Number', '007', 'note'],
+]
+
+def write_csv(path, rows=ROWS, sep=',', encoding='utf-8', bom=b''):
+    text = '\n'.join(sep.join(f'"{value}"' if sep in value else value for value in row) for row in rows) + '\n'
+    path.write_bytes(bom + text.encode(encoding))
+    return str(path)
+
+def write_xlsx(path, rows=ROWS):
+    book = openpyxl.Workbook()
+    book.active.title = 'Sheet1'
+    for row in rows:
+        book.active.append([value or None for value in row])
+    book.save(path)
+    return str(path)
+
+@pytest.mark.parametrize('sample,encoding', [
+    (codecs.BOM_UTF8 + b'a,b', 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE + 'a,b'.encode('utf-16-le'), 'utf-16'),
+    ('নাম'.encode('utf-8'), 'utf-8'),
+    # A character cut off by the end of the sample
+    ('নাম'.encode('utf-8')[:-1], 'utf-8'),
+    ('café au lait'.encode('cp1252'), 'cp1252'),
+    (b'\x81\x8d\x8f', 'latin-1'),
+])
+def test_encoding_is_detected(sample, encoding):
+    assert detect_encoding(sample) == encoding
+
+@pytest.mark.parametrize('sep', [',', ';', '\t', '|'])
+def test_delimiter_is_detected(tmp_path, sep):
+    assert sniff_csv(write_csv(tmp_path / 'export.csv', sep=sep)) == {'encoding': 'utf-8', 'sep': sep}
+
+def test_delimiter_defaults_to_a_comma():
+    assert detect_delimiter('single column\nvalue') == ','
+
+def test_values_are_read_as_text(tmp_path):
+    path = write_csv(tmp_path / 'export.csv', sep=';', bom=codecs.BOM_UTF8)
+    assert read_csv_header(path) == ['Database', 'Questions in English', 'Data Type', 'Question no.', 'Unnamed: 4']
+    df = read_csv(path)
+    assert df['Question no.'].tolist()[-1] == '007'
+    assert df['Questions in English'].tolist()[:2] == ['আপনার নাম কী?', 'Age; in years']
+
+def test_file_pyarrow_rejects_is_read_by_the_c_parser(tmp_path, monkeypatch):
+    # Sniffed as UTF-8 from its start, with an invalid byte further on
+    monkeypatch.setattr(csvfile, 'SNIFF_BYTES', 16)
+    path = tmp_path / 'export.csv'
+    path.write_bytes(b'Database,Question\nname,What is your name?\nage,\xff\n')
+    assert read_csv(str(path))['Question'].tolist() == ['What is your name?', '�']
+
+def test_csv_reads_like_the_same_table_in_xlsx(tmp_path):
+    csv_path = write_csv(tmp_path / 'export.csv', encoding='cp1252', rows=[
+        [value.replace('আপনার নাম কী?', 'Café?') for value in row] for row in ROWS
+    ])
+    xlsx_path = write_xlsx(tmp_path / 'export.xlsx', rows=[
+        [value.replace('আপনার নাম কী?', 'Café?') for value in row] for row in ROWS
+    ])
+    assert get_excel_columns(csv_path, 'Sheet1') == get_excel_columns(xlsx_path, 'Sheet1')
+    df = process_excel_file(csv_path, 'Sheet1')
+    expected = process_excel_file(xlsx_path, 'Sheet1')
+    # Numbers keep their text in a CSV, where an .xlsx column is re-typed
+    assert df['question_no'].fillna('').tolist() == ['1', '2', '', '007']
+    pd.testing.assert_frame_equal(df.drop(columns='question_no'), expected.drop(columns='question_no'))
+
+    chunks = list(iter_sheet_chunks(csv_path, 'Sheet1', chunk_size=2))
+    assert len(chunks) == 2
+    # Chunks keep plain string columns where the whole sheet may use categoricals
+    streamed = pd.concat([chunk.astype('string') for chunk in chunks])
+    pd.testing.assert_frame_equal(streamed, df.astype('string'), check_index_type=False)
+
+def validate_upload(path):
+    client = Client()
+    response = client.post('/get-sheets/', {'file': SimpleUploadedFile(path.name, path.read_bytes())})
+    body = response.json()
+    assert body['sheets'] == ['Sheet1'] and body['filename'].endswith(path.suffix)
+    response = client.post('/validate-columns/', dict(VALIDATION_FORM, filename=body['filename'], sheets=json.dumps(['Sheet1'])))
+    assert response.status_code == 200
+    return response.context['validation_result']
+
+def test_csv_upload_is_validated_like_the_xlsx(tmp_path):
+    write_csv(tmp_path / 'export.csv')
+    write_xlsx(tmp_path / 'export.xlsx')
+    result = validate_upload(tmp_path / 'export.csv')
+    assert result['column_validation']['Sheet1']['present'] == ['Database', 'Questions in English', 'Data Type', 'Question no.']
+    assert result == validate_upload(tmp_path / 'export.xlsx')
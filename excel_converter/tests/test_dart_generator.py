@@ -0,0 +1,75 @@
+"""
+Dart code generation: the template-based generate_dart_code() emits the
+same code as the list-building version it replaced, on a small frame and on
+every generated sheet of the sample workbooks.
+"""
+import pandas as pd
+import pytest
+from django.test import Client
+from ..dart_generator import generate_dart_code
+from .pipeline import code_lines, generate_sheet, load_baseline, upload_workbook
+
+BASELINE = load_baseline('dart')
+
+# Output of the original generator, including its doubled closing brace
+# after the fromJson constructor
+HOUSEHOLD_CODE = """class Household {
+  String? householdId;
+  String? full_name;
+  String? monthly_income;
+  String? age;
+
+  Household.fromJson(Map<String, dynamic> json) {
+    householdId = json['householdId'];
+    full_name = json['full_name'];
+    monthly_income = json['monthly_income'];
+    age = json['age'];
+  }}
+
+  Map<String, String> getDataTypeMap() {
+    return {
+      'householdId': 'String',
+      'full_name': 'String',
+      'monthly_income': 'String',
+      'age': 'String',
+    };
+  }
+
+  @override
+  String toString() {
+    return 'Household(householdId: $householdId, full_name: $full_name, monthly_income: $monthly_income, age: $age)';
+  }
+}"""
+
+def test_generate_dart_code_skips_empty_and_repeated_values():
+    df = pd.DataFrame({
+        'database': ['Full Name', 'monthly-income', '', 'Full Name', 'age'],
+        'data_type': ['Text', 'Number', '', 'Text', 'Number'],
+    })
+    assert generate_dart_code(df, 'Household', metadata={'database_column': 'database'}) == HOUSEHOLD_CODE
+
+@pytest.fixture(scope='module')
+def filenames():
+    """Content ids of the sample workbooks, uploaded once for the module."""
+    client = Client()
+    return {workbook: upload_workbook(client, workbook)[0] for workbook in BASELINE}
+
+@pytest.mark.parametrize('workbook,sheet', [
+    (workbook, sheet) for workbook, sheets in BASELINE.items() for sheet in sheets
+])
+def test_generated_code_matches_baseline(filenames, workbook, sheet):
+    assert code_lines(generate_sheet(filenames[workbook], sheet)) == BASELINE[workbook][sheet]
+
+def test_errors_are_logged_with_the_columns(caplog):
+    df = pd.DataFrame({'database': ['Full Name']})
+    with pytest.raises(ValueError):
+        generate_dart_code(df, 'Household', metadata={})
+    [record] = caplog.records
+    assert record.name == 'excel_converter.dart_generator' and record.exc_info
+    assert record.getMessage() == "Error generating Dart code for Household (columns: ['database'])"
+
+def test_class_without_fields_keeps_its_id():
+    df = pd.DataFrame({'database': ['', None]})
+    code = generate_dart_code(df, 'Empty', metadata={'database_column': 'database'})
+    assert code.startswith("class Empty {\n  String? emptyId;\n\n  Empty.fromJson(")
+    assert code.endswith("return 'Empty(emptyId: $emptyId)';\n  }\n}")
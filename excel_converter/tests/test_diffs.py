@@ -0,0 +1,138 @@
+"""
+Workbook diffs: successive uploads of the same file are compared sheet by
+sheet, keyed by the database column, through /workbook-diff/ and in the
+change summary of each generation job.
+"""
+import uuid
+import openpyxl
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from ..diffs import diff_entries
+from ..jobs import run_pending_jobs
+from ..models import GenerationJob
+from .pipeline import GENERATION_METADATA
+
+HEADER = ['Database', 'Questions in English', 'Field Names in English', 'Data Type', 'Question no.']
+
+ROWS = {
+    'Household': [
+        ['head_name', 'Name of the head of household?', 'Name', 'Text', 1],
+        ['members', 'How many members?', 'Members', 'Number', 2],
+        ['income', 'Monthly income?', 'Income', 'Number', 3],
+    ],
+    'Assets': [
+        ['land', 'Do you own land?', 'Land', 'Dropdown', 1],
+    ],
+}
+
+def edited_rows():
+    """The second version: one question reworded, one removed, one added, a sheet added."""
+    household = [list(row) for row in ROWS['Household']]
+    household[1][1] = 'How many people live in the household?'
+    del household[2]
+    household.append(['water', 'Main source of water?', 'Water', 'Dropdown', 4])
+    return {
+        'Household': household,
+        'Assets': ROWS['Assets'],
+        'Livestock': [['cattle', 'How many cattle?', 'Cattle', 'Number', 1]],
+    }
+
+def workbook_bytes(tmp_path, sheets):
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    for name, rows in sheets.items():
+        sheet = book.create_sheet(name)
+        sheet.append(HEADER)
+        for row in rows:
+            sheet.append(row)
+    path = tmp_path / f'{uuid.uuid4().hex}.xlsx'
+    book.save(path)
+    return path.read_bytes()
+
+@pytest.fixture
+def upload(tmp_path):
+    """Uploads a version of a workbook under one original name: upload(client, sheets) -> filename."""
+    name = f'survey-{uuid.uuid4().hex[:8]}.xlsx'
+
+    def send(client, sheets):
+        data = workbook_bytes(tmp_path, sheets)
+        response = client.post('/get-sheets/', {'file': SimpleUploadedFile(name, data)})
+        assert response.status_code == 200, response.content
+        return response.json()['filename']
+
+    return send
+
+def use_metadata(client, sheets):
+    session = client.session
+    session['selected_sheets'] = sheets
+    session['ideal_sheet'] = sheets[0]
+    session['metadata'] = dict(GENERATION_METADATA, ideal_sheet=sheets[0])
+    session.save()
+
+def by_sheet(results):
+    return {result['sheet']: result for result in results}
+
+def test_diff_entries_reports_added_removed_and_changed():
+    old = [{'key': 'a', 'text': 'A'}, {'key': 'b', 'text': 'B'}, {'key': 'c', 'text': 'C'}]
+    new = [{'key': 'd', 'text': 'D'}, {'key': 'b', 'text': 'B2'}, {'key': 'a', 'text': 'A'}]
+    assert diff_entries(old, new) == {
+        'added': [{'key': 'd', 'text': 'D'}],
+        'removed': [{'key': 'c', 'text': 'C'}],
+        'changed': [{'key': 'b', 'before': {'key': 'b', 'text': 'B'}, 'after': {'key': 'b', 'text': 'B2'}}],
+    }
+    assert diff_entries(old, old) == {'added': [], 'removed': [], 'changed': []}
+
+def test_workbook_diff_compares_with_the_previous_upload(upload):
+    client = Client()
+    first = upload(client, ROWS)
+    use_metadata(client, ['Household'])
+    assert client.get('/workbook-diff/').json() == {'success': True, 'filename': first, 'previous': None, 'sheets': []}
+
+    second = upload(client, edited_rows())
+    response = client.get('/workbook-diff/', {'sheet': ['Household', 'Assets', 'Livestock', 'Missing']})
+    data = response.json()
+    assert (data['filename'], data['previous']) == (second, first)
+    sheets = by_sheet(data['sheets'])
+    assert {sheet: result['status'] for sheet, result in sheets.items()} == {
+        'Household': 'changed', 'Assets': 'unchanged', 'Livestock': 'added', 'Missing': 'error',
+    }
+    questions = sheets['Household']['changes']['questions']
+    assert [entry['database'] for entry in questions['added']] == ['water']
+    assert [entry['database'] for entry in questions['removed']] == ['income']
+    [changed] = questions['changed']
+    assert (changed['before']['question'], changed['after']['question']) == (
+        'How many members?', 'How many people live in the household?')
+    assert sheets['Household']['summary']['questions'] == {'added': 1, 'removed': 1, 'changed': 1}
+
+    # An explicit earlier version can be given, and the entries left out
+    response = client.get('/workbook-diff/', {'previous': second, 'sheet': 'Household', 'summary': '1'})
+    [result] = response.json()['sheets']
+    assert result['status'] == 'unchanged' and 'changes' not in result
+
+def test_generation_job_summarizes_the_changes(upload, excel_settings, tmp_path):
+    excel_settings['artifact_dir'] = str(tmp_path / 'artifacts')
+
+    def generate(sheets):
+        client = Client()
+        filename = upload(client, sheets)
+        session = client.session
+        session['filename'] = filename
+        session.save()
+        use_metadata(client, ['Household', 'Assets'])
+        classes = {'sheet_class_Household': 'Household', 'sheet_class_Assets': 'Assets'}
+        job_id = client.post('/generate-database/', dict(classes, appName='App')).json()['job_id']
+        run_pending_jobs()
+        return GenerationJob.objects.get(pk=job_id)
+
+    first = generate(ROWS)
+    assert not any('changes' in entry for entry in first.generated_files)
+    second = generate(edited_rows())
+    changes = {entry['sheet']: entry['changes'] for entry in second.generated_files}
+    assert changes['Household']['questions'] == {'added': 1, 'removed': 1, 'changed': 1}
+    assert changes['Assets'] == {kind: {'added': 0, 'removed': 0, 'changed': 0} for kind in ('questions', 'fields')}
+
+def test_workbook_diff_needs_a_file_and_columns():
+    client = Client()
+    assert client.get('/workbook-diff/').status_code == 400
+    assert client.get('/workbook-diff/', {'filename': 'missing.xlsx'}).status_code == 404
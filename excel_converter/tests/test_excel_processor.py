@@ -0,0 +1,72 @@
+"""
+ExcelProcessor: hidden, filtered-out and collapsed rows and hidden columns
+are found from the sheet XML, agree with what openpyxl reports, and are
+dropped from the frame while the workbook itself is only parsed once.
+"""
+import openpyxl
+import pandas as pd
+import pytest
+from ExcelProcessor import ExcelProcessor
+from ..utils import normalize_strings
+from ..xlsx import read_hidden_rows_and_columns
+
+HEADER = ['Database', 'Hidden', 'Question', 'Grouped 1', 'Grouped 2', 'Data Type']
+
+@pytest.fixture
+def workbook(tmp_path):
+    """A sheet with hidden, filtered-out and collapsed rows and hidden columns."""
+    path = tmp_path / 'survey.xlsx'
+    book = openpyxl.Workbook()
+    sheet = book.active
+    sheet.title = 'Survey'
+    sheet.append(HEADER)
+    for row in range(2, 12):
+        sheet.append([f'field_{row}', f'hidden {row}', f'Question {row}?', row, row * 2, 'Text' if row % 2 else 'Number'])
+    sheet.row_dimensions[3].hidden = True
+    sheet.auto_filter.ref = 'A1:F11'
+    sheet.row_dimensions[6].hidden = True
+    sheet.row_dimensions.group(8, 9, hidden=True)
+    # Hidden rows past the data are ignored
+    sheet.row_dimensions[20].hidden = True
+    sheet.column_dimensions['B'].hidden = True
+    sheet.column_dimensions.group('D', 'E', hidden=True)
+    book.save(path)
+    return str(path)
+
+def hidden_with_openpyxl(path, sheet_name):
+    sheet = openpyxl.load_workbook(path)[sheet_name]
+    rows = {row for row, dimension in sheet.row_dimensions.items() if dimension.hidden}
+    columns = set()
+    for dimension in sheet.column_dimensions.values():
+        if dimension.hidden:
+            columns.update(range(dimension.min - 1, dimension.max))
+    return rows, columns
+
+def test_hidden_rows_and_columns_match_openpyxl(workbook):
+    hidden = read_hidden_rows_and_columns(workbook, 'Survey')
+    assert hidden == hidden_with_openpyxl(workbook, 'Survey')
+    assert hidden == ({3, 6, 8, 9, 20}, {1, 3, 4})
+    with pytest.raises(KeyError):
+        read_hidden_rows_and_columns(workbook, 'Missing')
+
+def test_hidden_rows_and_columns_are_dropped_after_one_parse(workbook, monkeypatch):
+    loads = []
+    load_workbook = openpyxl.load_workbook
+
+    def counting_load_workbook(*args, **kwargs):
+        loads.append(args)
+        return load_workbook(*args, **kwargs)
+
+    monkeypatch.setattr(openpyxl, 'load_workbook', counting_load_workbook)
+    df = ExcelProcessor(workbook, 'Survey').load_excel_skip_hidden_rows()
+    assert len(loads) == 1
+
+    full = pd.read_excel(workbook, sheet_name='Survey')
+    expected = normalize_strings(full.iloc[[0, 2, 3, 5, 8, 9], [0, 2, 5]])
+    pd.testing.assert_frame_equal(df, expected)
+    assert df['Database'].tolist() == ['field_2', 'field_4', 'field_5', 'field_7', 'field_10', 'field_11']
+
+def test_hidden_columns_can_be_kept(workbook):
+    df = ExcelProcessor(workbook, 'Survey').load_excel_skip_hidden_rows(skip_hidden_columns=False)
+    assert df.columns.tolist() == HEADER
+    assert len(df) == 6
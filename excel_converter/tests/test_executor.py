@@ -0,0 +1,84 @@
+"""
+Per-sheet parallel execution: map_sheets() returns every sheet's result in
+input order with each backend, reports a failing sheet without stopping
+the others, falls back to threads when work cannot be sent to a process,
+and /validate-columns/ gives the same results on several sheets whatever
+the backend.
+"""
+import json
+import os
+import pytest
+from django.test import Client
+from ..executor import map_sheets, merge_parse_errors, shutdown_pools, uses_processes
+from .pipeline import VALIDATION_FORM, upload_workbook
+
+BACKENDS = ['serial', 'thread', 'process']
+
+@pytest.fixture(scope='module', autouse=True)
+def pools():
+    yield
+    shutdown_pools()
+
+@pytest.fixture
+def executor(excel_settings):
+    """Sets the backend with two workers: executor(backend)."""
+    def configure(backend):
+        excel_settings['sheet_executor'] = backend
+        excel_settings['sheet_workers'] = 2
+    return configure
+
+def describe(text):
+    """Sheet work run by the tests: fails on 'bad', reports the worker's pid."""
+    if text == 'bad':
+        raise ValueError('Bad sheet')
+    return {'length': len(text), 'pid': os.getpid()}
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_results_come_back_in_sheet_order(executor, backend):
+    executor(backend)
+    sheet_args = {f'Sheet{index}': ('x' * index,) for index in range(6)}
+    sheet_args['Broken'] = ('bad',)
+    seen = []
+    outcomes = map_sheets(describe, sheet_args, on_result=lambda outcome: seen.append(outcome['sheet']))
+    assert [outcome['sheet'] for outcome in outcomes] == list(sheet_args)
+    assert [outcome['result']['length'] for outcome in outcomes[:-1]] == list(range(6))
+    assert outcomes[-1] == {'sheet': 'Broken', 'result': None, 'error': 'Bad sheet'}
+    assert sorted(seen) == sorted(sheet_args)
+    pids = {outcome['result']['pid'] for outcome in outcomes[:-1]}
+    assert (os.getpid() in pids) == (backend != 'process')
+
+def test_unpicklable_work_falls_back_to_threads(executor):
+    executor('process')
+    outcomes = map_sheets(lambda text: len(text), {'A': ('ab',), 'B': ('abc',)})
+    assert [(outcome['result'], outcome['error']) for outcome in outcomes] == [(2, None), (3, None)]
+
+def test_single_sheet_runs_in_the_caller(executor):
+    executor('process')
+    [outcome] = map_sheets(describe, {'Only': ('abc',)})
+    assert outcome['result']['pid'] == os.getpid()
+    assert not uses_processes(1) and uses_processes(2)
+    executor('thread')
+    assert not uses_processes(2)
+
+def test_parse_errors_are_merged_in_sheet_order():
+    outcomes = [{'sheet': 'B', 'result': 1, 'error': None}]
+    assert merge_parse_errors(['A', 'B', 'C'], outcomes, {'A': 'unreadable', 'C': 'empty'}) == [
+        {'sheet': 'A', 'result': None, 'error': 'unreadable'},
+        {'sheet': 'B', 'result': 1, 'error': None},
+        {'sheet': 'C', 'result': None, 'error': 'empty'},
+    ]
+
+def validate_all(filename, sheets):
+    response = Client().post('/validate-columns/', dict(VALIDATION_FORM, filename=filename, sheets=json.dumps(sheets)))
+    assert response.status_code == 200
+    return json.loads(json.dumps(response.context['validation_result'], default=str))
+
+def test_validation_of_several_sheets_does_not_depend_on_the_backend(executor):
+    filename, sheets = upload_workbook(Client(), 'Jononi Scripts.xlsx')
+    assert len(sheets) > 2
+    results = {}
+    for backend in BACKENDS:
+        executor(backend)
+        results[backend] = validate_all(filename, sheets)
+    assert results['thread'] == results['serial']
+    assert results['process'] == results['serial']
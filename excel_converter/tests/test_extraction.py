@@ -0,0 +1,58 @@
+"""
+Question and field extraction: the hashed de-duplication of
+extract_sheet_entries() and the questions and fields generated for the
+sample workbooks, compared with the baseline.
+"""
+import pandas as pd
+import pytest
+from django.test import Client
+from ..extractors import extract_sheet_entries
+from ..utils import clean_dataframe
+from .pipeline import GENERATION_METADATA, generate_sheet, load_baseline, upload_workbook
+
+BASELINE = load_baseline('entries')
+
+def survey_frame():
+    return clean_dataframe(pd.DataFrame({
+        'Database': ['Farming income', '', '', 'Farming income', '', 'natural_disasters_affected'],
+        'Questions in English': ['Income from farming?', '', '', 'Asked twice?', 'Your age?', 'Disasters?'],
+        'Field Names in English': ['', 'Lost', 'Gained', '', '', 'Flood'],
+        'Data Type': ['Number', '', '', 'Text', '', 'radio'],
+        'Question no.': ['1', '', '', '2', '', '3'],
+    }))
+
+def test_extract_sheet_entries_keeps_first_occurrence_of_each_key():
+    questions, fields = extract_sheet_entries(survey_frame(), GENERATION_METADATA, 'Survey')
+
+    # 'Asked twice?' reuses the key of the first question and is dropped;
+    # without a database value the key comes from the question text
+    assert questions == [
+        {'question': 'Income from farming?', 'key': 'farming_income_survey', 'database': 'Farming income',
+         'field_type': 'Number', 'question_no': '1'},
+        {'question': 'Your age?', 'key': 'your_age_survey', 'database': '',
+         'field_type': 'Text', 'question_no': 5},
+        {'question': 'Disasters?', 'key': 'natural_disasters_affected_survey', 'database': 'natural_disasters_affected',
+         'field_type': 'Multiple Choice', 'question_no': '3'},
+    ]
+    # Fields belong to the closest database value above them
+    assert fields == [
+        {'field': 'Lost', 'key': 'lost_farming_income', 'database_value': 'Farming income'},
+        {'field': 'Gained', 'key': 'gained_farming_income', 'database_value': 'Farming income'},
+        {'field': 'Flood', 'key': 'flood_natural_disasters_affected', 'database_value': 'natural_disasters_affected'},
+    ]
+
+@pytest.fixture(scope='module')
+def filenames():
+    """Content ids of the sample workbooks, uploaded once for the module."""
+    client = Client()
+    return {workbook: upload_workbook(client, workbook)[0] for workbook in BASELINE}
+
+@pytest.mark.parametrize('workbook,sheet', [
+    (workbook, sheet) for workbook, sheets in BASELINE.items() for sheet in sheets
+])
+def test_entries_match_baseline(filenames, workbook, sheet):
+    result = generate_sheet(filenames[workbook], sheet)
+    if isinstance(result, list):
+        # Only the questions and fields; the generated code has its own baseline
+        result = [{key: value for key, value in generated.items() if key != 'generated_code'} for generated in result]
+    assert result == BASELINE[workbook][sheet]
@@ -0,0 +1,123 @@
+"""
+Incremental regeneration: a sheet's fingerprint covers its content, the
+column selections and the class name, and a job reuses the artifacts of
+every sheet whose fingerprint it has seen, so after a re-upload that
+changed one sheet only that sheet is generated again.
+"""
+import os
+import openpyxl
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from .. import jobs
+from ..artifacts import artifact_path
+from ..fingerprints import load_fingerprint, sheet_fingerprint
+from ..models import GenerationJob
+from .pipeline import GENERATION_METADATA
+
+HEADER = ['Database', 'Questions in English', 'Field Names in English', 'Data Type', 'Question no.']
+SHEETS = ['Household', 'Members', 'Income']
+
+def write_workbook(path, changed=None):
+    """A small survey workbook; changed=(sheet, text) rewrites one question."""
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    for sheet_name in SHEETS:
+        sheet = book.create_sheet(sheet_name)
+        sheet.append(HEADER)
+        for row in range(1, 6):
+            sheet.append([f'{sheet_name} {row}', f'{sheet_name} question {row}?', f'Option {row}', 'Text', row])
+    if changed:
+        book[changed[0]]['B2'] = changed[1]
+    book.save(path)
+
+@pytest.fixture
+def generation(excel_settings, tmp_path, monkeypatch):
+    """
+    Runs generation for a version of the workbook in a new session and
+    returns (job, sheets generated by the job).
+    """
+    excel_settings['artifact_dir'] = str(tmp_path / 'artifacts')
+    excel_settings['sheet_executor'] = 'serial'
+    generated = []
+    generate_sheet = jobs.generate_sheet
+
+    def recording_generate_sheet(df, class_name, metadata):
+        generated.append(class_name)
+        return generate_sheet(df, class_name, metadata)
+
+    monkeypatch.setattr(jobs, 'generate_sheet', recording_generate_sheet)
+
+    def generate(changed=None, class_prefix=''):
+        path = tmp_path / 'survey.xlsx'
+        write_workbook(path, changed)
+        client = Client()
+        filename = client.post('/get-sheets/', {'file': SimpleUploadedFile('survey.xlsx', path.read_bytes())}).json()['filename']
+        session = client.session
+        session['filename'] = filename
+        session['selected_sheets'] = SHEETS
+        session['ideal_sheet'] = SHEETS[0]
+        session['metadata'] = dict(GENERATION_METADATA, ideal_sheet=SHEETS[0])
+        session.save()
+        classes = {f'sheet_class_{sheet}': class_prefix + sheet for sheet in SHEETS}
+        job_id = client.post('/generate-database/', dict(classes, appName='App')).json()['job_id']
+        del generated[:]
+        jobs.run_pending_jobs()
+        job = GenerationJob.objects.get(pk=job_id)
+        assert job.status == GenerationJob.STATUS_COMPLETED, job.error
+        return job, list(generated)
+
+    return generate
+
+def artifacts(job):
+    return [(entry['code_artifact'], entry['entries_artifact']) for entry in job.generated_files]
+
+def test_only_changed_sheets_are_generated_again(generation):
+    first, generated = generation()
+    assert generated == SHEETS
+    assert not any(entry.get('reused') for entry in first.generated_files)
+
+    again, generated = generation()
+    assert generated == []
+    assert [entry['reused'] for entry in again.generated_files] == [True] * 3
+    assert artifacts(again) == artifacts(first)
+
+    changed, generated = generation(changed=('Members', 'How many people live here?'))
+    assert generated == ['Members']
+    assert [entry.get('reused', False) for entry in changed.generated_files] == [True, False, True]
+    assert changed.filename != first.filename
+    assert artifacts(changed)[1] != artifacts(first)[1]
+
+def test_class_name_is_part_of_the_fingerprint(generation):
+    generation()
+    _, generated = generation(class_prefix='Survey')
+    assert generated == [f'Survey{sheet}' for sheet in SHEETS]
+
+def test_incremental_generation_can_be_turned_off(generation, excel_settings):
+    generation()
+    excel_settings['incremental_generation'] = False
+    _, generated = generation()
+    assert generated == SHEETS
+
+def test_removed_artifacts_are_not_reused(generation):
+    first, _ = generation()
+    os.remove(artifact_path(first.generated_files[0]['code_artifact']))
+    _, generated = generation()
+    assert generated == ['Household']
+
+def test_fingerprint_covers_content_columns_and_class_name():
+    df = pd.DataFrame({'database': ['a', 'b'], 'question': ['Q1', 'Q2']}, dtype='string')
+    fingerprint = sheet_fingerprint(df, 'Household', GENERATION_METADATA)
+    assert sheet_fingerprint(df.copy(), 'Household', dict(GENERATION_METADATA)) == fingerprint
+    changed = df.copy()
+    changed.loc[1, 'question'] = 'Q3'
+    others = {
+        sheet_fingerprint(changed, 'Household', GENERATION_METADATA),
+        sheet_fingerprint(df, 'Member', GENERATION_METADATA),
+        sheet_fingerprint(df, 'Household', dict(GENERATION_METADATA, question_column='question')),
+        sheet_fingerprint(df.rename(columns={'question': 'questions'}), 'Household', GENERATION_METADATA),
+        sheet_fingerprint(df.iloc[[1, 0]], 'Household', GENERATION_METADATA),
+    }
+    assert fingerprint not in others and len(others) == 5
+    assert load_fingerprint(fingerprint) is None
@@ -0,0 +1,111 @@
+"""
+Identifier sanitization: the memoized functions in identifiers.py give the
+same results as the regular expressions they replaced, on every string of
+the sample workbooks, and each distinct value is converted only once.
+"""
+import re
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+from .. import identifiers
+from ..xlsx import iter_shared_strings, read_sheet_parts
+from .pipeline import SAMPLE_DIR
+
+# The implementations identifiers.py replaced (views, utils, extractors and
+# DartCodeGenerator), kept here as the reference
+
+def reference_identifier_key(name):
+    key = str(name).strip().lower()
+    key = re.sub(r'[^0-9a-zA-Z]+', '_', key)
+    key = re.sub(r'_+', '_', key)
+    return key.strip('_')
+
+def reference_sanitize_key(name):
+    return re.sub(r'[^0-9a-zA-Z]+', '_', str(name).strip()).lower()
+
+def reference_dart_identifier(value):
+    if pd.isna(value) or value is None:
+        return ""
+    value = str(value).strip()
+    sanitized = re.sub(r'[^a-zA-Z0-9]', '_', value)
+    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = sanitized.strip('_')
+    if sanitized and not sanitized[0].isalpha():
+        sanitized = 'a' + sanitized
+    if not sanitized:
+        sanitized = 'empty'
+    return sanitized.lower()
+
+def reference_normalize_column_name(column):
+    normalized = str(column).lower().replace(' ', '')
+    return re.sub(r'[^a-z0-9]', '', normalized)
+
+def reference_normalize_sheet_name(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', str(name).strip())
+
+def reference_key_series(values):
+    return (
+        values.str.lower()
+              .str.replace(r'[^a-z0-9]+', '_', regex=True)
+              .str.replace(r'_+', '_', regex=True)
+              .str.strip('_')
+    )
+
+EDGE_CASES = [
+    '', ' ', '---', '_', '__a__', 'Monthly Income (LKR)', '  Yes ', 'Yes', '2 Rooms', '1st-floor',
+    'Field Names in English', 'Question no. ', 'naïve café', 'İstanbul', 'ß', 'ஆம்', 'හා',
+    'tab\tseparated', 'line\nbreak', 'a_x000D_b', 12, 3.5, -1, True,
+]
+
+@pytest.fixture(scope='module')
+def corpus():
+    """Every string of the sample workbooks (shared strings and sheet names) plus edge cases."""
+    values = set()
+    for path in sorted(SAMPLE_DIR.glob('*.xlsx')):
+        with zipfile.ZipFile(path) as archive:
+            values.update(iter_shared_strings(archive))
+            values.update(sheet['name'] for sheet in read_sheet_parts(archive))
+    return sorted(values) + EDGE_CASES
+
+@pytest.mark.parametrize('function,reference', [
+    (identifiers.identifier_key, reference_identifier_key),
+    (identifiers.sanitize_key, reference_sanitize_key),
+    (identifiers.dart_identifier, reference_dart_identifier),
+    (identifiers.normalize_column_name, reference_normalize_column_name),
+    (identifiers.normalize_sheet_name, reference_normalize_sheet_name),
+])
+def test_matches_reference(corpus, function, reference):
+    for value in corpus:
+        # Twice, so the second call is answered from the cache
+        assert function(value) == reference(value), value
+        assert function(value) == reference(value), value
+
+def test_dart_identifier_missing_values():
+    assert identifiers.dart_identifier(None) == ''
+    assert identifiers.dart_identifier(np.nan) == ''
+
+def test_identifier_keys_matches_reference(corpus):
+    values = pd.Series([value.strip() for value in corpus if isinstance(value, str)] * 2)
+    expected = reference_key_series(values)
+    assert identifiers.identifier_keys(values).tolist() == expected.tolist()
+
+def test_scalar_functions_are_memoized():
+    identifiers._identifier_key.cache_clear()
+    for _ in range(3):
+        identifiers.identifier_key('Monthly Income (LKR)')
+    info = identifiers._identifier_key.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+def test_map_distinct_converts_each_value_once():
+    calls = []
+
+    def convert(value):
+        calls.append(value)
+        return value.upper()
+
+    values = pd.Series(['yes', 'no', None, 'yes', 'no', 'yes'], index=[10, 11, 12, 13, 14, 15])
+    result = identifiers.map_distinct(values, convert, missing='-')
+    assert sorted(calls) == ['no', 'yes']
+    assert result.tolist() == ['YES', 'NO', '-', 'YES', 'NO', 'YES']
+    assert result.index.tolist() == values.index.tolist()
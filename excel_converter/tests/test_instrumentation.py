@@ -0,0 +1,135 @@
+"""
+Per-stage instrumentation: spans add up per stage inside a collector and do
+nothing outside one, spans recorded by workers are merged into the caller,
+and InstrumentationMiddleware reports the stages of a request in a
+Server-Timing header, a JSON log line and the opt-in /metrics/ endpoint.
+"""
+import json
+import logging
+import time
+import tracemalloc
+from django.test import Client
+from ..instrumentation import (
+    MetricsRegistry, collect, collect_worker_spans, current_collector, instrument_run,
+    merge_spans, server_timing_header, span
+)
+from .pipeline import SAMPLE_DIR
+
+WORKBOOK = 'Jononi Scripts.xlsx'
+
+def test_spans_add_up_per_stage():
+    stage = span('parse')
+    with collect() as collector:
+        for _ in range(2):
+            with stage:
+                time.sleep(0.01)
+        with span('emit'):
+            # The same span object can be entered again while it is open
+            with stage:
+                pass
+    assert current_collector() is None
+    assert list(collector.stages) == ['parse', 'emit']
+    assert collector.stages['parse']['calls'] == 3
+    assert collector.stages['parse']['wall'] >= 0.02
+    assert collector.stages['emit']['peak_bytes'] is None
+
+def test_spans_outside_a_collector_record_nothing():
+    @span('parse')
+    def parse():
+        return 'parsed'
+
+    assert parse() == 'parsed'
+    assert current_collector() is None
+
+def test_tracemalloc_records_peak_memory():
+    tracemalloc.start()
+    try:
+        with collect() as collector:
+            with span('outer'):
+                with span('allocate'):
+                    data = bytearray(4 * 1024 * 1024)
+                del data
+    finally:
+        tracemalloc.stop()
+    assert collector.stages['allocate']['peak_bytes'] >= 4 * 1024 * 1024
+    # The enclosing span's peak includes its children
+    assert collector.stages['outer']['peak_bytes'] >= collector.stages['allocate']['peak_bytes']
+
+def work(value):
+    with span('worker_stage'):
+        return value * 2
+
+def test_worker_spans_are_merged_into_the_caller(excel_settings):
+    result, stages = collect_worker_spans(work, 21)
+    assert result == 42 and stages['worker_stage']['calls'] == 1
+    with collect() as collector:
+        merge_spans(stages)
+        merge_spans(stages)
+    assert collector.stages['worker_stage']['calls'] == 2
+
+    excel_settings['instrumentation'] = False
+    assert collect_worker_spans(work, 21) == (42, {})
+
+def test_server_timing_header_format():
+    stages = {
+        'workbook_parse': {'wall': 0.1205, 'cpu': 0.1182, 'calls': 3, 'peak_bytes': 2048},
+        'validation': {'wall': 0.002, 'cpu': 0.001, 'calls': 1, 'peak_bytes': None},
+    }
+    assert server_timing_header(stages, total=0.1301) == (
+        'workbook_parse;dur=120.5;desc="cpu=118.2ms calls=3 peak=2KB", '
+        'validation;dur=2.0;desc="cpu=1.0ms calls=1", total;dur=130.1'
+    )
+
+def test_metrics_render_in_prometheus_format():
+    registry = MetricsRegistry()
+    registry.record('request', {'validation': {'wall': 0.5, 'cpu': 0.25, 'calls': 2, 'peak_bytes': None}}, 1.0)
+    registry.record('request', {'validation': {'wall': 0.5, 'cpu': 0.25, 'calls': 1, 'peak_bytes': None}}, 1.0)
+    lines = registry.render().splitlines()
+    assert 'excel_converter_runs_total{kind="request"} 2' in lines
+    assert 'excel_converter_run_seconds_total{kind="request"} 2.000000' in lines
+    assert 'excel_converter_stage_calls_total{stage="validation"} 3' in lines
+    assert 'excel_converter_stage_seconds_total{stage="validation"} 1.000000' in lines
+    assert 'excel_converter_stage_cpu_seconds_total{stage="validation"} 0.500000' in lines
+
+def upload(client):
+    with open(SAMPLE_DIR / WORKBOOK, 'rb') as workbook:
+        return client.post('/get-sheets/', {'file': workbook})
+
+def test_request_stages_are_reported(caplog):
+    with caplog.at_level(logging.INFO, logger='excel_converter.instrumentation'):
+        response = upload(Client())
+    assert response.status_code == 200
+    timing = response['Server-Timing']
+    assert 'upload_write;dur=' in timing and 'total;dur=' in timing
+    [record] = [json.loads(record.getMessage()) for record in caplog.records
+                if record.name == 'excel_converter.instrumentation']
+    assert (record['event'], record['name'], record['method'], record['status']) == (
+        'request', '/get-sheets/', 'POST', 200)
+    assert record['stages']['upload_write']['calls'] >= 1
+
+def test_disabled_instrumentation_adds_no_header(excel_settings):
+    excel_settings['instrumentation'] = False
+    response = upload(Client())
+    assert response.status_code == 200
+    assert not response.has_header('Server-Timing')
+
+def test_metrics_endpoint_is_opt_in(excel_settings):
+    client = Client()
+    assert client.get('/metrics/').status_code == 404
+    excel_settings['metrics_endpoint'] = True
+    upload(client)
+    response = client.get('/metrics/')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.content.decode()
+    assert 'excel_converter_runs_total{kind="request"}' in text
+    assert 'excel_converter_stage_calls_total{stage="upload_write"}' in text
+
+def test_runs_outside_requests_are_logged(caplog):
+    with caplog.at_level(logging.INFO, logger='excel_converter.instrumentation'):
+        with instrument_run('job', '7'):
+            with span('code_emission'):
+                pass
+    [record] = [json.loads(record.getMessage()) for record in caplog.records]
+    assert (record['event'], record['name']) == ('job', '7')
+    assert record['stages']['code_emission']['calls'] == 1
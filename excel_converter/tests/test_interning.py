@@ -0,0 +1,75 @@
+"""
+Interned sheet values: columns that repeat a few texts are stored as
+categoricals holding the same values, and validation, extraction and sheet
+fingerprints give the same results as on plain string columns.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from ..benchmarks.runner import BENCHMARK_METADATA, required_row_columns
+from ..benchmarks.workbooks import build_workbook
+from ..extractors import extract_sheet_entries
+from ..fingerprints import sheet_fingerprint
+from ..utils import STRING_DTYPE, intern_strings, normalize_strings, process_excel_file
+from ..validators import empty_mask, validate_row_data
+
+def frame():
+    df = pd.DataFrame({
+        'option': ['Yes', 'No', 'Yes', None, 'Yes', ' ', 'No', ''],
+        'question': [f'Question {i}?' for i in range(8)],
+    })
+    df.insert(2, 'option', ['Text', 'Text', None, 'Number', 'Text', 'Text', 'Text', 'Number'], allow_duplicates=True)
+    return normalize_strings(df)
+
+def values(df):
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+def test_repetitive_columns_become_categoricals_with_the_same_values():
+    df = frame()
+    interned = intern_strings(df, max_ratio=0.5)
+    assert [str(dtype) for dtype in interned.dtypes] == ['category', 'string', 'category']
+    assert interned.iloc[:, 0].cat.categories.tolist() == ['Yes', 'No', ' ', '']
+    assert interned.iloc[:, 0].cat.categories.dtype == df.iloc[:, 0].dtype
+    assert values(interned) == values(df)
+    # The input is left alone
+    assert not any(isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes)
+
+def test_interning_follows_the_setting(excel_settings):
+    excel_settings['categorical_max_ratio'] = 0
+    assert intern_strings(frame()).dtypes.tolist() == frame().dtypes.tolist()
+    excel_settings['categorical_max_ratio'] = 1
+    assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in intern_strings(frame()).dtypes)
+    assert intern_strings(frame().iloc[:0], max_ratio=1).empty
+
+@pytest.mark.parametrize('position', [0, 1, 2])
+def test_empty_cells_are_found_from_the_codes(position):
+    plain = frame().iloc[:, position]
+    interned = intern_strings(frame(), max_ratio=1).iloc[:, position]
+    expected = np.array([value is pd.NA or not value.strip() for value in plain])
+    assert np.array_equal(empty_mask(plain), expected)
+    assert np.array_equal(empty_mask(interned), expected)
+
+@pytest.fixture(scope='module')
+def survey(tmp_path_factory):
+    """A synthetic survey sheet: (plain frame, interned frame)."""
+    path = str(tmp_path_factory.mktemp('survey') / 'survey.xlsx')
+    [sheet] = build_workbook(path, sheets=1, rows=400, languages=2)
+    interned = process_excel_file(path, sheet)
+    plain = interned.astype(STRING_DTYPE)
+    assert any(isinstance(dtype, pd.CategoricalDtype) for dtype in interned.dtypes)
+    assert not any(isinstance(dtype, pd.CategoricalDtype) for dtype in plain.dtypes)
+    return plain, interned
+
+def test_results_do_not_depend_on_interning(survey):
+    plain, interned = survey
+    required = required_row_columns(2)
+    assert validate_row_data(interned, required) == validate_row_data(plain, required)
+    assert extract_sheet_entries(interned, BENCHMARK_METADATA, 'Survey') == \
+        extract_sheet_entries(plain, BENCHMARK_METADATA, 'Survey')
+    # Fingerprints recorded before interning stay valid
+    assert sheet_fingerprint(interned, 'Survey', BENCHMARK_METADATA) == \
+        sheet_fingerprint(plain, 'Survey', BENCHMARK_METADATA)
+
+def test_interned_frame_is_smaller(survey):
+    plain, interned = survey
+    assert interned.memory_usage(deep=True).sum() < plain.memory_usage(deep=True).sum()
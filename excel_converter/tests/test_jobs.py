@@ -0,0 +1,141 @@
+"""
+Generation jobs: a job started by /generate-database/ runs outside the
+request and reports per-sheet progress to its own session, a job whose
+worker stopped is failed without failing live ones, and a sheet that runs
+longer than the stale timeout keeps its job alive.
+"""
+import io
+import time
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+from .. import jobs
+from ..models import GenerationJob
+from .pipeline import start_generation, upload_workbook
+
+WORKBOOK = 'Jononi Script Training (2).xlsx'
+
+@pytest.fixture(autouse=True)
+def no_jobs():
+    """The database is shared by the whole run; start each test without jobs."""
+    GenerationJob.objects.all().delete()
+
+@pytest.fixture
+def client():
+    return Client()
+
+@pytest.fixture
+def started_job(client):
+    """A pending job for the sheets of a sample workbook: (job id, sheets)."""
+    filename, sheets = upload_workbook(client, WORKBOOK)
+    response = start_generation(client, filename, sheets)
+    assert response.status_code == 200, response.content
+    return response.json()['job_id'], sheets
+
+def running_job(session_key='', seconds_since_update=0):
+    """Records a job as if a worker were running it."""
+    job = GenerationJob.objects.create(session_key=session_key, app_name='App', filename='x.xlsx',
+                                       sheets=['Sheet'], status=GenerationJob.STATUS_RUNNING)
+    GenerationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=seconds_since_update))
+    return job
+
+def test_job_runs_outside_the_request_and_reports_progress(client, started_job):
+    job_id, sheets = started_job
+    status = client.get(f'/generation-jobs/{job_id}/').json()
+    assert status['status'] == GenerationJob.STATUS_PENDING
+    assert status['progress'] == {
+        'total': len(sheets),
+        'completed': 0,
+        'sheets': [{'sheet': sheet, 'status': 'pending', 'error': None} for sheet in sheets],
+    }
+
+    assert jobs.run_pending_jobs() == 1
+    status = client.get(f'/generation-jobs/{job_id}/').json()
+    assert status['status'] == GenerationJob.STATUS_COMPLETED
+    assert status['redirect_url'] == '/generation-results/'
+    assert status['progress']['completed'] == len(sheets)
+    assert [sheet['sheet'] for sheet in status['progress']['sheets']] == sheets
+    job = GenerationJob.objects.get(pk=job_id)
+    assert [entry['sheet'] for entry in job.generated_files] == sheets
+    assert client.get('/preview/').status_code == 200
+
+def test_job_is_only_visible_to_its_session(started_job):
+    job_id, _ = started_job
+    assert Client().get(f'/generation-jobs/{job_id}/').status_code == 404
+
+def test_job_is_claimed_once():
+    job = running_job()
+    GenerationJob.objects.filter(pk=job.pk).update(status=GenerationJob.STATUS_PENDING)
+    assert jobs.claim_job(job.pk)
+    assert not jobs.claim_job(job.pk)
+
+def test_polling_fails_only_the_polled_stale_job(client):
+    client.get('/')
+    client.session.save()
+    session_key = client.session.session_key
+    stale = running_job(session_key, seconds_since_update=3600)
+    other_stale = running_job(session_key, seconds_since_update=3600)
+    live = running_job(session_key)
+
+    status = client.get(f'/generation-jobs/{stale.pk}/').json()
+    assert status['status'] == GenerationJob.STATUS_FAILED
+    assert 'interrupted' in status['error']
+    assert client.get(f'/generation-jobs/{live.pk}/').json()['status'] == GenerationJob.STATUS_RUNNING
+    # Polling does not sweep the whole table
+    other_stale.refresh_from_db()
+    assert other_stale.status == GenerationJob.STATUS_RUNNING
+
+    assert jobs.fail_stale_jobs() == 1
+    other_stale.refresh_from_db()
+    live.refresh_from_db()
+    assert (other_stale.status, live.status) == (GenerationJob.STATUS_FAILED, GenerationJob.STATUS_RUNNING)
+
+def test_worker_command_fails_stale_jobs_and_runs_pending_ones(started_job):
+    job_id, _ = started_job
+    stale = running_job(seconds_since_update=3600)
+    call_command('run_generation_jobs', '--once', stdout=io.StringIO())
+    stale.refresh_from_db()
+    assert stale.status == GenerationJob.STATUS_FAILED
+    assert GenerationJob.objects.get(pk=job_id).status == GenerationJob.STATUS_COMPLETED
+
+@pytest.fixture
+def slow_sheets(excel_settings, monkeypatch):
+    """
+    Makes every sheet of a job take longer than the stale timeout. Halfway
+    through each sheet hooks['during_sheet'] is called with the id of the
+    running job, and what it returns is added to hooks['results'].
+    """
+    excel_settings['generation_job_stale_after'] = 0.2
+    excel_settings['sheet_executor'] = 'serial'
+    excel_settings['incremental_generation'] = False
+    hooks = {'during_sheet': lambda job_id: None, 'results': []}
+    generate_sheet = jobs.generate_sheet
+
+    def slow_generate_sheet(*args):
+        job_id = GenerationJob.objects.filter(status=GenerationJob.STATUS_RUNNING).values_list('pk', flat=True).get()
+        time.sleep(0.3)
+        hooks['results'].append(hooks['during_sheet'](job_id))
+        time.sleep(0.3)
+        return generate_sheet(*args)
+
+    monkeypatch.setattr(jobs, 'generate_sheet', slow_generate_sheet)
+    return hooks
+
+def test_long_sheet_keeps_its_job_alive(client, started_job, slow_sheets):
+    job_id, sheets = started_job
+    slow_sheets['during_sheet'] = lambda running_id: jobs.fail_stale_jobs()
+    assert jobs.run_pending_jobs() == 1
+    # Without the heartbeat the job would be stale halfway through a sheet
+    assert slow_sheets['results'] == [0] * len(sheets)
+    assert client.get(f'/generation-jobs/{job_id}/').json()['status'] == GenerationJob.STATUS_COMPLETED
+
+def test_job_failed_while_running_is_not_completed(client, started_job, slow_sheets):
+    job_id, _ = started_job
+    slow_sheets['during_sheet'] = lambda running_id: GenerationJob.objects.filter(pk=running_id).update(
+        status=GenerationJob.STATUS_FAILED, error='Stopped')
+    assert jobs.run_pending_jobs() == 1
+    job = GenerationJob.objects.get(pk=job_id)
+    assert (job.status, job.error, job.generated_files) == (GenerationJob.STATUS_FAILED, 'Stopped', [])
+    assert client.get(f'/generation-jobs/{job_id}/').json()['status'] == GenerationJob.STATUS_FAILED
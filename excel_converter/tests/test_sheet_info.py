@@ -0,0 +1,94 @@
+"""
+Sheet listing: the sheets of a workbook, their visibility and size hints
+come from the workbook index and the start of each sheet, without loading
+the workbook; the list is cached by content and returned by /get-sheets/.
+"""
+import shutil
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.chart import BarChart, Reference
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from .. import utils
+from ..utils import get_cached_sheet_info, get_sheet_info
+from ..xlsx import dimension_size
+from .pipeline import SAMPLE_DIR, load_baseline
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Visible, hidden and very hidden worksheets and a chart sheet."""
+    path = tmp_path / 'survey.xlsx'
+    book = openpyxl.Workbook()
+    data = book.active
+    data.title = 'Data'
+    for row in range(5):
+        data.append([row, row * 2, f'Row {row}'])
+    hidden = book.create_sheet('Lookups')
+    hidden.sheet_state = 'hidden'
+    hidden['B2'] = 'Yes'
+    hidden['D40'] = 'No'
+    book.create_sheet('Settings').sheet_state = 'veryHidden'
+    chart = BarChart()
+    chart.add_data(Reference(data, min_col=1, min_row=1, max_row=5))
+    book.create_chartsheet('Chart').add_chart(chart)
+    book.save(path)
+    return str(path)
+
+def test_sheets_are_listed_with_visibility_and_size(workbook, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('the workbook was loaded')
+
+    monkeypatch.setattr(openpyxl, 'load_workbook', fail)
+    monkeypatch.setattr(pd, 'ExcelFile', fail)
+    assert get_sheet_info(workbook) == [
+        {'name': 'Data', 'state': 'visible', 'dimension': 'A1:C5', 'rows': 5, 'columns': 3},
+        {'name': 'Lookups', 'state': 'hidden', 'dimension': 'B2:D40', 'rows': 39, 'columns': 3},
+        {'name': 'Settings', 'state': 'veryHidden', 'dimension': 'A1:A1', 'rows': 1, 'columns': 1},
+    ]
+
+@pytest.mark.parametrize('ref,size', [
+    ('A1:K120', (120, 11)), ('C3', (1, 1)), ('$A$1:$B$2', (2, 2)), ('', (None, None)), (None, (None, None)),
+])
+def test_dimension_size(ref, size):
+    assert dimension_size(ref) == size
+
+@pytest.mark.parametrize('workbook_name', sorted(load_baseline('validation')))
+def test_sample_sheets_match_openpyxl(workbook_name):
+    path = str(SAMPLE_DIR / workbook_name)
+    book = openpyxl.load_workbook(path, read_only=True)
+    try:
+        expected = [(sheet.title, sheet.sheet_state) for sheet in book.worksheets]
+    finally:
+        book.close()
+    assert [(sheet['name'], sheet['state']) for sheet in get_sheet_info(path)] == expected
+
+def test_sheet_list_is_cached_by_content(workbook, tmp_path, monkeypatch):
+    expected = get_sheet_info(workbook)
+    get_cached_sheet_info(workbook)
+    calls = []
+    monkeypatch.setattr(utils, 'get_sheet_info', lambda path: calls.append(path))
+    copy = shutil.copy(workbook, tmp_path / 'copy.xlsx')
+    assert get_cached_sheet_info(workbook) == expected
+    assert get_cached_sheet_info(str(copy)) == expected
+    assert calls == []
+    # Callers get copies
+    get_cached_sheet_info(workbook)[0]['name'] = 'Changed'
+    assert get_cached_sheet_info(workbook) == expected
+
+def test_get_sheets_returns_the_sheet_info(workbook):
+    with open(workbook, 'rb') as upload:
+        response = Client().post('/get-sheets/', {'file': SimpleUploadedFile('survey.xlsx', upload.read())})
+    data = response.json()
+    assert data['sheets'] == ['Data', 'Lookups', 'Settings']
+    assert data['sheet_info'] == get_sheet_info(workbook)
+
+def test_csv_and_unreadable_files(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text('a,b\n1,2\n')
+    assert get_sheet_info(str(path)) == [
+        {'name': 'Sheet1', 'state': 'visible', 'dimension': None, 'rows': None, 'columns': None}
+    ]
+    broken = tmp_path / 'broken.xlsx'
+    broken.write_bytes(b'not a workbook')
+    assert get_sheet_info(str(broken)) == []
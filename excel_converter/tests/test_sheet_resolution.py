@@ -0,0 +1,68 @@
+"""
+Sheet resolution from a single open workbook: ExcelWorkbook matches sheet
+names ignoring spaces and punctuation and parses every requested sheet from one open
+of the file, and process_excel_file()/process_excel_sheets() give the same
+frames as reading each sheet with pandas.
+"""
+import pandas as pd
+import pytest
+from .. import utils
+from ..utils import ExcelWorkbook, clean_dataframe, process_excel_file, process_excel_sheets, read_sheets
+from .pipeline import SAMPLE_DIR
+
+WORKBOOK = str(SAMPLE_DIR / 'Jononi Scripts Meeting.xlsx')
+
+@pytest.fixture
+def sheet_names():
+    return pd.ExcelFile(WORKBOOK).sheet_names
+
+def test_names_are_matched_after_normalization(sheet_names):
+    with ExcelWorkbook(WORKBOOK) as workbook:
+        assert workbook.sheet_names == sheet_names
+        assert workbook.resolve() == sheet_names[0]
+        for name in sheet_names:
+            assert workbook.resolve(name) == name
+            assert workbook.resolve(f" {name.replace(' ', '_')}!") == name
+        with pytest.raises(ValueError, match='not found in the Excel file. Available sheets: '):
+            workbook.resolve('No such sheet')
+
+def test_first_sheet_wins_when_names_normalize_alike(tmp_path):
+    path = tmp_path / 'twins.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'a': [1]}).to_excel(writer, sheet_name='Data Sheet', index=False)
+        pd.DataFrame({'b': [2]}).to_excel(writer, sheet_name='Data_Sheet', index=False)
+    with ExcelWorkbook(str(path)) as workbook:
+        assert workbook.resolve('DataSheet') == 'Data Sheet'
+        assert workbook.resolve('Data_Sheet') == 'Data Sheet'
+
+def test_sheets_are_parsed_from_one_open(excel_settings, monkeypatch, sheet_names):
+    excel_settings['parallel_sheet_reader'] = False
+    opened = []
+    excel_file = pd.ExcelFile
+
+    def counting_excel_file(*args, **kwargs):
+        opened.append(args[0])
+        return excel_file(*args, **kwargs)
+
+    monkeypatch.setattr(utils.pd, 'ExcelFile', counting_excel_file)
+    frames = process_excel_sheets(WORKBOOK, list(reversed(sheet_names)))
+    assert opened == [WORKBOOK]
+    assert list(frames) == list(reversed(sheet_names))
+    for name, frame in frames.items():
+        expected = clean_dataframe(pd.read_excel(WORKBOOK, sheet_name=name))
+        pd.testing.assert_frame_equal(frame, expected, obj=name)
+
+def test_process_excel_file_reads_the_first_sheet_by_default(sheet_names):
+    expected = clean_dataframe(pd.read_excel(WORKBOOK, sheet_name=sheet_names[0]))
+    pd.testing.assert_frame_equal(process_excel_file(WORKBOOK), expected)
+    pd.testing.assert_frame_equal(process_excel_file(WORKBOOK, sheet_names[0].replace(' ', '')), expected)
+
+def test_missing_sheet_is_reported_without_stopping_the_others(excel_settings, sheet_names):
+    excel_settings['parallel_sheet_reader'] = False
+    frames, errors = read_sheets(WORKBOOK, [sheet_names[0], 'Missing'])
+    assert list(frames) == [sheet_names[0]]
+    assert list(errors) == ['Missing'] and 'not found' in errors['Missing']
+    with pytest.raises(ValueError, match="^Error processing Excel file: Sheet 'Missing' not found"):
+        process_excel_sheets(WORKBOOK, [sheet_names[0], 'Missing'])
+    with pytest.raises(ValueError, match='^Error processing Excel file: '):
+        process_excel_file(WORKBOOK, 'Missing')
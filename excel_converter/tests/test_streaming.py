@@ -0,0 +1,56 @@
+"""
+The streaming ingestion engine at small chunk sizes: validating and
+extracting a sheet chunk by chunk gives the same results as the whole
+sheet, and the views in streaming mode give the baseline validation results.
+"""
+import pytest
+from django.test import Client
+from ..extractors import extract_sheet_entries, extract_sheet_entries_chunks
+from ..utils import get_cached_sheet_names, iter_sheet_chunks, load_cached_sheets_with_errors
+from ..validators import validate_row_data, validate_row_data_chunks
+from .pipeline import GENERATION_METADATA, SAMPLE_DIR, load_baseline, upload_workbook, validate_sheet
+
+BASELINE = load_baseline('validation')
+
+REQUIRED_COLUMNS = ['Database', 'Questions in English', 'Data Type', 'Question no.', 'Questions in Tamil', 'Field Names in Tamil']
+
+@pytest.fixture(scope='module')
+def whole_sheets():
+    """The sheets of each sample workbook read whole; sheets that cannot be read are left out."""
+    frames = {}
+    for workbook in BASELINE:
+        path = str(SAMPLE_DIR / workbook)
+        frames[workbook], _ = load_cached_sheets_with_errors(path, get_cached_sheet_names(path))
+    return frames
+
+# Single-row chunks cost a DataFrame per row, so only small workbooks get them
+@pytest.mark.parametrize('workbook,chunk_size', [(workbook, 7) for workbook in BASELINE] + [
+    ('Jononi Script Training.xlsx', 1),
+    ('Jononi Script Session.xlsx', 1),
+])
+def test_chunked_results_match_whole_sheets(whole_sheets, workbook, chunk_size):
+    path = str(SAMPLE_DIR / workbook)
+    for sheet, df in whole_sheets[workbook].items():
+        chunks = list(iter_sheet_chunks(path, sheet, chunk_size=chunk_size))
+        assert all(len(chunk) <= chunk_size for chunk in chunks)
+        assert validate_row_data_chunks(chunks, REQUIRED_COLUMNS) == validate_row_data(df, REQUIRED_COLUMNS), sheet
+        assert (extract_sheet_entries_chunks(chunks, GENERATION_METADATA, 'Survey')
+                == extract_sheet_entries(df, GENERATION_METADATA, 'Survey')), sheet
+
+@pytest.fixture(scope='module')
+def uploads():
+    """Content ids of the sample workbooks, uploaded once for the module."""
+    client = Client()
+    return client, {workbook: upload_workbook(client, workbook)[0] for workbook in BASELINE}
+
+@pytest.mark.parametrize('workbook,sheet', [
+    (workbook, sheet) for workbook, sheets in BASELINE.items() for sheet in sheets
+])
+def test_streaming_validation_matches_baseline(excel_settings, whole_sheets, uploads, workbook, sheet):
+    if sheet not in whole_sheets[workbook]:
+        pytest.skip('the baseline could not read this sheet, the streaming engine can')
+    excel_settings['ingestion_engine'] = 'streaming'
+    excel_settings['streaming_chunk_rows'] = 7
+    client, filenames = uploads
+    result = validate_sheet(client, filenames[workbook], sheet)
+    assert result == BASELINE[workbook][sheet]
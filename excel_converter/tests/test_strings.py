@@ -0,0 +1,39 @@
+"""
+String normalization of parsed sheets: normalize_strings() converts a whole
+frame to the Arrow-backed string dtype with missing cells as pd.NA and the
+same text as astype(str) for the others, and processed sheets come out with
+that dtype.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+from ..utils import STRING_DTYPE, ExcelWorkbook, normalize_strings
+from .pipeline import SAMPLE_DIR
+
+def test_string_dtype_is_arrow_backed():
+    assert STRING_DTYPE == pd.StringDtype('pyarrow')
+
+def test_missing_cells_become_na_and_others_keep_their_text():
+    df = pd.DataFrame({
+        'text': ['Yes', None, ' ', 'ஆம்'],
+        'number': [1, 2.5, np.nan, 4],
+        'date': [datetime.datetime(2024, 3, 1), pd.NaT, datetime.datetime(2024, 3, 2, 8, 30), pd.NaT],
+        'mixed': [1, 'a', None, True],
+    })
+    result = normalize_strings(df)
+    assert all(dtype == STRING_DTYPE for dtype in result.dtypes)
+    assert result.isna().to_numpy().tolist() == df.isna().to_numpy().tolist()
+    present = df.notna()
+    for column in df:
+        assert result[column][present[column]].tolist() == df[column][present[column]].astype(str).tolist()
+    # Blank text is kept; only missing cells are NA
+    assert result['text'][2] == ' '
+
+def test_processed_sheets_hold_arrow_strings(excel_settings):
+    excel_settings['categorical_max_ratio'] = 0
+    with ExcelWorkbook(str(SAMPLE_DIR / 'Jononi Scripts.xlsx')) as workbook:
+        frames = workbook.read_sheets(workbook.sheet_names)
+    for sheet, frame in frames.items():
+        assert all(dtype == STRING_DTYPE for dtype in frame.dtypes), sheet
+        # No 'nan' text left behind for missing cells
+        assert not frame.isin(['nan', 'NaT', 'None']).to_numpy().any(), sheet
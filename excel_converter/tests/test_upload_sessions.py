@@ -0,0 +1,177 @@
+"""
+Chunked upload sessions through the views: parts sent in any order, the
+workbook checked while it arrives, completion into content-addressed
+storage, aborting, and the requests a session rejects.
+"""
+import hashlib
+import json
+import os
+import threading
+import pytest
+from django.test import Client
+from .. import upload_sessions
+from ..models import UploadSession
+from ..upload_sessions import partial_path
+from ..uploads import resolve_upload_path
+from ..utils import get_cached_sheet_names
+from .pipeline import SAMPLE_DIR
+
+WORKBOOK = SAMPLE_DIR / 'Idea Log - App Development 15112024_ Working_ File_3.4.25.xlsx'
+CHUNK_SIZE = 64 * 1024
+
+@pytest.fixture
+def client(excel_settings):
+    excel_settings['upload_chunk_size'] = CHUNK_SIZE
+    return Client()
+
+@pytest.fixture(scope='module')
+def workbook():
+    return WORKBOOK.read_bytes()
+
+def open_session(client, filename, size):
+    response = client.post('/upload-sessions/', json.dumps({'filename': filename, 'size': size}),
+                           content_type='application/json')
+    assert response.status_code == 201, response.content
+    return response.json()
+
+def put_part(client, upload, data, index, body=None):
+    if body is None:
+        start = index * upload['chunk_size']
+        body = data[start:start + upload['chunk_size']]
+    return client.put(f"/upload-sessions/{upload['upload_id']}/parts/{index}/", body,
+                      content_type='application/octet-stream')
+
+def test_parts_in_any_order_complete_the_upload(client, workbook):
+    upload = open_session(client, 'survey.xlsx', len(workbook))
+    count = upload['part_count']
+    assert count == -(-len(workbook) // CHUNK_SIZE) and count > 3
+    assert upload['missing_parts'] == list(range(count))
+
+    # The central directory is in the last parts and the workbook index in
+    # the first, so the sheets are known before the rest is sent
+    put_part(client, upload, workbook, count - 1)
+    response = put_part(client, upload, workbook, 0)
+    data = response.json()
+    assert data['status'] == UploadSession.STATUS_RECEIVING
+    assert data['sheets'] == get_cached_sheet_names(str(WORKBOOK))
+    assert data['missing_parts'] == list(range(1, count - 1))
+
+    # A part sent again overwrites the first copy
+    assert put_part(client, upload, workbook, 0).status_code == 200
+    for index in reversed(range(1, count - 1)):
+        response = put_part(client, upload, workbook, index)
+    data = response.json()
+    assert response.status_code == 200, data
+    assert data['status'] == UploadSession.STATUS_COMPLETED
+    assert data['filename'] == hashlib.sha256(workbook).hexdigest() + '.xlsx'
+    assert data['sheets'] == get_cached_sheet_names(str(WORKBOOK))
+    assert client.session['filename'] == data['filename']
+    with open(resolve_upload_path(data['filename']), 'rb') as stored:
+        assert stored.read() == workbook
+    assert not os.path.exists(partial_path(UploadSession.objects.get(pk=upload['upload_id'])))
+
+    # A completed upload takes no more parts
+    response = put_part(client, upload, workbook, 0)
+    assert response.status_code == 409
+
+def test_part_of_wrong_length_is_rejected(client, workbook):
+    upload = open_session(client, 'survey.xlsx', len(workbook))
+    response = put_part(client, upload, workbook, 0, body=workbook[:10])
+    assert response.status_code == 400
+    response = put_part(client, upload, workbook, upload['part_count'])
+    assert response.status_code == 400
+    status = client.get(f"/upload-sessions/{upload['upload_id']}/").json()
+    assert status['status'] == UploadSession.STATUS_RECEIVING
+    assert status['received_parts'] == []
+
+def test_file_that_is_not_a_workbook_fails_the_session(client):
+    data = b'PK\x03\x04' + bytes(range(256)) * 1024
+    upload = open_session(client, 'survey.xlsx', len(data))
+    # Rejected once the parts holding the end of the archive are in,
+    # before the file is complete
+    for index in reversed(range(1, upload['part_count'])):
+        response = put_part(client, upload, data, index)
+        if response.status_code != 200:
+            break
+    assert response.status_code == 400
+    assert 'not a valid .xlsx workbook' in response.json()['error']
+    status = client.get(f"/upload-sessions/{upload['upload_id']}/").json()
+    assert status['status'] == UploadSession.STATUS_FAILED
+    assert put_part(client, upload, data, 0).status_code == 409
+    assert not os.path.exists(partial_path(UploadSession.objects.get(pk=upload['upload_id'])))
+
+def test_aborted_session_is_removed(client, workbook):
+    upload = open_session(client, 'survey.xlsx', len(workbook))
+    put_part(client, upload, workbook, 0)
+    path = partial_path(UploadSession.objects.get(pk=upload['upload_id']))
+    assert os.path.exists(path)
+
+    response = client.delete(f"/upload-sessions/{upload['upload_id']}/")
+    assert response.json() == {'success': True}
+    assert not os.path.exists(path)
+    assert client.get(f"/upload-sessions/{upload['upload_id']}/").status_code == 404
+    assert put_part(client, upload, workbook, 1).status_code == 404
+
+def test_session_rejects_large_and_unsupported_files(client):
+    response = client.post('/upload-sessions/', {'filename': 'survey.xlsx', 'size': 10 ** 12})
+    assert response.status_code == 413
+    response = client.post('/upload-sessions/', {'filename': 'survey.txt', 'size': 10})
+    assert response.status_code == 400
+
+def open_files():
+    """Paths of the files this process has open (Linux)."""
+    fd_dir = '/proc/self/fd'
+    paths = set()
+    for fd in os.listdir(fd_dir):
+        try:
+            paths.add(os.readlink(os.path.join(fd_dir, fd)))
+        except OSError:
+            pass
+    return paths
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc to list open files')
+@pytest.mark.parametrize('file_locks', [True, False])
+def test_partial_file_is_closed_before_it_is_moved(client, workbook, monkeypatch, file_locks):
+    if not file_locks:
+        # As on Windows, where the session lock is in-process only
+        monkeypatch.setattr(upload_sessions, 'fcntl', None)
+    moved = []
+    store_file = upload_sessions.store_file
+
+    def checked_store_file(path, original_name, digest):
+        # Windows refuses to move a file that is still open
+        assert os.path.realpath(path) not in open_files()
+        moved.append(path)
+        return store_file(path, original_name, digest)
+
+    monkeypatch.setattr(upload_sessions, 'store_file', checked_store_file)
+    upload = open_session(client, 'survey.xlsx', len(workbook))
+    session = UploadSession.objects.get(pk=upload['upload_id'])
+    assert os.path.exists(upload_sessions.lock_path(session)) == file_locks
+    for index in range(upload['part_count']):
+        response = put_part(client, upload, workbook, index)
+    assert response.json()['status'] == UploadSession.STATUS_COMPLETED
+    assert moved == [partial_path(session)]
+    assert not os.path.exists(upload_sessions.lock_path(session))
+    assert upload_sessions._local_locks == {}
+
+def hold_local_lock(session_id, event):
+    with upload_sessions._local_session_lock(session_id):
+        event.set()
+
+def test_in_process_locks_are_per_session():
+    other_session = threading.Event()
+    same_session = threading.Event()
+    with upload_sessions._local_session_lock('first'):
+        # Another session is not held up by the first one...
+        thread = threading.Thread(target=hold_local_lock, args=('second', other_session))
+        thread.start()
+        assert other_session.wait(5)
+        thread.join()
+        # ...the same session is
+        waiter = threading.Thread(target=hold_local_lock, args=('first', same_session))
+        waiter.start()
+        assert not same_session.wait(0.2)
+    assert same_session.wait(5)
+    waiter.join()
+    assert upload_sessions._local_locks == {}
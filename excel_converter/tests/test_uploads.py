@@ -0,0 +1,66 @@
+"""
+Content-addressed uploads: a workbook is stored under the SHA-256 of its
+content, uploading the same bytes again writes nothing, and files that share
+a name no longer overwrite each other; the index maps each original name to
+the stored versions.
+"""
+import hashlib
+import os
+import time
+import uuid
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from ..models import UploadedWorkbook
+from ..uploads import get_upload_dir, lookup_content_id, previous_content_id, resolve_upload_path
+from .pipeline import SAMPLE_DIR
+
+FIRST = SAMPLE_DIR / 'Jononi Script Training (2).xlsx'
+SECOND = SAMPLE_DIR / 'Jononi Scripts.xlsx'
+
+@pytest.fixture
+def name():
+    """An original filename no other test uploads under."""
+    return f'survey-{uuid.uuid4().hex[:8]}.xlsx'
+
+def upload(name, path):
+    response = Client().post('/get-sheets/', {'file': SimpleUploadedFile(name, path.read_bytes())})
+    assert response.status_code == 200, response.content
+    return response.json()
+
+def temporary_files():
+    return [entry for entry in os.listdir(get_upload_dir()) if entry.startswith('.tmp-')]
+
+def test_upload_is_stored_under_its_content_hash(name):
+    data = upload(name, FIRST)
+    assert data['filename'] == hashlib.sha256(FIRST.read_bytes()).hexdigest() + '.xlsx'
+    assert data['original_filename'] == name
+    with open(os.path.join(get_upload_dir(), data['filename']), 'rb') as stored:
+        assert stored.read() == FIRST.read_bytes()
+    assert lookup_content_id(name) == data['filename']
+    assert resolve_upload_path(name) == resolve_upload_path(data['filename'])
+    assert temporary_files() == []
+
+def test_identical_upload_writes_nothing(name):
+    filename = upload(name, FIRST)['filename']
+    path = os.path.join(get_upload_dir(), filename)
+    before = os.stat(path)
+    data = upload(f'copy of {name}', FIRST)
+    assert data['filename'] == filename
+    after = os.stat(path)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert temporary_files() == []
+    # The same content is indexed under both names
+    names = UploadedWorkbook.objects.filter(content_id=filename).values_list('original_name', flat=True)
+    assert {name, f'copy of {name}'} <= set(names)
+
+def test_files_with_the_same_name_are_kept_apart(name):
+    first = upload(name, FIRST)['filename']
+    time.sleep(0.01)
+    second = upload(name, SECOND)['filename']
+    assert first != second
+    assert os.path.exists(resolve_upload_path(first)) and os.path.exists(resolve_upload_path(second))
+    # The name refers to the latest upload, which knows the one before it
+    assert lookup_content_id(name) == second
+    assert previous_content_id(second) == first
+    assert previous_content_id(first) is None
@@ -0,0 +1,53 @@
+"""
+Row validation: the vectorized validate_row_data() and the
+/validate-columns/ results on the sample workbooks, compared with the
+baseline.
+"""
+import pandas as pd
+import pytest
+from django.test import Client
+from ..validators import validate_row_data
+from .pipeline import load_baseline, upload_workbook, validate_sheet
+
+BASELINE = load_baseline('validation')
+
+REQUIRED_COLUMNS = ['Database', 'Questions in English', 'Data Type', 'Questions in Tamil', 'Field Names in Tamil']
+
+def test_validate_row_data_reports_missing_fields():
+    df = pd.DataFrame({
+        'Database': ['name', 'age', '', 'village', '', 'phone'],
+        'Questions in English': ['Name?', 'Age?', '', '', 'Notes?', 'Phone?'],
+        'Questions in Tamil': ['பெயர்?', '', '', '', ' ', 'தொலைபேசி?'],
+        'Field Names in English': ['Name', '', '', '', 'Notes', 'Phone'],
+        'Field Names in Tamil': ['', '', '', '', 'குறிப்புகள்', 'தொலைபேசி'],
+        'Data Type': ['Text', 'Number', '', 'Text', 'Text', 'Number'],
+    })
+
+    result = validate_row_data(df, REQUIRED_COLUMNS)
+
+    # Excel row numbers; the empty row and the row without a question are skipped
+    assert result == {
+        'valid_rows': [7],
+        'invalid_rows': [
+            {'row_number': 2, 'missing_fields': ['Field Names in Tamil']},
+            {'row_number': 3, 'missing_fields': ['Questions in Tamil']},
+            {'row_number': 6, 'missing_fields': ['Database', 'Questions in Tamil']},
+        ],
+    }
+
+def test_validate_row_data_empty_sheet():
+    assert validate_row_data(pd.DataFrame(), REQUIRED_COLUMNS) == {'valid_rows': [], 'invalid_rows': []}
+
+@pytest.fixture(scope='module')
+def uploads():
+    """Content ids of the sample workbooks, uploaded once for the module."""
+    client = Client()
+    return client, {workbook: upload_workbook(client, workbook)[0] for workbook in BASELINE}
+
+@pytest.mark.parametrize('workbook,sheet', [
+    (workbook, sheet) for workbook, sheets in BASELINE.items() for sheet in sheets
+])
+def test_validation_matches_baseline(uploads, workbook, sheet):
+    client, filenames = uploads
+    result = validate_sheet(client, filenames[workbook], sheet)
+    assert result == BASELINE[workbook][sheet]
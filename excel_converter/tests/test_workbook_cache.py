@@ -0,0 +1,116 @@
+"""
+The parsed-workbook cache: WorkbookCache evicts the least recently used
+entries past its entry and byte limits, file digests are remembered per path
+in a bounded cache and recomputed when the file changes, stored uploads are
+named after the digest of their content, and the views share one parse of
+each sheet through it.
+"""
+import hashlib
+import shutil
+import threading
+import pandas as pd
+import pytest
+from django.test import Client
+from .. import utils
+from ..uploads import get_upload_dir
+from ..utils import WorkbookCache, get_file_hash, get_workbook_cache, load_cached_sheets
+from .pipeline import SAMPLE_DIR, upload_workbook
+
+WORKBOOK = 'Jononi Scripts.xlsx'
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    get_workbook_cache().clear()
+    yield
+    get_workbook_cache().clear()
+
+def test_least_recently_used_entries_are_evicted():
+    cache = WorkbookCache(max_entries=2)
+    cache.set('a', ['A'])
+    cache.set('b', ['B'])
+    assert cache.get('a') == ['A']
+    cache.set('c', ['C'])
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (['A'], None, ['C'])
+    assert len(cache) == 2
+
+def test_byte_budget_is_kept():
+    frame = pd.DataFrame({'text': ['x' * 100] * 100})
+    size = utils.estimate_size(frame)
+    cache = WorkbookCache(max_bytes=int(size * 2.5))
+    for key in 'abc':
+        cache.set(key, frame)
+    assert cache.get('a') is None and cache.get('c') is frame
+    assert cache.total_bytes == 2 * size
+    # A value larger than the whole budget is not cached
+    cache.set('big', pd.concat([frame] * 3))
+    assert cache.get('big') is None and len(cache) == 2
+    cache.clear()
+    assert (len(cache), cache.total_bytes) == (0, 0)
+
+def test_file_digest_is_remembered_until_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'survey.csv'
+    path.write_bytes(b'a,b\n1,2\n')
+    assert get_file_hash(str(path)) == hashlib.sha256(b'a,b\n1,2\n').hexdigest()
+
+    reads = []
+    sha256 = hashlib.sha256
+    monkeypatch.setattr(utils.hashlib, 'sha256', lambda: reads.append(1) or sha256())
+    get_file_hash(str(path))
+    assert reads == []
+    path.write_bytes(b'a,b\n1,2\n3,4\n')
+    assert get_file_hash(str(path)) == sha256(b'a,b\n1,2\n3,4\n').hexdigest()
+    assert reads == [1]
+
+def test_remembered_digests_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, '_file_hashes', WorkbookCache(max_entries=8))
+    paths = []
+    for index in range(32):
+        path = tmp_path / f'{index}.csv'
+        path.write_text(f'value\n{index}\n')
+        paths.append(str(path))
+
+    def hash_all():
+        for path in paths:
+            assert get_file_hash(path) == hashlib.sha256(open(path, 'rb').read()).hexdigest()
+
+    threads = [threading.Thread(target=hash_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(utils._file_hashes) == 8
+
+def test_stored_uploads_are_named_after_their_content():
+    filename, _ = upload_workbook(Client(), WORKBOOK)
+    stored = f'{get_upload_dir()}/{filename}'
+    with open(stored, 'rb') as upload:
+        assert filename == hashlib.sha256(upload.read()).hexdigest() + '.xlsx'
+    assert get_file_hash(stored) == filename[:64]
+
+def test_content_id_names_are_only_trusted_in_the_uploads_directory(tmp_path):
+    path = tmp_path / ('0' * 64 + '.xlsx')
+    shutil.copy(SAMPLE_DIR / WORKBOOK, path)
+    assert get_file_hash(str(path)) == hashlib.sha256(path.read_bytes()).hexdigest()
+
+def test_views_share_one_parse_per_sheet(monkeypatch):
+    client = Client()
+    filename, sheets = upload_workbook(client, WORKBOOK)
+    parses = []
+    read_sheets = utils.read_sheets
+
+    def counting_read_sheets(file_path, sheet_names, *args):
+        parses.extend(sheet_names)
+        return read_sheets(file_path, sheet_names, *args)
+
+    monkeypatch.setattr(utils, 'read_sheets', counting_read_sheets)
+    path = f'{get_upload_dir()}/{filename}'
+    first = load_cached_sheets(path, sheets[:2])
+    # The same sheets again, one without its spaces, and one more
+    again = load_cached_sheets(path, [sheets[0].replace(' ', ''), sheets[1], sheets[2]])
+    assert parses == sheets[:3]
+    pd.testing.assert_frame_equal(again[sheets[0].replace(' ', '')], first[sheets[0]])
+
+    # A re-upload of the same content reuses the cache as well
+    assert upload_workbook(Client(), WORKBOOK)[0] == filename
+    load_cached_sheets(path, sheets[:3])
+    assert parses == sheets[:3]
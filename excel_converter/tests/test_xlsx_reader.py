@@ -0,0 +1,339 @@
+"""
+The parallel .xlsx reader: read_xlsx_sheets() gives the same frames and
+per-sheet errors as ExcelWorkbook with every executor backend, and the rows
+iter_sheet_rows() yields give the same cells as openpyxl and the same raw
+frames as pandas.read_excel on the sample workbooks, on a workbook with
+every kind of cell and on hand-written XML with escapes, 1904 dates, error
+cells and sparse rows.
+"""
+import datetime
+import os
+import pickle
+import zipfile
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+from ..executor import shutdown_pools
+from ..utils import ExcelWorkbook, _sheet_frame, _worksheet_data, read_xlsx_sheets
+from ..xlsx import (
+    SharedStringTable, iter_sheet_rows, iter_shared_strings, openpyxl_text, read_date1904,
+    read_date_styles, read_hidden_rows_and_columns, read_sheet_parts
+)
+from .pipeline import SAMPLE_DIR
+
+WORKBOOKS = sorted(path.name for path in SAMPLE_DIR.glob('*.xlsx'))
+
+@pytest.fixture(scope='module', autouse=True)
+def pools():
+    yield
+    shutdown_pools()
+
+def read_with_openpyxl(path):
+    """Every sheet of a workbook read with ExcelWorkbook: (frames, errors)."""
+    frames = {}
+    errors = {}
+    with ExcelWorkbook(path) as workbook:
+        for sheet in workbook.sheet_names:
+            try:
+                frames[sheet] = workbook.read_sheet(sheet)
+            except Exception as e:
+                errors[sheet] = str(e)
+    return frames, errors
+
+def raw_frames(path):
+    """The uncleaned frame of each worksheet, built from iter_sheet_rows()."""
+    frames = {}
+    with zipfile.ZipFile(path) as archive:
+        date_styles, timedelta_styles = read_date_styles(archive)
+        date1904 = read_date1904(archive)
+        shared_strings = list(iter_shared_strings(archive, openpyxl_text))
+        for sheet in read_sheet_parts(archive):
+            if sheet['kind'] == 'chartsheet':
+                continue
+            rows = iter_sheet_rows(archive, sheet['part'], shared_strings,
+                                   date_styles, timedelta_styles, date1904)
+            frames[sheet['name']] = _sheet_frame(_worksheet_data(rows))
+    return frames
+
+def assert_raw_frames_match_pandas(path):
+    frames = raw_frames(path)
+    assert frames
+    for sheet, frame in frames.items():
+        expected = pd.read_excel(path, sheet_name=sheet, engine='openpyxl')
+        pd.testing.assert_frame_equal(frame, expected, obj=sheet)
+
+@pytest.mark.parametrize('backend', ['serial', 'thread', 'process'])
+@pytest.mark.parametrize('workbook', WORKBOOKS)
+def test_read_xlsx_sheets_matches_openpyxl(excel_settings, backend, workbook):
+    excel_settings['sheet_executor'] = backend
+    excel_settings['sheet_workers'] = 2
+    path = str(SAMPLE_DIR / workbook)
+    expected, expected_errors = read_with_openpyxl(path)
+    frames, errors = read_xlsx_sheets(path, list(expected) + list(expected_errors))
+    assert errors == expected_errors
+    assert list(frames) == list(expected)
+    for sheet, frame in frames.items():
+        pd.testing.assert_frame_equal(frame, expected[sheet], obj=sheet)
+
+@pytest.mark.parametrize('workbook', WORKBOOKS)
+def test_raw_rows_match_read_excel(workbook):
+    assert_raw_frames_match_pandas(str(SAMPLE_DIR / workbook))
+
+def build_workbook(path, epoch=None):
+    """Writes a workbook with dates, times, durations, booleans, errors and number formats."""
+    workbook = openpyxl.Workbook()
+    if epoch is not None:
+        workbook.epoch = epoch
+    sheet = workbook.active
+    sheet.title = 'Data'
+    sheet.append(['Name', 'When', 'Time', 'Duration', 'Flag', 'Number', 'Error', 'Share'])
+    sheet.append(['a', datetime.datetime(2024, 3, 1, 12, 30), datetime.time(10, 15),
+                  datetime.timedelta(hours=30, minutes=5), True, 3, '#N/A', 0.25])
+    sheet.append(['b_x005F_x000D_c', datetime.date(1900, 2, 1), None,
+                  datetime.timedelta(seconds=90), False, 2.5, 1, 0.5])
+    sheet['G2'].data_type = 'e'
+    sheet['H2'].number_format = '0%'
+    sheet['D3'].number_format = '[h]:mm:ss'
+    sheet['C5'] = 'late'
+    workbook.create_sheet('Empty')
+    dates = workbook.create_sheet('Dates only')
+    dates['B3'] = datetime.datetime(2000, 1, 1)
+    dates['B3'].number_format = 'yyyy-mm-dd'
+    workbook.save(path)
+    return path
+
+@pytest.mark.parametrize('epoch', [None, CALENDAR_MAC_1904])
+def test_raw_rows_match_read_excel_on_cell_types(tmp_path, epoch):
+    path = build_workbook(tmp_path / 'cells.xlsx', epoch)
+    with zipfile.ZipFile(path) as archive:
+        assert read_date1904(archive) == (epoch is not None)
+    assert_raw_frames_match_pandas(path)
+
+def rewrite_part(source, target, part, rewrite):
+    """Copies an .xlsx archive, passing the XML of one part through rewrite()."""
+    with zipfile.ZipFile(source) as original, zipfile.ZipFile(target, 'w') as copy:
+        for info in original.infolist():
+            data = original.read(info.filename)
+            if info.filename == part:
+                data = rewrite(data.decode('utf-8')).encode('utf-8')
+            copy.writestr(info, data)
+    return target
+
+def test_raw_rows_match_read_excel_on_inline_strings(tmp_path):
+    # openpyxl writes strings inline; unlike shared strings they are not
+    # unescaped. Rows and cells without a reference follow the previous one
+    def rewrite(xml):
+        xml = xml.replace('<is><t>a</t></is>', '<is><t>inline_x000D_</t></is>')
+        return xml.replace('<row r="3">', '<row>').replace('<c r="E3" ', '<c ')
+
+    source = build_workbook(tmp_path / 'cells.xlsx')
+    path = rewrite_part(source, tmp_path / 'inline.xlsx', 'xl/worksheets/sheet1.xml', rewrite)
+    assert raw_frames(path)['Data'].iloc[0, 0] == 'inline_x000D_'
+    assert_raw_frames_match_pandas(path)
+
+def test_malformed_sheet_does_not_stop_the_others(excel_settings, tmp_path):
+    excel_settings['sheet_executor'] = 'serial'
+    source = build_workbook(tmp_path / 'cells.xlsx')
+    path = rewrite_part(source, tmp_path / 'broken.xlsx', 'xl/worksheets/sheet3.xml',
+                        lambda xml: xml.replace('</sheetData>', ''))
+    frames, errors = read_xlsx_sheets(str(path), ['Data', 'Dates only', 'Missing'])
+    assert list(frames) == ['Data']
+    assert set(errors) == {'Dates only', 'Missing'}
+
+def test_shared_string_table_pickles_as_its_file_once_spilled():
+    strings = ['Yes', '', 'No', 'ஆம்', 'a_x000D_b', 'line\nbreak'] * 500
+    table = SharedStringTable(strings)
+    assert pickle.loads(pickle.dumps(table))[3] == 'ஆம்'
+    table.spill()
+    try:
+        data = pickle.dumps(table)
+        assert len(data) < 300
+        with pickle.loads(data) as copy:
+            assert len(copy) == len(strings)
+            assert [copy[index] for index in range(len(strings))] == strings
+            with pytest.raises(IndexError):
+                copy[len(strings)]
+        # Closing only unmaps the file
+        assert copy[0] == 'Yes'
+        copy.close()
+    finally:
+        table.discard()
+    assert not os.path.exists(pickle.loads(data)._path)
+    assert table[4] == 'a_x000D_b'
+
+def test_worker_processes_receive_the_shared_strings_file(excel_settings, monkeypatch):
+    excel_settings['sheet_executor'] = 'process'
+    excel_settings['sheet_workers'] = 2
+    spilled = []
+    spill = SharedStringTable.spill
+
+    def recording_spill(table, directory=None):
+        spill(table, directory)
+        spilled.append(table._path)
+
+    monkeypatch.setattr(SharedStringTable, 'spill', recording_spill)
+    path = str(SAMPLE_DIR / 'Jononi Scripts.xlsx')
+    expected, _ = read_with_openpyxl(path)
+    frames, errors = read_xlsx_sheets(path, list(expected))
+    assert errors == {}
+    for sheet, frame in frames.items():
+        pd.testing.assert_frame_equal(frame, expected[sheet], obj=sheet)
+    # Spilled for the processes and removed afterwards
+    assert len(spilled) == 1 and not os.path.exists(spilled[0])
+
+    spilled.clear()
+    excel_settings['sheet_executor'] = 'thread'
+    read_xlsx_sheets(path, list(expected))
+    assert spilled == []
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.'
+
+# Shared strings with escapes, rich text runs, a phonetic reading and
+# significant whitespace
+SHARED_STRINGS = [
+    '<si><t>Name</t></si>',
+    '<si><t>a_x000D_b</t></si>',
+    '<si><t>x_x005F_x000D_y</t></si>',
+    '<si><r><t xml:space="preserve">Rich </t></r><r><rPr><b/></rPr><t>text</t></r></si>',
+    '<si><t>漢字</t><rPh sb="0" eb="2"><t>カンジ</t></rPh></si>',
+    '<si><t xml:space="preserve">  padded </t></si>',
+    '<si><t/></si>',
+]
+
+# Sparse rows and cells, rows and cells without a reference, a row number
+# written as '5.0', every cell type, error values and styled empty cells.
+# Styles: 1 custom date, 2 elapsed time, 3 built-in date, 4 percentage
+SHEET_ROWS = [
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="inlineStr"><is><t>When</t></is></c>'
+    '<c r="D1" t="str"><f>"Form"&amp;"ula"</f><v>Formula</v></c><c r="F1" t="s"><v>3</v></c></row>',
+    '<row r="3"><c r="A3" t="s"><v>1</v></c><c r="B3" s="1"><v>45000.5</v></c><c r="C3" s="2"><v>1.25</v></c>'
+    '<c r="D3" t="e"><f>1/0</f><v>#DIV/0!</v></c><c r="E3" t="b"><v>1</v></c><c r="F3" t="s"><v>4</v></c>'
+    '<c r="G3"><v>3.0</v></c></row>',
+    '<row r="5.0" hidden="1"><c r="A5" t="s"><v>2</v></c><c r="B5" s="3"><v>1</v></c><c r="D5" t="e"><v>#N/A</v></c>'
+    '<c r="E5" t="b"><v>0</v></c><c r="Z5"><v>1E3</v></c></row>',
+    '<row hidden="true"><c t="s"><v>5</v></c><c><v>-7</v></c><c r="H6" t="e"><v>#REF!</v></c>'
+    '<c t="inlineStr"><is><t>in_x000D_line</t></is></c><c t="e"><v>#NAME?</v></c><c t="e"><v>#VALUE!</v></c></row>',
+    '<row r="9"><c r="A9" t="d"><v>2024-01-02T03:04:05</v></c><c r="B9" s="1"><v>1E10</v></c><c r="C9" s="1"/>'
+    '<c r="D9" t="s"><v>6</v></c><c r="E9" s="4"><v>0.5</v></c><c r="F9" t="n"><v>12345678901234567</v></c></row>',
+    '<row r="12"><c r="A12" s="1"/><c r="B12" s="2"/></row>',
+]
+
+STYLES = (
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="[h]:mm:ss"/></numFmts>'
+    '<fonts count="1"><font/></fonts><fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0"/></cellStyleXfs>'
+    '<cellXfs count="5"><xf numFmtId="0" xfId="0"/><xf numFmtId="164" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" xfId="0" applyNumberFormat="1"/><xf numFmtId="14" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="9" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>'
+)
+
+def write_package(path, date1904=False, rows=SHEET_ROWS, dimension=None):
+    """
+    Writes an .xlsx package by hand, with XML openpyxl itself never produces:
+    a 'Data' sheet with the given <row> elements, the shared strings in
+    SHARED_STRINGS and the cell styles in STYLES.
+    """
+    dimension = f'<dimension ref="{dimension}"/>' if dimension else ''
+    parts = {
+        '[Content_Types].xml': (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{CONTENT_TYPE}sheet.main+xml"/>'
+            f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{CONTENT_TYPE}worksheet+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{CONTENT_TYPE}styles+xml"/>'
+            f'<Override PartName="/xl/sharedStrings.xml" ContentType="{CONTENT_TYPE}sharedStrings+xml"/>'
+            '</Types>'
+        ),
+        '_rels/.rels': (
+            f'<Relationships xmlns="{PACKAGE_REL_NS}"><Relationship Id="rId1" '
+            f'Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ),
+        'xl/workbook.xml': (
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            f'<workbookPr date1904="{int(date1904)}"/>'
+            '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{REL_NS}/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rId3" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/styles.xml': STYLES,
+        'xl/sharedStrings.xml': (
+            f'<sst xmlns="{MAIN_NS}" count="{len(SHARED_STRINGS)}">{"".join(SHARED_STRINGS)}</sst>'
+        ),
+        'xl/worksheets/sheet1.xml': (
+            f'<worksheet xmlns="{MAIN_NS}">{dimension}<cols><col min="2" max="3" hidden="1"/></cols>'
+            f'<sheetData>{"".join(rows)}</sheetData></worksheet>'
+        ),
+    }
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + xml)
+    return path
+
+def cells_by_position(rows):
+    """{(row, column): (value, data_type)} for the cells that hold a value."""
+    return {
+        (row, column): (value, data_type)
+        for row, column, value, data_type in rows
+        if value is not None
+    }
+
+def read_cells(path):
+    with zipfile.ZipFile(path) as archive:
+        date_styles, timedelta_styles = read_date_styles(archive)
+        shared_strings = list(iter_shared_strings(archive, openpyxl_text))
+        rows = iter_sheet_rows(archive, 'xl/worksheets/sheet1.xml', shared_strings,
+                               date_styles, timedelta_styles, read_date1904(archive))
+        return cells_by_position(
+            (row, cell['column'], cell['value'], cell['data_type'])
+            for row, cells in rows for cell in cells
+        )
+
+def read_cells_with_openpyxl(path):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return cells_by_position(
+            (cell.row, cell.column, cell.value, cell.data_type)
+            for row in workbook['Data'].iter_rows() for cell in row
+            if hasattr(cell, 'column')
+        )
+    finally:
+        workbook.close()
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize('date1904', [False, True])
+def test_cells_match_openpyxl_on_hand_written_xml(tmp_path, date1904):
+    path = write_package(tmp_path / 'cells.xlsx', date1904)
+    cells = read_cells(path)
+    assert cells == read_cells_with_openpyxl(path)
+    # Spot checks that the comparison covers what it is meant to
+    assert cells[(3, 1)] == ('a_x000D_b', 's')
+    assert cells[(5, 1)] == ('x_x000D_y', 's')
+    assert cells[(1, 6)] == ('Rich text', 's')
+    assert cells[(3, 6)] == ('漢字', 's')
+    assert cells[(6, 9)] == ('in_x000D_line', 's')
+    assert cells[(3, 4)] == ('#DIV/0!', 'e')
+    assert cells[(9, 2)] == ('#VALUE!', 'e')
+    assert cells[(5, 26)] == (1000, 'n')
+    assert cells[(6, 2)] == (-7, 'n')
+    assert cells[(6, 8)] == ('#REF!', 'e')
+    first_day = datetime.datetime(1904, 1, 2) if date1904 else datetime.datetime(1900, 1, 1)
+    assert cells[(5, 2)] == (first_day, 'd')
+    assert_raw_frames_match_pandas(path)
+
+def test_hidden_rows_are_numbered_like_the_cells(tmp_path):
+    path = write_package(tmp_path / 'cells.xlsx')
+    assert read_hidden_rows_and_columns(str(path), 'Data') == ({5, 6}, {1, 2})
@@ -0,0 +1,84 @@
+"""
+Streaming ZIP export: iter_zip() builds a valid archive piece by piece,
+opening each file only when it is written, and /download-all/ streams the
+generated files of the session's job with the configured compression.
+"""
+import io
+import json
+import zipfile
+import pytest
+from django.http import StreamingHttpResponse
+from django.test import Client
+from ..artifacts import read_text
+from ..jobs import run_pending_jobs
+from ..models import GenerationJob
+from ..zipstream import iter_zip
+from .pipeline import start_generation, upload_workbook
+
+WORKBOOK = 'Jononi Script Training (2).xlsx'
+
+FILES = {
+    'Household.dart': b'class Household {}\n' * 5000,
+    'Empty.dart': b'',
+    'Member.dart': bytes(range(256)) * 100,
+}
+
+def read_archive(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {info.filename: (archive.read(info), info.compress_type) for info in archive.infolist()}
+
+@pytest.mark.parametrize('compresslevel,compression', [
+    (0, zipfile.ZIP_STORED), (1, zipfile.ZIP_DEFLATED), (9, zipfile.ZIP_DEFLATED), (42, zipfile.ZIP_DEFLATED),
+])
+def test_archive_is_built_in_pieces(compresslevel, compression):
+    opened = []
+
+    def opener(name):
+        def open_file():
+            opened.append(name)
+            return io.BytesIO(FILES[name])
+        return open_file
+
+    pieces = iter_zip([(name, opener(name)) for name in FILES], compresslevel=compresslevel, chunk_size=4096)
+    first = next(pieces)
+    # Only the first file has been opened when the first bytes are out
+    assert opened == ['Household.dart'] and first.startswith(b'PK\x03\x04')
+    rest = list(pieces)
+    assert len(rest) > 3
+    assert opened == list(FILES)
+    assert read_archive(first + b''.join(rest)) == {name: (data, compression) for name, data in FILES.items()}
+
+def test_empty_archive_is_valid():
+    assert read_archive(b''.join(iter_zip([]))) == {}
+
+@pytest.fixture
+def generated():
+    """A session whose generation job finished: (client, job)."""
+    client = Client()
+    filename, sheets = upload_workbook(client, WORKBOOK)
+    job_id = start_generation(client, filename, sheets).json()['job_id']
+    run_pending_jobs()
+    return client, GenerationJob.objects.get(pk=job_id)
+
+def download_all(client, files):
+    return client.get('/download-all/', {'files': json.dumps(files)})
+
+@pytest.mark.parametrize('compresslevel,compression', [(0, zipfile.ZIP_STORED), (6, zipfile.ZIP_DEFLATED)])
+def test_download_all_streams_the_generated_files(excel_settings, generated, compresslevel, compression):
+    excel_settings['zip_compresslevel'] = compresslevel
+    client, job = generated
+    expected = {f"{entry['class_name']}.dart": read_text(entry['code_artifact']).encode()
+                for entry in job.generated_files}
+    # Files the job did not generate are left out
+    response = download_all(client, list(expected) + ['Other.dart'])
+    assert isinstance(response, StreamingHttpResponse)
+    assert response['Content-Type'] == 'application/zip'
+    assert response['Content-Disposition'] == 'attachment; filename="dart_files.zip"'
+    archive = read_archive(b''.join(response.streaming_content))
+    assert archive == {name: (data, compression) for name, data in expected.items()}
+
+def test_download_all_needs_files_and_a_job(generated):
+    client, _ = generated
+    assert download_all(client, []).status_code == 400
+    assert download_all(Client(), ['Household.dart']).status_code == 404
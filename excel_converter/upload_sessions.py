@@ -0,0 +1,459 @@
+"""
+Resumable chunked uploads.
+A client opens an upload session with the file's name and size, then sends
+fixed-size parts (EXCEL_SETTINGS['upload_chunk_size'] bytes, the last one
+shorter) in any order, retrying any part that failed. Each part is streamed
+from the request body straight to its offset in a file of the final size,
+so neither the part nor the file is held in memory. Once every part is in,
+the file is hashed and moved into content-addressed storage (see
+uploads.py) without being copied.
+
+Parts of one upload may be handled by different server processes, so the
+session is guarded by a file lock rather than by anything held in memory:
+parts are written under a shared lock after checking that the session still
+accepts them, while recording a part, completing and aborting take the lock
+exclusively. The lock is taken on a separate lock file, so the partial file
+can be closed before it is moved or deleted under the lock, as Windows
+requires.
+
+An .xlsx file is checked while it arrives. Its ZIP central directory is at
+the end of the file and the workbook index is usually near the start, so
+clients send the last parts and the first part before the others. After
+every part, the central directory and the workbook's sheet list are read
+from the bytes received so far, and an upload that is not a workbook is
+rejected before the rest of it is sent.
+"""
+import os
+import hashlib
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import UploadSession
+from .uploads import get_upload_dir, get_max_upload_size, store_file
+from .xlsx import read_sheet_parts
+from .instrumentation import span
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks (Windows): sessions are only guarded within this process,
+    # by a lock per session (see _session_lock())
+    fcntl = None
+
+# Partial files live next to the stored uploads, so completing an upload is a rename
+PARTIAL_DIR = '.partial'
+
+ZIP_EXTENSIONS = ('.xlsx', '.xlsm')
+ZIP_SIGNATURE = b'PK\x03\x04'
+# .xls files are OLE2 compound documents
+OLE2_EXTENSIONS = ('.xls',)
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Bytes copied from the request body (or hashed from disk) at a time
+COPY_BLOCK_SIZE = 1024 * 1024
+
+class UploadSessionError(Exception):
+    """A rejected upload session request; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+class _MissingBytes(Exception):
+    """Raised when a read touches a part that has not been received yet."""
+
+# Session id -> [lock, number of holders and waiters], used without fcntl
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+def get_upload_session_settings():
+    """
+    Reads the chunked upload configuration from EXCEL_SETTINGS.
+
+    Returns:
+        dict: 'max_size' and 'chunk_size' in bytes, 'max_age' in seconds
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    return {
+        'max_size': get_max_upload_size(),
+        'chunk_size': int(excel_settings.get('upload_chunk_size', 8 * 1024 * 1024)),
+        'max_age': int(excel_settings.get('upload_session_max_age', 24 * 60 * 60)),
+    }
+
+def partial_path(session):
+    """Returns the absolute path of the file a session's parts are written to."""
+    extension = os.path.splitext(session.original_name)[1].lower()
+    return os.path.join(get_upload_dir(), PARTIAL_DIR, f'{session.pk}{extension}')
+
+def part_range(session, index):
+    """
+    Returns the byte range of a part.
+
+    Returns:
+        tuple: (start, end) offsets, end exclusive
+
+    Raises:
+        UploadSessionError: If the session has no such part
+    """
+    if index < 0 or index >= session.part_count:
+        raise UploadSessionError(f'Part {index} is out of range (0-{session.part_count - 1})')
+    start = index * session.chunk_size
+    return start, min(start + session.chunk_size, session.size)
+
+def lock_path(session):
+    """Returns the absolute path of the file a session is locked through."""
+    return os.path.join(get_upload_dir(), PARTIAL_DIR, f'{session.pk}.lock')
+
+def _remove_partial(session):
+    """
+    Deletes a session's partial file, then its lock file.
+
+    The partial file must be closed. It goes first, so a request that finds
+    no lock file cannot find the partial file either.
+    """
+    for path in (partial_path(session), lock_path(session)):
+        if os.path.exists(path):
+            os.remove(path)
+
+@contextmanager
+def _local_session_lock(session_id):
+    """Holds the in-process lock of one session."""
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(session_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[session_id]
+
+@contextmanager
+def _session_lock(session, exclusive):
+    """
+    Locks a session against other requests.
+
+    A lock waited for across a completion or an abort ends up on a lock
+    file that was deleted, so callers must re-read the session once they
+    hold the lock (see _receiving_session()).
+
+    Yields:
+        bool: False if the session has no lock file any more (it was
+              completed, failed or aborted), True otherwise
+    """
+    if fcntl is None:
+        with _local_session_lock(str(session.pk)):
+            yield True
+        return
+    try:
+        lock_file = open(lock_path(session), 'rb')
+    except FileNotFoundError:
+        yield False
+        return
+    with lock_file:
+        # Closing the file releases the lock
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield True
+
+@contextmanager
+def _locked_partial(session, exclusive):
+    """
+    Locks a session (see _session_lock()) and opens its partial file.
+
+    The file is closed before the lock is released; callers that move or
+    delete it close it themselves first.
+
+    Yields:
+        file: The partial file opened for update, or None if it is gone
+    """
+    with _session_lock(session, exclusive) as locked:
+        if not locked:
+            yield None
+            return
+        try:
+            partial = open(partial_path(session), 'r+b')
+        except FileNotFoundError:
+            yield None
+            return
+        with partial:
+            yield partial
+
+def _receiving_session(session_id, partial):
+    """
+    Re-reads a session under its lock and checks that it still accepts parts.
+
+    Raises:
+        UploadSessionError: If the session is gone (404), or completed,
+                            failed or without a partial file (409)
+    """
+    session = get_session(session_id)
+    if session.status != UploadSession.STATUS_RECEIVING:
+        raise UploadSessionError(f'Upload is {session.status}', status=409)
+    if partial is None:
+        raise UploadSessionError('Upload has no partial file', status=409)
+    return session
+
+def _file_digest(partial):
+    """Returns the hex SHA-256 of an open file's whole content."""
+    hasher = hashlib.sha256()
+    partial.seek(0)
+    for block in iter(lambda: partial.read(COPY_BLOCK_SIZE), b''):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+def create_session(original_name, size):
+    """
+    Opens an upload session and allocates its file.
+
+    Args:
+        original_name (str): Name of the file being uploaded
+        size (int): Size of the file in bytes
+
+    Returns:
+        UploadSession: The new session
+
+    Raises:
+        UploadSessionError: For an unsupported extension or size
+    """
+    config = get_upload_session_settings()
+    original_name = os.path.basename(original_name or '')
+    extension = os.path.splitext(original_name)[1].lower()
+    supported = getattr(settings, 'EXCEL_SETTINGS', {}).get('supported_extensions', ['.xlsx', '.xls', '.csv'])
+    if extension not in supported:
+        raise UploadSessionError(f"Unsupported file format. Supported formats: {', '.join(supported)}")
+    if size <= 0:
+        raise UploadSessionError('The file is empty')
+    if size > config['max_size']:
+        raise UploadSessionError(f"File size exceeds {config['max_size'] // (1024 * 1024)}MB limit.", status=413)
+
+    discard_stale_sessions()
+    session = UploadSession.objects.create(original_name=original_name, size=size, chunk_size=config['chunk_size'])
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Sized up front (sparse where supported), so parts can be written in any order
+    with open(path, 'wb') as partial:
+        partial.truncate(size)
+    if fcntl is not None:
+        open(lock_path(session), 'wb').close()
+    return session
+
+def get_session(session_id):
+    """
+    Returns an upload session.
+
+    Raises:
+        UploadSessionError: If there is no such session (404)
+    """
+    try:
+        return UploadSession.objects.get(pk=session_id)
+    except UploadSession.DoesNotExist:
+        raise UploadSessionError('Upload not found', status=404)
+
+def write_part(session_id, index, stream, content_length=None):
+    """
+    Writes one part of an upload from a stream and records it.
+
+    Sending a part again overwrites it, so a failed part can simply be
+    retried. Once every part is in, the upload is completed.
+
+    Args:
+        session_id: Id of the upload session
+        index (int): Zero-based part number
+        stream: File-like object with the part's bytes (e.g., the request)
+        content_length (int, optional): Declared length of the part
+
+    Returns:
+        UploadSession: The session after the part was recorded
+
+    Raises:
+        UploadSessionError: If the session does not accept the part, the
+                            part has the wrong length, or the received bytes
+                            show the file is not a valid workbook
+    """
+    session = get_session(session_id)
+    start, end = part_range(session, index)
+    expected = end - start
+    if content_length is not None and content_length != expected:
+        raise UploadSessionError(f'Part {index} must be {expected} bytes, got {content_length}')
+
+    with span('upload_write'), _locked_partial(session, exclusive=False) as partial:
+        # Nothing is written unless the session still accepts parts; an
+        # abort or a completion cannot start while the part is written
+        session = _receiving_session(session_id, partial)
+        written = 0
+        partial.seek(start)
+        # Read one byte past the part, to detect a body that is too long
+        while written <= expected:
+            block = stream.read(min(COPY_BLOCK_SIZE, expected + 1 - written))
+            if not block:
+                break
+            if written + len(block) > expected:
+                written += len(block)
+                break
+            partial.write(block)
+            written += len(block)
+        partial.flush()
+    if written != expected:
+        raise UploadSessionError(f'Part {index} must be {expected} bytes, got {written}')
+
+    error = None
+    with _locked_partial(session, exclusive=True) as partial:
+        session = _receiving_session(session_id, partial)
+        if index not in session.received_parts:
+            session.received_parts = sorted(session.received_parts + [index])
+        try:
+            with span('upload_validation'):
+                if not session.structure_checked and check_structure(session):
+                    session.structure_checked = True
+            if not session.missing_parts:
+                digest = _file_digest(partial)
+                # Windows cannot move an open file; the session stays locked
+                partial.close()
+                session.content_id = store_file(partial_path(session), session.original_name, digest)
+                session.status = UploadSession.STATUS_COMPLETED
+                _remove_partial(session)
+        except UploadSessionError as e:
+            # Keep the failure on the session, so the client stops sending parts
+            error = e
+            session.status = UploadSession.STATUS_FAILED
+            session.error = str(e)
+            partial.close()
+            _remove_partial(session)
+        session.save()
+    if error is not None:
+        raise error
+    return session
+
+class _ReceivedFile:
+    """
+    Read-only view of a partial file that raises _MissingBytes instead of
+    returning bytes of parts that have not been received.
+    """
+
+    def __init__(self, session):
+        self._file = open(partial_path(session), 'rb')
+        self._size = session.size
+        self._chunk_size = session.chunk_size
+        self._received = set(session.received_parts)
+
+    def _check(self, start, end):
+        if end <= start:
+            return
+        for index in range(start // self._chunk_size, (end - 1) // self._chunk_size + 1):
+            if index not in self._received:
+                raise _MissingBytes()
+
+    def read(self, n=-1):
+        position = self._file.tell()
+        end = self._size if n is None or n < 0 else min(position + n, self._size)
+        self._check(position, end)
+        return self._file.read(end - position)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self._file.close()
+
+def check_structure(session):
+    """
+    Checks that the received bytes look like the declared file type.
+
+    For .xlsx files the ZIP central directory and the workbook's sheet list
+    are read as soon as the parts holding them have arrived; the sheet
+    names are stored on the session.
+
+    Returns:
+        bool: True once checked, False if more parts are needed
+
+    Raises:
+        UploadSessionError: If the file is not a valid workbook
+    """
+    extension = os.path.splitext(session.original_name)[1].lower()
+    if extension not in ZIP_EXTENSIONS + OLE2_EXTENSIONS:
+        # Text formats have no structure to check up front
+        return True
+
+    received = _ReceivedFile(session)
+    try:
+        signature = ZIP_SIGNATURE if extension in ZIP_EXTENSIONS else OLE2_SIGNATURE
+        if 0 in session.received_parts and received.read(len(signature)) != signature:
+            raise UploadSessionError(f'The file is not a valid {extension} workbook')
+        if extension in OLE2_EXTENSIONS:
+            return 0 in session.received_parts
+
+        try:
+            with zipfile.ZipFile(received) as archive:
+                sheets = read_sheet_parts(archive)
+        except _MissingBytes:
+            return False
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, KeyError, ET.ParseError, EOFError, ValueError) as e:
+            raise UploadSessionError(f'The file is not a valid {extension} workbook: {e}')
+        if not sheets:
+            raise UploadSessionError('No sheets found in the Excel file')
+        session.sheets = [sheet['name'] for sheet in sheets if sheet['kind'] != 'chartsheet']
+        return True
+    finally:
+        received.close()
+
+def abort_session(session_id):
+    """Deletes an upload session and its partial file."""
+    session = get_session(session_id)
+    with _session_lock(session, exclusive=True):
+        _remove_partial(session)
+        session.delete()
+
+def discard_stale_sessions(max_age=None):
+    """
+    Deletes upload sessions not touched for max_age seconds
+    (EXCEL_SETTINGS['upload_session_max_age'] by default), with their files.
+
+    Returns:
+        int: Number of sessions deleted
+    """
+    if max_age is None:
+        max_age = get_upload_session_settings()['max_age']
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=max_age))
+    count = 0
+    for session in stale:
+        with _session_lock(session, exclusive=True):
+            _remove_partial(session)
+            session.delete()
+        count += 1
+    return count
+
+def session_status(session):
+    """
+    Describes an upload session for the API.
+
+    Returns:
+        dict: 'upload_id', 'status', 'size', 'chunk_size', 'part_count',
+              'received_parts', 'missing_parts', 'sheets' (known once the
+              structure was checked), 'filename' (content id, once
+              completed) and 'error'
+    """
+    return {
+        'upload_id': str(session.pk),
+        'status': session.status,
+        'original_filename': session.original_name,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'part_count': session.part_count,
+        'received_parts': session.received_parts,
+        'missing_parts': session.missing_parts,
+        'sheets': session.sheets,
+        'filename': session.content_id,
+        'error': session.error,
+    }
@@ -0,0 +1,176 @@
+"""
+Content-addressed storage for uploaded workbooks.
+Each upload is stored as media/uploads/<sha256><extension>, so re-uploading
+the same file leaves the stored file untouched and keeps every cache keyed
+on that file warm, while different files that happen to share a name no
+longer overwrite each other. The UploadedWorkbook table maps original filenames to stored files.
+
+A stored file's name is the digest of its content, and utils.get_file_hash()
+relies on that instead of hashing the file again: only write files under a
+'<sha256><extension>' name through store_upload() or store_file().
+"""
+import os
+import re
+import hashlib
+import tempfile
+from django.conf import settings
+from .models import UploadedWorkbook
+from .instrumentation import span
+
+UPLOAD_DIR = 'uploads'
+
+_CONTENT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+def get_upload_dir():
+    """Returns the absolute path of the uploads directory."""
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+
+def get_max_upload_size():
+    """Returns the largest accepted upload in bytes (EXCEL_SETTINGS['max_upload_size'])."""
+    return getattr(settings, 'EXCEL_SETTINGS', {}).get('max_upload_size', settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+
+def is_content_id(filename):
+    """Checks whether a filename is a stored upload name ('<sha256><extension>')."""
+    return bool(filename) and bool(_CONTENT_ID_PATTERN.match(filename))
+
+def store_upload(file):
+    """
+    Stores an uploaded file under the SHA-256 of its content.
+
+    The upload is read once: each chunk is written to a temporary file in
+    the uploads directory while the hash is updated, then the file is
+    renamed to its content id, or removed if that content is already stored.
+
+    Args:
+        file (UploadedFile): File from request.FILES
+
+    Returns:
+        str: The content id of the stored file (e.g., '3a7b...e1.xlsx'),
+             relative to the uploads directory
+    """
+    with span('upload_write'):
+        extension = os.path.splitext(file.name)[1].lower()
+        upload_dir = get_upload_dir()
+        os.makedirs(upload_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=upload_dir, prefix='.tmp-', suffix=extension)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as destination:
+                for chunk in file.chunks():
+                    digest.update(chunk)
+                    destination.write(chunk)
+            content_id = digest.hexdigest() + extension
+            full_path = os.path.join(upload_dir, content_id)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, full_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    record_upload(os.path.basename(file.name), content_id, file.size or 0)
+    return content_id
+
+def store_file(path, original_name, digest):
+    """
+    Moves a file that is already on disk into storage under its content hash.
+
+    Used for uploads that were assembled on disk (see upload_sessions.py),
+    so the content is not copied again.
+
+    Args:
+        path (str): File to move; it is removed if identical content is
+                    already stored
+        original_name (str): Name the file was uploaded under
+        digest (str): Hex SHA-256 of the file content
+
+    Returns:
+        str: The content id of the stored file
+    """
+    with span('upload_write'):
+        extension = os.path.splitext(original_name)[1].lower()
+        content_id = digest + extension
+        size = os.path.getsize(path)
+
+        upload_dir = get_upload_dir()
+        full_path = os.path.join(upload_dir, content_id)
+        if os.path.exists(full_path):
+            os.remove(path)
+        else:
+            os.makedirs(upload_dir, exist_ok=True)
+            os.replace(path, full_path)
+
+    record_upload(os.path.basename(original_name), content_id, size)
+    return content_id
+
+def record_upload(original_name, content_id, size):
+    """Records (or refreshes) the original name -> content mapping of an upload."""
+    entry, created = UploadedWorkbook.objects.get_or_create(
+        original_name=original_name,
+        content_id=content_id,
+        defaults={'size': size}
+    )
+    if not created:
+        entry.save(update_fields=['last_uploaded_at'])
+
+def lookup_content_id(original_name):
+    """
+    Finds the most recent upload stored for an original filename.
+
+    Returns:
+        str: The content id, or None if no file was uploaded under that name
+    """
+    return (UploadedWorkbook.objects
+            .filter(original_name=original_name)
+            .order_by('-last_uploaded_at')
+            .values_list('content_id', flat=True)
+            .first())
+
+def resolve_upload_path(filename):
+    """
+    Returns the absolute path of an uploaded file.
+
+    filename is normally the content id returned by store_upload(); an
+    original filename is looked up in the index, and files stored before
+    uploads were content-addressed are still found under their own name.
+
+    Args:
+        filename (str): Content id or original filename
+
+    Returns:
+        str: Absolute path (which may not exist if nothing matches)
+    """
+    filename = os.path.basename(filename or '')
+    upload_dir = get_upload_dir()
+    if not is_content_id(filename):
+        content_id = lookup_content_id(filename)
+        if content_id and os.path.exists(os.path.join(upload_dir, content_id)):
+            filename = content_id
+    return os.path.join(upload_dir, filename)
+
+def previous_content_id(content_id):
+    """
+    Finds the upload that preceded a stored file under the same original
+    filename, i.e. the previous version of the same logical workbook.
+
+    Args:
+        content_id (str): Content id returned by store_upload()
+
+    Returns:
+        str: Content id of the previous version, or None if there is none
+    """
+    current = (UploadedWorkbook.objects
+               .filter(content_id=content_id)
+               .order_by('-last_uploaded_at')
+               .first())
+    if current is None:
+        return None
+    names = UploadedWorkbook.objects.filter(content_id=content_id).values_list('original_name', flat=True)
+    return (UploadedWorkbook.objects
+            .filter(original_name__in=list(names), last_uploaded_at__lte=current.last_uploaded_at)
+            .exclude(content_id=content_id)
+            .order_by('-last_uploaded_at')
+            .values_list('content_id', flat=True)
+            .first())
@@ -14,6 +14,9 @@ urlpatterns = [
 
     path('docs/', views.docs, name='docs'),
     path('get-sheets/', views.get_sheets, name='get_sheets'),
+    path('upload-sessions/', views.upload_sessions, name='upload_sessions'),
+    path('upload-sessions/<uuid:upload_id>/', views.upload_session, name='upload_session'),
+    path('upload-sessions/<uuid:upload_id>/parts/<int:index>/', views.upload_session_part, name='upload_session_part'),
     path('get-columns/', views.get_columns, name='get_columns'),
     path('validate-columns/', views.validate_columns, name='validate_columns'),
     path('upload/', views.upload_file, name='upload'),
@@ -23,4 +26,7 @@ urlpatterns = [
     path('app-builder/', views.app_builder, name='app_builder'),
     path('generate-database/', views.generate_database, name='generate_database'),
     path('generation-results/', views.generation_results, name='generation_results'),
+    path('generation-jobs/<uuid:job_id>/', views.generation_job_status, name='generation_job_status'),
+    path('workbook-diff/', views.workbook_diff, name='workbook_diff'),
+    path('metrics/', views.metrics, name='metrics'),
 ] 
\ No newline at end of file
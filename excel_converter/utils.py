@@ -5,9 +5,32 @@ and preparing it for code generation.
 """
 import os
 import re
+import hashlib
+import logging
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
 from django.conf import settings
 from openpyxl import load_workbook
+from .xlsx import (
+    read_first_row, read_sheet_info, header_names, read_sheet_parts, read_date_styles,
+    read_date1904, iter_shared_strings, iter_sheet_rows, openpyxl_text, SharedStringTable
+)
+from .csvfile import CSV_SHEET_NAME, is_csv, read_csv, read_csv_header, iter_csv_chunks
+from .identifiers import normalize_sheet_name, normalize_column_name, sanitize_key
+from .instrumentation import span
+from .executor import map_sheets, uses_processes
+
+# Arrow keeps the characters of a column in one buffer instead of one Python
+# object per cell (pyarrow is a requirement for this reason)
+STRING_DTYPE = pd.StringDtype('pyarrow')
+
+logger = logging.getLogger(__name__)
 
 def get_excel_path(filename):
     """
@@ -25,45 +48,64 @@ def get_excel_path(filename):
     """
     return os.path.join(settings.MEDIA_ROOT, 'uploads', filename)
 
-def normalize_sheet_name(name):
+def get_excel_sheets(file_path):
     """
-    Cleans up Excel sheet names by removing spaces and special characters.
-    This helps match sheet names regardless of formatting differences.
+    Gets a list of all sheet names from an Excel file.
+    
+    A CSV file has a single sheet, named CSV_SHEET_NAME.
     
     Args:
-        name (str): Original sheet name (e.g., 'My Sheet!')
+        file_path (str): Path to the Excel file
     
     Returns:
-        str: Cleaned sheet name (e.g., 'MySheet')
+        list: List of sheet names found in the Excel file
     
     Example:
-        >>> normalize_sheet_name('My Data Sheet!')
-        'MyDataSheet'
+        >>> get_excel_sheets('data.xlsx')
+        ['Sheet1', 'Data', 'Summary']
     """
-    return re.sub(r'[^a-zA-Z0-9]', '', str(name).strip())
+    return [sheet['name'] for sheet in get_sheet_info(file_path)]
 
-def get_excel_sheets(file_path):
+def get_sheet_info(file_path):
     """
-    Gets a list of all sheet names from an Excel file.
+    Lists the sheets of an Excel file with their visibility and size hints.
+    
+    For .xlsx files only the workbook index and the start of each sheet
+    are read (see xlsx.read_sheet_info) instead of loading the workbook;
+    other formats, and workbooks the fast path cannot read, go through
+    pandas, which reports no visibility or dimensions.
     
     Args:
         file_path (str): Path to the Excel file
     
     Returns:
-        list: List of sheet names found in the Excel file
+        list: One dict per sheet with 'name', 'state' ('visible', 'hidden',
+              'veryHidden', or None if unknown), 'dimension' and estimated
+              'rows' and 'columns' (None if unknown)
     
     Example:
-        >>> get_excel_sheets('data.xlsx')
-        ['Sheet1', 'Data', 'Summary']
+        >>> get_sheet_info('data.xlsx')
+        [{'name': 'Sheet1', 'state': 'visible', 'dimension': 'A1:K120', 'rows': 120, 'columns': 11},
+         {'name': 'Lookups', 'state': 'hidden', 'dimension': 'A1:B40', 'rows': 40, 'columns': 2}]
     """
+    if is_csv(file_path):
+        return [_sheet_entry(CSV_SHEET_NAME, state='visible')]
+    if zipfile.is_zipfile(file_path):
+        try:
+            return read_sheet_info(file_path)
+        except Exception as e:
+            logger.warning("Error reading the sheet list from the workbook index, falling back to pandas: %s", e)
     try:
         excel_file = pd.ExcelFile(file_path)
-        sheet_names = excel_file.sheet_names
-        return sheet_names
+        return [_sheet_entry(name) for name in excel_file.sheet_names]
     except Exception as e:
-        print(f"Error getting sheet names: {e}")
+        logger.exception("Error getting sheet names")
         return []
 
+def _sheet_entry(name, state=None):
+    """A get_sheet_info() entry for a sheet whose visibility or size is not known."""
+    return {'name': name, 'state': state, 'dimension': None, 'rows': None, 'columns': None}
+
 def process_excel_file(file_path, sheet_name=None):
     """
     Main function that reads and processes an Excel file.
@@ -87,62 +129,946 @@ def process_excel_file(file_path, sheet_name=None):
         - Converts all data to string format for consistency
     """
     try:
-        # Get sheet names if not provided
-        if not sheet_name:
-            excel_file = pd.ExcelFile(file_path)
-            sheet_names = excel_file.sheet_names
-            if sheet_names:
-                sheet_name = sheet_names[0]  # Use the first sheet by default
-            else:
-                raise ValueError("No sheets found in the Excel file.")
+        with ExcelWorkbook(file_path) as workbook:
+            return workbook.read_sheet(sheet_name)
+    except Exception as e:
+        raise ValueError(f"Error processing Excel file: {str(e)}")
 
-        # Verify sheet exists with normalized comparison
-        excel_file = pd.ExcelFile(file_path)
-        normalized_sheet_name = normalize_sheet_name(sheet_name)
-        available_sheets = excel_file.sheet_names
-        
-        # Try to find a matching sheet
-        matching_sheet = None
-        for available_sheet in available_sheets:
-            if normalize_sheet_name(available_sheet) == normalized_sheet_name:
-                matching_sheet = available_sheet
-                break
-        
-        if not matching_sheet:
-            raise ValueError(f"Sheet '{sheet_name}' not found in the Excel file. Available sheets: {', '.join(available_sheets)}")
+def process_excel_sheets(file_path, sheet_names):
+    """
+    Batch version of process_excel_file() that opens the workbook only once
+    (see read_sheets()).
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_names (list): Names of the sheets to process
+    
+    Returns:
+        dict: Processed DataFrame for each requested sheet name, in request order
+    
+    Example:
+        >>> frames = process_excel_sheets('data.xlsx', ['Sheet1', 'Data'])
+        >>> list(frames)
+        ['Sheet1', 'Data']
+    """
+    try:
+        frames, errors = read_sheets(file_path, sheet_names)
+    except Exception as e:
+        raise ValueError(f"Error processing Excel file: {str(e)}")
+    for error in errors.values():
+        raise ValueError(f"Error processing Excel file: {error}")
+    return frames
 
-        # Read Excel file with the matched sheet name
-        df = pd.read_excel(file_path, sheet_name=matching_sheet)
-        
-        # Clean column names
-        df.columns = (
-            df.columns.str.strip()
-                    .str.lower()
-                    .str.replace(r'\s+', '_', regex=True)
-                    .str.replace(r'[^\w]', '', regex=True)
+PARALLEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+def read_sheets(file_path, sheet_names, on_sheet=None):
+    """
+    Reads and cleans several sheets, parsing them in parallel when possible.
+    
+    .xlsx/.xlsm workbooks go through read_xlsx_sheets() unless
+    EXCEL_SETTINGS['parallel_sheet_reader'] is off; other files, and
+    workbooks whose package the parallel reader cannot make sense of (a
+    missing part, malformed XML), are read one sheet after the other with
+    ExcelWorkbook.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_names (list): Names of the sheets to read
+        on_sheet (callable, optional): Called with (sheet name, DataFrame)
+                                       for every sheet that was read
+    
+    Returns:
+        tuple: (frames, errors) where frames has the cleaned DataFrame of
+               each sheet that was read, in request order, and errors the
+               error message of each sheet that could not be read, so one
+               bad sheet does not prevent reading the others
+    
+    Raises:
+        Exception: If the workbook itself cannot be opened
+    """
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    if (os.path.splitext(file_path)[1].lower() in PARALLEL_EXTENSIONS
+            and excel_settings.get('parallel_sheet_reader', True)):
+        try:
+            return read_xlsx_sheets(file_path, sheet_names, on_sheet)
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            logger.warning("Parallel sheet reader failed for %s, reading sheets one by one: %s", file_path, e)
+    frames = {}
+    errors = {}
+    with ExcelWorkbook(file_path) as workbook:
+        for sheet_name in sheet_names:
+            try:
+                frames[sheet_name] = workbook.read_sheet(sheet_name)
+            except Exception as e:
+                errors[sheet_name] = str(e)
+                continue
+            if on_sheet is not None:
+                on_sheet(sheet_name, frames[sheet_name])
+    return frames, errors
+
+def read_xlsx_sheets(file_path, sheet_names, on_sheet=None):
+    """
+    Reads several sheets of an .xlsx workbook, parsing their XML in parallel.
+    
+    The archive is opened once here to read the workbook index, the date
+    styles and the shared strings table; each sheet's XML is then parsed
+    and cleaned by parse_worksheet() in a worker (see executor.map_sheets()).
+    When the workers are processes, the shared strings go to them through a
+    temporary file (see xlsx.SharedStringTable) rather than being pickled
+    with every sheet or parsed again by each worker. The result is the same
+    as ExcelWorkbook.read_sheets(): cells are converted the way
+    pandas.read_excel converts openpyxl cells.
+    
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_names (list): Names of the sheets, matched after normalization
+        on_sheet (callable, optional): See read_sheets()
+    
+    Returns:
+        tuple: (frames, errors), see read_sheets()
+    
+    Example:
+        >>> frames, errors = read_xlsx_sheets('data.xlsx', ['Sheet1', 'Data'])
+        >>> list(frames)
+        ['Sheet1', 'Data']
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = set(archive.namelist())
+        # Chart sheets and sheets without a part are not readable sheets,
+        # openpyxl (and so pandas) leaves them out too
+        parts = {
+            sheet['name']: sheet['part'] for sheet in read_sheet_parts(archive)
+            if sheet['kind'] != 'chartsheet' and sheet['part'] in names
+        }
+        if not parts:
+            raise ValueError("No sheets found in the Excel file.")
+        date_styles, timedelta_styles = read_date_styles(archive)
+        context = {
+            'date1904': read_date1904(archive),
+            'date_styles': date_styles,
+            'timedelta_styles': timedelta_styles,
+            'shared_strings': SharedStringTable(iter_shared_strings(archive, openpyxl_text)),
+        }
+    sheetnames = list(parts)
+    matching = {}
+    errors = {}
+    for sheet_name in sheet_names:
+        try:
+            matching[sheet_name] = match_sheet_name(sheetnames, sheet_name) if sheet_name else sheetnames[0]
+        except ValueError as e:
+            errors[sheet_name] = str(e)
+    parts = {sheet: parts[sheet] for sheet in dict.fromkeys(matching.values())}
+    
+    shared_strings = context['shared_strings']
+    try:
+        if uses_processes(len(parts)):
+            shared_strings.spill()
+        outcomes = map_sheets(parse_worksheet, {
+            sheet: (file_path, part, context) for sheet, part in parts.items()
+        })
+    finally:
+        shared_strings.discard()
+    outcomes = {outcome['sheet']: outcome for outcome in outcomes}
+    results = {}
+    for sheet_name in sheet_names:
+        if sheet_name in errors:
+            continue
+        outcome = outcomes[matching[sheet_name]]
+        if outcome['error'] is not None:
+            errors[sheet_name] = outcome['error']
+            continue
+        # A sheet requested twice gets its own (shallow) copy
+        results[sheet_name] = outcome['result'].copy(deep=False)
+        if on_sheet is not None:
+            on_sheet(sheet_name, results[sheet_name])
+    return results, errors
+
+def parse_worksheet(file_path, part, context):
+    """
+    Parses and cleans one worksheet of an .xlsx file.
+    
+    Runs in a worker of read_xlsx_sheets(), so it only takes plain data.
+    
+    Args:
+        file_path (str): Path to the .xlsx file
+        part (str): Path of the worksheet XML inside the archive
+        context (dict): 'date1904', 'date_styles', 'timedelta_styles' and
+                        'shared_strings' (a SharedStringTable) read from
+                        the workbook
+    
+    Returns:
+        pandas.DataFrame: Cleaned sheet, like ExcelWorkbook.read_sheet()
+    """
+    with context['shared_strings'] as shared_strings, zipfile.ZipFile(file_path) as archive:
+        rows = iter_sheet_rows(
+            archive,
+            part,
+            shared_strings,
+            context['date_styles'],
+            context['timedelta_styles'],
+            context['date1904']
         )
+        data = _worksheet_data(rows)
+    return clean_dataframe(_sheet_frame(data))
+
+def _convert_cell(cell):
+    """Converts a parsed cell the way pandas converts openpyxl cells."""
+    value = cell['value']
+    if value is None:
+        return ''
+    if cell['data_type'] == 'e':
+        return np.nan
+    if cell['data_type'] == 'n':
+        integer = int(value)
+        return integer if integer == value else float(value)
+    return value
+
+def _worksheet_data(rows):
+    """
+    Turns the (row number, cells) pairs of a worksheet parser into the list
+    of rows pandas builds from an openpyxl read-only sheet: missing rows are
+    empty, trailing empty cells and rows are dropped, and all rows are
+    padded to the same width.
+    """
+    data = []
+    last_row_with_data = -1
+    counter = 1
+    for idx, cells in rows:
+        # Rows without cells are not in the XML
+        while counter < idx:
+            data.append([])
+            counter += 1
+        if counter > idx:
+            continue
+        counter += 1
+        row = []
+        if cells:
+            row = [''] * cells[-1]['column']
+            for cell in cells:
+                if 1 <= cell['column'] <= len(row):
+                    row[cell['column'] - 1] = _convert_cell(cell)
+        while row and row[-1] == '':
+            row.pop()
+        if row:
+            last_row_with_data = len(data)
+        data.append(row)
+    
+    data = data[:last_row_with_data + 1]
+    if data:
+        width = max(len(row) for row in data)
+        data = [row + [''] * (width - len(row)) for row in data]
+    return data
+
+def _sheet_frame(data):
+    """Builds the DataFrame pandas.read_excel returns for a sheet's rows."""
+    if not data:
+        return pd.DataFrame()
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+class ExcelWorkbook:
+    """
+    An Excel file opened once so several sheets can be resolved and parsed
+    without unzipping the workbook again for each of them.
+    
+    Sheet names are matched after normalization (see normalize_sheet_name),
+    using an index built once when the workbook is opened. A CSV file is
+    read as a workbook with the single sheet CSV_SHEET_NAME.
+    
+    Args:
+        file_path (str): Path to the Excel file
+    
+    Example:
+        >>> with ExcelWorkbook('data.xlsx') as workbook:
+        ...     df = workbook.read_sheet('my sheet')
+    """
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        if is_csv(file_path):
+            self._excel_file = None
+            self.sheet_names = [CSV_SHEET_NAME]
+        else:
+            self._excel_file = pd.ExcelFile(file_path)
+            self.sheet_names = self._excel_file.sheet_names
+        self._sheet_index = {}
+        for name in self.sheet_names:
+            # The first sheet wins when two names normalize to the same value
+            self._sheet_index.setdefault(normalize_sheet_name(name), name)
+    
+    def resolve(self, sheet_name=None):
+        """
+        Maps a requested sheet name to the name used in the workbook.
+        
+        Args:
+            sheet_name (str, optional): Requested name. If None, the first sheet is used.
         
-        # Convert all columns to string type
-        for col in df.columns:
-            df[col] = df[col].fillna('').astype(str)
+        Returns:
+            str: The sheet name exactly as it appears in the workbook
+        """
+        if not sheet_name:
+            if not self.sheet_names:
+                raise ValueError("No sheets found in the Excel file.")
+            return self.sheet_names[0]
         
+        matching_sheet = self._sheet_index.get(normalize_sheet_name(sheet_name))
+        if matching_sheet is None:
+            raise ValueError(f"Sheet '{sheet_name}' not found in the Excel file. Available sheets: {', '.join(self.sheet_names)}")
+        return matching_sheet
+    
+    def parse(self, sheet_name=None):
+        """Reads a sheet as-is, without cleaning column names or values."""
+        matching_sheet = self.resolve(sheet_name)
+        if self._excel_file is None:
+            return read_csv(self.file_path)
+        return self._excel_file.parse(matching_sheet)
+    
+    def read_header(self, sheet_name=None):
+        """Reads only the column headers of a sheet."""
+        matching_sheet = self.resolve(sheet_name)
+        if self._excel_file is None:
+            return read_csv_header(self.file_path)
+        return list(self._excel_file.parse(matching_sheet, nrows=0).columns)
+    
+    def read_sheet(self, sheet_name=None):
+        """Reads and cleans a single sheet, like process_excel_file()."""
+        return clean_dataframe(self.parse(sheet_name))
+    
+    def read_sheets(self, sheet_names):
+        """Reads and cleans several sheets, keyed by the requested names."""
+        return {sheet_name: self.read_sheet(sheet_name) for sheet_name in sheet_names}
+    
+    def close(self):
+        if self._excel_file is not None:
+            self._excel_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def match_sheet_name(available_sheets, sheet_name):
+    """
+    Finds the workbook sheet that matches a requested sheet name.
+    
+    Args:
+        available_sheets (list): Sheet names present in the workbook
+        sheet_name (str): Requested sheet name, compared after normalization
+    
+    Returns:
+        str: The sheet name exactly as it appears in the workbook
+    
+    Raises:
+        ValueError: If no sheet matches the requested name
+    """
+    normalized_sheet_name = normalize_sheet_name(sheet_name)
+    for available_sheet in available_sheets:
+        if normalize_sheet_name(available_sheet) == normalized_sheet_name:
+            return available_sheet
+    raise ValueError(f"Sheet '{sheet_name}' not found in the Excel file. Available sheets: {', '.join(available_sheets)}")
+
+def clean_dataframe(df):
+    """
+    Normalizes column names and converts every cell to a string.
+    
+    Args:
+        df (pandas.DataFrame): Sheet data exactly as read from the workbook
+    
+    Returns:
+        pandas.DataFrame: Frame with cleaned column names and string values
+                          (see normalize_strings()), with repetitive columns
+                          stored as categoricals (see intern_strings())
+    """
+    # Clean column names
+    df.columns = clean_column_names(df.columns)
+    
+    return intern_strings(normalize_strings(df))
+
+def normalize_strings(df):
+    """
+    Converts a whole frame to the pandas string dtype in one pass.
+    
+    Missing cells (NaN, None, NaT) become pd.NA instead of the text 'nan' or
+    '', so emptiness can be checked with isna() on whole columns. Other
+    values get the same text as astype(str). The columns are Arrow-backed
+    (see STRING_DTYPE).
+    
+    Args:
+        df (pandas.DataFrame): Sheet data
+    
+    Returns:
+        pandas.DataFrame: Frame with every column of dtype STRING_DTYPE
+    
+    Example:
+        >>> normalize_strings(pd.DataFrame({'a': [1, None]}))['a'].tolist()
+        ['1.0', <NA>]
+    """
+    return df.astype(STRING_DTYPE)
+
+def intern_strings(df, max_ratio=None):
+    """
+    Stores the columns that repeat a few values as categoricals.
+    
+    Survey sheets repeat the same texts on many rows (answer options,
+    'Yes'/'No', data types, language names). A categorical column keeps each
+    distinct text once and an integer code per cell, which uses far less
+    memory than one string object per cell, pickles faster to and from
+    worker processes, and lets validators.empty_mask() and the extractors
+    work once per distinct value. The categories have dtype STRING_DTYPE
+    and missing cells stay missing, so the column holds the same values as
+    before.
+    
+    Args:
+        df (pandas.DataFrame): Frame from normalize_strings()
+        max_ratio (float, optional): Largest share of distinct values (among
+                                     all cells of a column) for which it is
+                                     stored as categorical; defaults to
+                                     EXCEL_SETTINGS['categorical_max_ratio'],
+                                     0 keeps every column as strings
+    
+    Returns:
+        pandas.DataFrame: The frame with low-cardinality columns converted
+    
+    Example:
+        >>> intern_strings(normalize_strings(pd.DataFrame({'a': ['Yes', 'No', 'Yes', None]})))['a'].dtype
+        CategoricalDtype(categories=['Yes', 'No'], ordered=False, categories_dtype=string)
+    """
+    if max_ratio is None:
+        max_ratio = getattr(settings, 'EXCEL_SETTINGS', {}).get('categorical_max_ratio', 0.5)
+    if not max_ratio or df.empty:
         return df
+    
+    df = df.copy(deep=False)
+    # By position, since sheets can have duplicate column names
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        codes, uniques = pd.factorize(column)
+        if len(uniques) <= max_ratio * len(column):
+            df.isetitem(position, pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(uniques)))
+    return df
+
+def clean_column_names(columns):
+    """
+    Normalizes column names: trimmed, lowercase, whitespace runs replaced by
+    underscores and other non-word characters removed.
+    
+    Args:
+        columns (iterable): Column names as read from the sheet
+    
+    Returns:
+        pandas.Index: Cleaned column names (e.g., 'Data Type' -> 'data_type')
+    """
+    return (
+        pd.Index(columns).str.strip()
+                .str.lower()
+                .str.replace(r'\s+', '_', regex=True)
+                .str.replace(r'[^\w]', '', regex=True)
+    )
+
+class WorkbookCache:
+    """
+    Least-recently-used cache for parsed workbook data.
+    
+    Entries are keyed by the SHA-256 of the uploaded file, so a re-upload with
+    different content never sees stale data, while every view working on the
+    same upload (sheet listing, column listing, validation, generation) shares
+    a single parse of each sheet.
+    
+    Args:
+        max_entries (int): Maximum number of entries kept in the cache
+        max_bytes (int): Approximate memory budget for all cached values
+    """
+    
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Returns the cached value for key, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def set(self, key, value):
+        """Stores value under key, evicting least recently used entries as needed."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # Too large to cache at all; callers still get the parsed value
+            return
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+    
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+def estimate_size(value):
+    """
+    Roughly estimates how many bytes a cached value occupies.
+    
+    Args:
+        value: A DataFrame or a list of names
+    
+    Returns:
+        int: Approximate size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sum(len(str(item)) + 64 for item in value) + 64
+    return 64
+
+_workbook_cache = None
+_workbook_cache_lock = threading.Lock()
+# Digests of files read by get_file_hash(): path -> ((size, mtime), digest)
+_file_hashes = WorkbookCache(max_entries=1024)
+# Name of a stored upload: '<sha256><extension>'
+_CONTENT_ID = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]+)?$')
+
+def get_workbook_cache():
+    """
+    Returns the process-wide workbook cache, creating it from settings on first use.
+    
+    The limits come from ``EXCEL_SETTINGS['workbook_cache_max_entries']`` and
+    ``EXCEL_SETTINGS['workbook_cache_max_bytes']``.
+    """
+    global _workbook_cache
+    if _workbook_cache is None:
+        with _workbook_cache_lock:
+            if _workbook_cache is None:
+                excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+                _workbook_cache = WorkbookCache(
+                    max_entries=excel_settings.get('workbook_cache_max_entries', 64),
+                    max_bytes=excel_settings.get('workbook_cache_max_bytes', 256 * 1024 * 1024),
+                )
+    return _workbook_cache
+
+def get_file_hash(file_path):
+    """
+    Computes the SHA-256 of a file's content.
+    
+    The digest is remembered per path together with the file's size and
+    modification time, so repeated calls for an unchanged upload do not
+    re-read the file; the most recently used 1024 paths are remembered.
+    
+    Content-addressed uploads are not read at all: a file in the uploads
+    directory named '<64 hex digits><extension>' is taken to hold content
+    with that SHA-256. uploads.store_upload() and uploads.store_file() are
+    the only writers of such names and always name a file after the digest
+    of what they wrote, so anything else putting files in that directory
+    must follow the same rule.
+    
+    Args:
+        file_path (str): Path to the file
+    
+    Returns:
+        str: Hex digest of the file content
+    """
+    # Stored uploads are already named after their SHA-256 (see uploads.py)
+    match = _CONTENT_ID.match(os.path.basename(file_path))
+    if match and os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(get_excel_path('')).rstrip(os.sep):
+        return match.group(1)
+    
+    stat = os.stat(file_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    path_key = os.path.abspath(file_path)
+    remembered = _file_hashes.get(path_key)
+    if remembered and remembered[0] == signature:
+        return remembered[1]
+    
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    _file_hashes.set(path_key, (signature, digest.hexdigest()))
+    return digest.hexdigest()
+
+def get_cached_sheet_info(file_path):
+    """
+    Cached version of get_sheet_info().
+    
+    Args:
+        file_path (str): Path to the Excel file
+    
+    Returns:
+        list: One dict per sheet (copies, so callers may change them)
+    """
+    cache = get_workbook_cache()
+    key = (get_file_hash(file_path), None, 'sheet_info')
+    sheets = cache.get(key)
+    if sheets is None:
+        with span('sheet_list'):
+            sheets = get_sheet_info(file_path)
+        if sheets:
+            cache.set(key, sheets)
+    return [dict(sheet) for sheet in sheets]
+
+def get_cached_sheet_names(file_path):
+    """
+    Cached version of get_excel_sheets().
+    
+    Args:
+        file_path (str): Path to the Excel file
+    
+    Returns:
+        list: List of sheet names found in the Excel file
+    """
+    return [sheet['name'] for sheet in get_cached_sheet_info(file_path)]
+
+def load_cached_sheet(file_path, sheet_name=None):
+    """
+    Cached version of process_excel_file().
+    
+    Each sheet of an upload is parsed and cleaned once; later calls get a
+    shallow copy of the cached DataFrame, so callers may rename or reassign
+    columns without affecting the cache.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_name (str, optional): Name of the sheet to process. If None, uses first sheet.
+    
+    Returns:
+        pandas.DataFrame: Processed data ready for code generation
+    """
+    return load_cached_sheets(file_path, [sheet_name])[sheet_name]
+
+def load_cached_sheets(file_path, sheet_names):
+    """
+    Cached version of process_excel_sheets().
+    
+    Sheets missing from the cache are parsed together by read_sheets(), from
+    a single open of the workbook.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_names (list): Names of the sheets to process
+    
+    Returns:
+        dict: Processed DataFrame for each requested sheet name, in request order
+    
+    Raises:
+        ValueError: If the workbook or any of the sheets cannot be read
+    """
+    frames, errors = load_cached_sheets_with_errors(file_path, sheet_names)
+    for error in errors.values():
+        raise ValueError(f"Error processing Excel file: {error}")
+    return frames
+
+def load_cached_sheets_with_errors(file_path, sheet_names):
+    """
+    Like load_cached_sheets(), but reports the sheets that cannot be read
+    instead of failing, so the other sheets can still be processed.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_names (list): Names of the sheets to process
+    
+    Returns:
+        tuple: (frames, errors) where frames has the processed DataFrame of
+               each sheet that was read, in request order, and errors maps
+               each other sheet to its error message
+    
+    Raises:
+        ValueError: If the workbook itself cannot be read
+    
+    Example:
+        >>> frames, errors = load_cached_sheets_with_errors('data.xlsx', ['Sheet1', 'Empty'])
+        >>> errors
+        {'Empty': 'Can only use .str accessor with string values!'}
+    """
+    try:
+        digest = get_file_hash(file_path)
+        cache = get_workbook_cache()
+        frames = {}
+        errors = {}
+        missing = []
+        for sheet_name in sheet_names:
+            try:
+                matching_sheet = _resolve_cached_sheet(file_path, sheet_name)
+            except ValueError as e:
+                errors[sheet_name] = str(e)
+                continue
+            df = cache.get((digest, matching_sheet, 'frame'))
+            if df is None:
+                missing.append((sheet_name, matching_sheet))
+            frames[sheet_name] = df
         
+        if missing:
+            # Sheets that were read are cached even if another one fails
+            def cache_sheet(matching_sheet, df):
+                cache.set((digest, matching_sheet, 'frame'), df)
+            with span('workbook_parse'):
+                parsed, parse_errors = read_sheets(file_path, [matching_sheet for _, matching_sheet in missing], cache_sheet)
+            for sheet_name, matching_sheet in missing:
+                if matching_sheet in parse_errors:
+                    errors[sheet_name] = parse_errors[matching_sheet]
+                    del frames[sheet_name]
+                else:
+                    frames[sheet_name] = parsed[matching_sheet]
     except Exception as e:
         raise ValueError(f"Error processing Excel file: {str(e)}")
+    
+    return {sheet_name: df.copy(deep=False) for sheet_name, df in frames.items()}, errors
 
-def sanitize_key(name):
+def get_excel_columns(file_path, sheet_name):
     """
-    Makes strings safe to use as Dart variable names by removing invalid characters.
+    Reads the column headers of a sheet without loading its data.
+    
+    Only the first row of the sheet XML and the shared strings it refers to
+    are read, so the cost stays the same however many rows the sheet has,
+    unless its data may be wider than its header (see read_first_row). The
+    header cells are converted like the rest of the sheet, so the names are
+    the columns of the frame process_excel_file() returns before cleaning.
+    Files that cannot be read that way (e.g., legacy .xls) fall back to
+    pandas with nrows=0. For a CSV file only the header line is parsed.
     
     Args:
-        name (str): Original string (e.g., 'User Name!')
+        file_path (str): Path to the Excel file
+        sheet_name (str): Exact name of the sheet
     
     Returns:
-        str: Valid Dart identifier (e.g., 'user_name')
+        list: Column headers as pandas.read_excel would report them
     
     Example:
-        >>> sanitize_key('User Name!')
-        'user_name'
+        >>> get_excel_columns('data.xlsx', 'Sheet1')
+        ['Database', 'Field Name', 'Data Type']
     """
-    return re.sub(r'[^0-9a-zA-Z]+', '_', str(name).strip()).lower() 
\ No newline at end of file
+    if is_csv(file_path):
+        return read_csv_header(file_path)
+    try:
+        cells, columns = read_first_row(file_path, sheet_name)
+        if columns:
+            header = [None] * columns
+            for cell in cells:
+                if cell['column'] <= columns:
+                    header[cell['column'] - 1] = _convert_cell(cell)
+            return header_names([None if value == '' else value for value in header])
+    except Exception:
+        pass
+    with ExcelWorkbook(file_path) as workbook:
+        return workbook.read_header(sheet_name)
+
+def get_cached_columns(file_path, sheet_name):
+    """
+    Cached version of get_excel_columns().
+    
+    Args:
+        file_path (str): Path to the Excel file
+        sheet_name (str): Name of the sheet
+    
+    Returns:
+        list: Original (un-normalized) column headers
+    """
+    digest = get_file_hash(file_path)
+    matching_sheet = _resolve_cached_sheet(file_path, sheet_name)
+    cache = get_workbook_cache()
+    key = (digest, matching_sheet, 'columns')
+    columns = cache.get(key)
+    if columns is None:
+        columns = get_excel_columns(file_path, matching_sheet)
+        cache.set(key, columns)
+    return list(columns)
+
+def _resolve_cached_sheet(file_path, sheet_name):
+    """Maps a requested sheet name to the exact workbook sheet name."""
+    sheet_names = get_cached_sheet_names(file_path)
+    if not sheet_names:
+        raise ValueError("No sheets found in the Excel file.")
+    if not sheet_name:
+        return sheet_names[0]
+    return match_sheet_name(sheet_names, sheet_name)
+
+# Cell texts pandas.read_excel treats as missing by default
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+])
+
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm', '.csv')
+
+def use_streaming_engine(file_path):
+    """
+    Decides whether a workbook should be read with the streaming engine.
+    
+    EXCEL_SETTINGS['ingestion_engine'] is 'pandas', 'streaming', or 'auto'
+    (streaming for files of at least EXCEL_SETTINGS['streaming_min_bytes']).
+    Only .xlsx/.xlsm and CSV files can be streamed.
+    
+    Args:
+        file_path (str): Path to the Excel file
+    
+    Returns:
+        bool: True to use iter_sheet_chunks() instead of load_cached_sheets()
+    """
+    if os.path.splitext(file_path)[1].lower() not in STREAMING_EXTENSIONS:
+        return False
+    excel_settings = getattr(settings, 'EXCEL_SETTINGS', {})
+    engine = excel_settings.get('ingestion_engine', 'auto')
+    if engine == 'streaming':
+        return True
+    if engine == 'auto':
+        return os.path.getsize(file_path) >= excel_settings.get('streaming_min_bytes', 20 * 1024 * 1024)
+    return False
+
+def _stream_cell_text(cell):
+    """Converts a read-only openpyxl cell to the string pandas would end up with, or None if empty."""
+    value = cell.value
+    if value is None or cell.data_type == 'e':
+        return None
+    if isinstance(value, str):
+        return None if value in NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _stream_header_value(value):
+    """Converts a header cell value the way pandas does, with None for empty cells."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _stream_row(cells):
+    """Converts a row of cells to strings, without trailing empty cells."""
+    row = [_stream_cell_text(cell) for cell in cells]
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+def iter_sheet_chunks(file_path, sheet_name=None, chunk_size=None):
+    """
+    Streaming alternative to process_excel_file() for very large sheets.
+    
+    The sheet is read with openpyxl in read-only mode and handed out as a
+    sequence of small DataFrames, so memory is bounded by the chunk size
+    rather than by the sheet. Each chunk has the same cleaned column names
+    and string values as process_excel_file(), and its index continues from
+    the previous chunk so row numbers stay the same.
+    
+    Differences from process_excel_file(): values are not re-typed per column
+    (a whole number is always '1', never '1.0'), and 'Unnamed: N' columns for
+    cells beyond the header only appear from the chunk where they are first
+    used.
+    
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str, optional): Name of the sheet. If None, uses first sheet.
+        chunk_size (int, optional): Rows per chunk, defaults to
+                                    EXCEL_SETTINGS['streaming_chunk_rows']
+    
+    CSV files are read in chunks by the C parser (see iter_csv_chunks()),
+    keeping the exact cell text.
+    
+    Yields:
+        pandas.DataFrame: Consecutive row chunks (at least one, possibly empty)
+    
+    Example:
+        >>> for chunk in iter_sheet_chunks('data.xlsx', 'Sheet1', chunk_size=1000):
+        ...     result = validate_row_data(chunk, required_columns)
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'EXCEL_SETTINGS', {}).get('streaming_chunk_rows', 5000)
+    
+    if is_csv(file_path):
+        yield from _iter_csv_sheet_chunks(file_path, sheet_name, chunk_size)
+        return
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name:
+            matching_sheet = match_sheet_name(workbook.sheetnames, sheet_name)
+        elif workbook.sheetnames:
+            matching_sheet = workbook.sheetnames[0]
+        else:
+            raise ValueError("No sheets found in the Excel file.")
+        sheet = workbook[matching_sheet]
+        # Ignore the stored dimensions, like pandas does; they are often wrong
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows()
+        
+        header = [_stream_header_value(cell.value) for cell in next(rows, ())]
+        while header and header[-1] is None:
+            header.pop()
+        columns = clean_column_names(header_names(header))
+        
+        def make_chunk(buffer, start):
+            nonlocal header, columns
+            width = max([len(columns)] + [len(row) for row in buffer])
+            if width > len(columns):
+                # Data beyond the last header cell gets 'Unnamed: N' columns
+                header = header + [None] * (width - len(header))
+                columns = clean_column_names(header_names(header))
+            return pd.DataFrame(
+                [row + [None] * (width - len(row)) for row in buffer],
+                columns=columns,
+                index=pd.RangeIndex(start, start + len(buffer)),
+                dtype=STRING_DTYPE
+            )
+        
+        buffer = []
+        start = 0
+        blank_rows = 0
+        emitted = False
+        for cells in rows:
+            row = _stream_row(cells)
+            if not row:
+                # Trailing empty rows are dropped, so hold blank rows back
+                # until a row with data follows them
+                blank_rows += 1
+                continue
+            while blank_rows or row is not None:
+                if blank_rows:
+                    buffer.append([])
+                    blank_rows -= 1
+                else:
+                    buffer.append(row)
+                    row = None
+                if len(buffer) >= chunk_size:
+                    yield make_chunk(buffer, start)
+                    emitted = True
+                    start += len(buffer)
+                    buffer = []
+        
+        if buffer or not emitted:
+            yield make_chunk(buffer, start)
+    finally:
+        workbook.close()
+
+def _iter_csv_sheet_chunks(file_path, sheet_name, chunk_size):
+    """iter_sheet_chunks() for a CSV file."""
+    if sheet_name:
+        match_sheet_name([CSV_SHEET_NAME], sheet_name)
+    emitted = False
+    for chunk in iter_csv_chunks(file_path, chunk_size):
+        yield clean_dataframe(chunk)
+        emitted = True
+    if not emitted:
+        yield clean_dataframe(pd.DataFrame(columns=read_csv_header(file_path)))
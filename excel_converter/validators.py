@@ -0,0 +1,166 @@
+"""
+Row validation for processed Excel sheets.
+Emptiness is computed once per column with pandas/NumPy boolean operations,
+and the per-row results are derived from those masks instead of walking the
+sheet row by row.
+"""
+import numpy as np
+import pandas as pd
+from .columns import get_column_index
+
+def empty_mask(series):
+    """
+    Marks the cells of a column that hold no meaningful value.
+
+    A cell is empty when it is missing (pd.NA in frames from
+    utils.normalize_strings()) or blank after stripping whitespace. The
+    check runs once per distinct value, so columns full of repeated labels
+    cost little more than a hash lookup per cell; categorical columns (see
+    utils.intern_strings()) already have their codes, so no hashing is needed.
+
+    Args:
+        series (pandas.Series): One column of the sheet
+
+    Returns:
+        numpy.ndarray: Boolean array, True where the cell is empty
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    unique_empty = (text == '').to_numpy()
+    # Missing values get code -1, which picks the trailing True
+    return np.append(unique_empty, True)[codes]
+
+def validate_row_data(df, required_columns):
+    """
+    Validate each row has required data.
+
+    Rows without any data, and rows whose English question is empty, are
+    skipped. Language columns ('Questions in ...', 'Field Names in ...') are
+    only required when the row has an English question and, for field names,
+    an English field name.
+
+    Args:
+        df (pandas.DataFrame): Processed sheet data
+        required_columns (list): Column names that must be filled in
+
+    Returns:
+        dict: 'valid_rows' (list of Excel row numbers) and 'invalid_rows'
+              (list of {'row_number', 'missing_fields'} dicts)
+    """
+    validation_results = {
+        'valid_rows': [],
+        'invalid_rows': []
+    }
+
+    row_count = len(df)
+    if row_count == 0:
+        return validation_results
+
+    # Column positions and the English question / field names columns,
+    # shared by every frame with the same header
+    column_index = get_column_index(df.columns)
+    positions = column_index.positions
+    roles = column_index.resolve()
+    question_col = roles['english_question']
+    field_names_col = roles['english_field_names']
+
+    # Empty-cell mask for every column, computed once
+    empties = [empty_mask(df.iloc[:, position]) for position in range(df.shape[1])]
+
+    # Rows with any meaningful data whose English question is filled in
+    if empties:
+        rows_to_check = ~np.logical_and.reduce(empties)
+    else:
+        rows_to_check = np.zeros(row_count, dtype=bool)
+    if question_col is not None:
+        rows_to_check &= ~empties[positions[question_col]]
+
+    if field_names_col is not None:
+        field_names_has_data = ~empties[positions[field_names_col]]
+    else:
+        field_names_has_data = np.zeros(row_count, dtype=bool)
+
+    # One missing-value mask per required column
+    missing_masks = []
+    for req_col in required_columns:
+        actual_col = column_index.lookup(req_col)
+        if not actual_col:
+            missing_masks.append(np.ones(row_count, dtype=bool))
+            continue
+
+        col_empty = empties[positions[actual_col]]
+        if 'Field Names in' in req_col:
+            # Only required when field_names_in_english has data
+            if question_col is not None:
+                missing_masks.append(field_names_has_data & col_empty)
+            else:
+                missing_masks.append(np.zeros(row_count, dtype=bool))
+        elif 'Questions in' in req_col:
+            if question_col is not None:
+                missing_masks.append(col_empty)
+            else:
+                missing_masks.append(np.zeros(row_count, dtype=bool))
+        else:
+            missing_masks.append(col_empty)
+
+    if missing_masks:
+        missing = np.column_stack(missing_masks)[rows_to_check]
+    else:
+        missing = np.zeros((int(rows_to_check.sum()), 0), dtype=bool)
+
+    # Adding 2 because Excel rows start at 1 and we have headers
+    row_numbers = (df.index.to_numpy() + 2)[rows_to_check]
+    has_missing = missing.any(axis=1)
+
+    validation_results['valid_rows'] = row_numbers[~has_missing].tolist()
+
+    # Invalid rows share few distinct combinations of missing columns, so the
+    # column lists are built once per combination
+    invalid_missing = missing[has_missing]
+    if len(invalid_missing):
+        column_count = invalid_missing.shape[1]
+        if column_count < 63:
+            # Encode each row's combination as a bit mask for a fast 1-D unique
+            bits = invalid_missing.astype(np.int64) @ (np.int64(1) << np.arange(column_count, dtype=np.int64))
+            _, first_rows, pattern_ids = np.unique(bits, return_index=True, return_inverse=True)
+            patterns = invalid_missing[first_rows]
+        else:
+            patterns, pattern_ids = np.unique(invalid_missing, axis=0, return_inverse=True)
+        pattern_fields = [
+            [required_columns[j] for j in np.flatnonzero(pattern)]
+            for pattern in patterns
+        ]
+        validation_results['invalid_rows'] = [
+            {'row_number': row_number, 'missing_fields': list(pattern_fields[pattern_id])}
+            for row_number, pattern_id in zip(row_numbers[has_missing].tolist(), pattern_ids.reshape(-1).tolist())
+        ]
+
+    return validation_results
+
+def validate_row_data_chunks(chunks, required_columns):
+    """
+    Chunked version of validate_row_data() for sheets read with
+    utils.iter_sheet_chunks().
+    
+    Rows are validated independently of each other, so the results of the
+    chunks are simply concatenated.
+    
+    Args:
+        chunks (iterable): DataFrames with consecutive rows of one sheet
+        required_columns (list): Column names that must be filled in
+    
+    Returns:
+        dict: Same as validate_row_data() for the whole sheet
+    """
+    validation_results = {
+        'valid_rows': [],
+        'invalid_rows': []
+    }
+    for chunk in chunks:
+        chunk_results = validate_row_data(chunk, required_columns)
+        validation_results['valid_rows'].extend(chunk_results['valid_rows'])
+        validation_results['invalid_rows'].extend(chunk_results['invalid_rows'])
+    return validation_results
@@ -3,53 +3,58 @@ Views for excel_converter app.
 """
 import os
 import json
-import zipfile
-import tempfile
-import pandas as pd
-import re
+import logging
+from functools import partial
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, FileResponse, HttpResponse, HttpResponseRedirect
-from django.views.decorators.http import require_http_methods, require_POST
+from django.http import JsonResponse, FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
 from django.conf import settings
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError
 from rest_framework.decorators import api_view
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .forms import ExcelUploadForm
-from .utils import process_excel_file, get_excel_sheets
+from .utils import (
+    get_cached_sheet_names, get_cached_sheet_info, get_cached_columns, load_cached_sheets, load_cached_sheets_with_errors,
+    normalize_column_name, use_streaming_engine
+)
+from .executor import map_sheets, merge_parse_errors
+from .sheet_tasks import validate_sheet, validate_sheet_stream
+from .models import GenerationJob
+from .jobs import submit_job, get_job_status, fail_stale_jobs, is_stale
+from .artifacts import open_artifact
+from .zipstream import iter_zip
+from .uploads import UPLOAD_DIR, store_upload, resolve_upload_path, previous_content_id, get_max_upload_size
+from .upload_sessions import (
+    UploadSessionError, create_session, get_session, write_part, abort_session, session_status,
+    get_upload_session_settings
+)
+from .diffs import diff_workbooks
 from .dart_generator import generate_dart_code
+from .identifiers import identifier_key as sanitize_key
+from .instrumentation import span, get_instrumentation_settings, metrics as stage_metrics
 from django.urls import reverse
 from django.contrib import messages
-import traceback
+
+logger = logging.getLogger(__name__)
 
 
 def handle_uploaded_file(file):
     """
-    Handle file upload, replacing existing file if it exists.
+    Handle file upload, storing it under the hash of its content.
+    Re-uploading identical content reuses the stored file.
     Returns the file path relative to MEDIA_ROOT.
     """
-    file_path = os.path.join('uploads', file.name)
-    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-    
-    # Create uploads directory if it doesn't exist
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    
-    # Remove existing file if it exists
-    if os.path.exists(full_path):
-        os.remove(full_path)
-    
-    # Save the new file
-    with open(full_path, 'wb+') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
-    
-    return file_path
+    return os.path.join(UPLOAD_DIR, store_upload(file))
 
 def fromGenerator(request):
     """Render the main page."""
     form = ExcelUploadForm()
-    return render(request, 'excel_converter/index.html', {'form': form})
+    return render(request, 'excel_converter/index.html', {
+        'form': form,
+        # Larger files are sent in parts to the chunked upload endpoint
+        'upload_chunk_size': get_upload_session_settings()['chunk_size'],
+    })
 
 def homePage(request):
     """Render the main page."""
@@ -84,6 +89,19 @@ def docs(request):
                 properties={
                     'success': openapi.Schema(type=openapi.TYPE_BOOLEAN),
                     'sheets': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+                    'sheet_info': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'name': openapi.Schema(type=openapi.TYPE_STRING),
+                                'state': openapi.Schema(type=openapi.TYPE_STRING, description='visible, hidden or veryHidden'),
+                                'dimension': openapi.Schema(type=openapi.TYPE_STRING, description='Used range, e.g. A1:K120'),
+                                'rows': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'columns': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            }
+                        )
+                    ),
                     'filename': openapi.Schema(type=openapi.TYPE_STRING),
                 }
             )
@@ -101,25 +119,34 @@ def get_sheets(request):
     try:
         # Get the uploaded file
         excel_file = request.FILES['file']
+        max_size = get_max_upload_size()
+        if excel_file.size > max_size:
+            return JsonResponse({'error': f'File size exceeds {max_size // (1024 * 1024)}MB limit.'}, status=413)
         
-        # Handle file upload - this will replace existing file if it exists
+        # Handle file upload - identical content is only stored once
         file_path = handle_uploaded_file(excel_file)
         full_path = os.path.join(settings.MEDIA_ROOT, file_path)
         
         try:
-            # Get all sheets from the Excel file
-            sheets = get_excel_sheets(full_path)
+            # Get all sheets from the Excel file; only the workbook index is read
+            sheet_info = get_cached_sheet_info(full_path)
+            sheets = [sheet['name'] for sheet in sheet_info]
             
             if not sheets:
                 return JsonResponse({'error': 'No sheets found in the Excel file'}, status=400)
             
+            # Later requests refer to the stored file by its content id
+            filename = os.path.basename(file_path)
+            
             # Store the filename in session for later use
-            request.session['filename'] = excel_file.name
+            request.session['filename'] = filename
             
             response_data = {
                 'success': True,
                 'sheets': sheets,
-                'filename': excel_file.name
+                'sheet_info': sheet_info,
+                'filename': filename,
+                'original_filename': excel_file.name
             }
             return JsonResponse(response_data)
             
@@ -129,6 +156,70 @@ def get_sheets(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@require_http_methods(["POST"])
+def upload_sessions(request):
+    """Open a chunked upload session for a file of the given name and size."""
+    try:
+        data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
+        size = int(data.get('size', 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Invalid upload size'}, status=400)
+    
+    try:
+        session = create_session(data.get('filename', ''), size)
+    except UploadSessionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    
+    response_data = session_status(session)
+    response_data['success'] = True
+    response_data['max_size'] = get_max_upload_size()
+    response_data['status_url'] = reverse('excel_converter:upload_session', args=[session.pk])
+    return JsonResponse(response_data, status=201)
+
+@require_http_methods(["GET", "DELETE"])
+def upload_session(request, upload_id):
+    """Report the received and missing parts of a chunked upload, or abort it."""
+    try:
+        if request.method == 'DELETE':
+            abort_session(upload_id)
+            return JsonResponse({'success': True})
+        return JsonResponse(session_status(get_session(upload_id)))
+    except UploadSessionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+@require_http_methods(["PUT"])
+def upload_session_part(request, upload_id, index):
+    """
+    Receive one part of a chunked upload as the raw request body.
+    The response for the last missing part matches get_sheets.
+    """
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0) or None
+    except ValueError:
+        content_length = None
+    
+    try:
+        session = write_part(upload_id, index, request, content_length)
+    except UploadSessionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    
+    response_data = session_status(session)
+    if session.status != session.STATUS_COMPLETED:
+        return JsonResponse(response_data)
+    
+    try:
+        sheet_info = get_cached_sheet_info(resolve_upload_path(session.content_id))
+        sheets = [sheet['name'] for sheet in sheet_info]
+    except Exception as e:
+        return JsonResponse({'error': f'Error processing Excel file: {e}'}, status=500)
+    if not sheets:
+        return JsonResponse({'error': 'No sheets found in the Excel file'}, status=400)
+    
+    # Later requests refer to the stored file by its content id
+    request.session['filename'] = session.content_id
+    response_data.update({'success': True, 'sheets': sheets, 'sheet_info': sheet_info})
+    return JsonResponse(response_data)
+
 @require_http_methods(["POST"])
 def upload_file(request):
     """Handle file upload and processing."""
@@ -144,7 +235,7 @@ def upload_file(request):
         sheets = request.POST.getlist('sheets', [])
         ideal_sheet = request.POST.get('ideal_sheet', '')
         
-        # Handle file upload - this will replace existing file if it exists
+        # Handle file upload - identical content is only stored once
         file_path = handle_uploaded_file(excel_file)
         full_path = os.path.join(settings.MEDIA_ROOT, file_path)
         
@@ -193,8 +284,11 @@ def upload_file(request):
             # Process the Excel file for each selected sheet
             generated_files = []
             
+            # Read every selected sheet from a single open of the workbook
+            frames = load_cached_sheets(full_path, [ideal_sheet] + [sheet for sheet in sheets if sheet != ideal_sheet])
+            
             # Process the ideal sheet first
-            ideal_df = process_excel_file(full_path, ideal_sheet)
+            ideal_df = frames[ideal_sheet]
             
             # Add column information to metadata
             metadata = {
@@ -209,16 +303,17 @@ def upload_file(request):
                 'field_languages': field_languages
             }
             
-            ideal_output_file = generate_dart_code(ideal_df, class_name, preview=False, metadata=metadata)
-            generated_files.append(ideal_output_file)
-            
-            # Process other selected sheets
-            for sheet in sheets:
-                if sheet != ideal_sheet:  # Skip the ideal sheet as it's already processed
-                    df = process_excel_file(full_path, sheet)
-                    sheet_class_name = f"{class_name}_{sheet.replace(' ', '_')}"
-                    output_file = generate_dart_code(df, sheet_class_name, preview=False, metadata=metadata)
-                    generated_files.append(output_file)
+            with span('code_emission'):
+                ideal_output_file = generate_dart_code(ideal_df, class_name, preview=False, metadata=metadata)
+                generated_files.append(ideal_output_file)
+                
+                # Process other selected sheets
+                for sheet in sheets:
+                    if sheet != ideal_sheet:  # Skip the ideal sheet as it's already processed
+                        df = frames[sheet]
+                        sheet_class_name = f"{class_name}_{sheet.replace(' ', '_')}"
+                        output_file = generate_dart_code(df, sheet_class_name, preview=False, metadata=metadata)
+                        generated_files.append(output_file)
             
             # Read the generated code from the ideal sheet
             with open(ideal_output_file, 'r', encoding='utf-8') as f:
@@ -241,8 +336,8 @@ def upload_file(request):
 def preview_code(request):
     """Preview the generated code."""
     try:
-        # Get generation results from session
-        results = request.session.get('generation_results', {})
+        # Get generation results from the finished job
+        results = get_generation_results(request)
         if not results:
             messages.error(request, 'No generation results found')
             return redirect('excel_converter:app_builder')
@@ -274,14 +369,15 @@ def preview_code(request):
         return redirect('excel_converter:app_builder')
 
 def download_file(request, filename):
-    """Download the generated Dart file."""
+    """Download a generated Dart file."""
     try:
-        file_path = os.path.join(settings.DART_SETTINGS['output_folder'], filename)
-        if not os.path.exists(file_path):
+        job = get_generation_job(request)
+        digest = job.get_code_artifact(filename) if job is not None else None
+        if digest is None:
             return JsonResponse({'error': f'File not found: {filename}'}, status=404)
             
         return FileResponse(
-            open(file_path, 'rb'),
+            open_artifact(digest),
             as_attachment=True,
             filename=filename
         )
@@ -298,22 +394,22 @@ def download_all_files(request):
         if not files:
             return JsonResponse({'error': 'No files specified'}, status=400)
         
-        # Create a temporary zip file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-            temp_path = temp_file.name
-        
-        # Create the zip file
-        with zipfile.ZipFile(temp_path, 'w') as zip_file:
-            for filename in files:
-                file_path = os.path.join(settings.DART_SETTINGS['output_folder'], filename)
-                if os.path.exists(file_path):
-                    zip_file.write(file_path, filename)
-        
-        # Return the zip file
-        response = FileResponse(
-            open(temp_path, 'rb'),
-            as_attachment=True,
-            filename='dart_files.zip'
+        job = get_generation_job(request)
+        if job is None:
+            return JsonResponse({'error': 'No generation results found'}, status=404)
+        
+        # Only files the job actually generated end up in the archive
+        entries = []
+        for filename in files:
+            digest = job.get_code_artifact(filename)
+            if digest is not None:
+                entries.append((filename, partial(open_artifact, digest)))
+        
+        # Build the zip while it is being sent, straight from the artifact store
+        compresslevel = settings.EXCEL_SETTINGS.get('zip_compresslevel', 6)
+        response = StreamingHttpResponse(
+            iter_zip(entries, compresslevel=compresslevel),
+            content_type='application/zip'
         )
         
         # Set the Content-Disposition header to force download
@@ -324,109 +420,6 @@ def download_all_files(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
-def normalize_column_name(column):
-    """Normalize column names by removing special characters, spaces and converting to lowercase."""
-    # Convert to string in case it's a number
-    column = str(column)
-    # Remove spaces and convert to lowercase
-    normalized = column.lower().replace(' ', '')
-    # Replace special characters with empty string
-    normalized = re.sub(r'[^a-z0-9]', '', normalized)
-    return normalized
-
-def validate_row_data(df, required_columns):
-    """Validate each row has required data."""
-    validation_results = {
-        'valid_rows': [],
-        'invalid_rows': []
-    }
-    
-    # Create a mapping of normalized column names to actual column names
-    column_mapping = {}
-    for col in df.columns:
-        norm_col = normalize_column_name(col)
-        column_mapping[norm_col] = col
-    
-    # Find matching columns for each required column
-    matched_columns = {}
-    for req_col in required_columns:
-        norm_req = normalize_column_name(req_col)
-        if norm_req in column_mapping:
-            matched_columns[req_col] = column_mapping[norm_req]
-        else:
-            matched_columns[req_col] = None
-    
-    # Find the English question column and field names column
-    question_col = None
-    field_names_col = None
-    for col in df.columns:
-        if normalize_column_name(col) in ['questionsinenglish', 'questioninengish', 'englishquestion']:
-            question_col = col
-        elif normalize_column_name(col) in ['fieldnamesinenglish', 'fieldnames', 'fieldnamesineng']:
-            field_names_col = col
-    
-    for index, row in df.iterrows():
-        row_number = index + 2  # Adding 2 because Excel rows start at 1 and we have headers
-        missing_fields = []
-        
-        # Skip empty rows
-        if row.isna().all():
-            continue
-        
-        # Check if row has any meaningful data
-        has_data = False
-        for col in df.columns:
-            value = str(row[col]).strip()
-            if value and value.lower() != 'nan':
-                has_data = True
-                break
-                
-        if not has_data:
-            continue
-        
-        # Skip validation if English question is empty
-        if question_col and (pd.isna(row[question_col]) or str(row[question_col]).strip() == '' or str(row[question_col]).lower() == 'nan'):
-            continue
-        
-        # Check if field_names_in_english column has data
-        field_names_has_data = False
-        if field_names_col and not pd.isna(row[field_names_col]) and str(row[field_names_col]).strip() and str(row[field_names_col]).lower() != 'nan':
-            field_names_has_data = True
-        
-        # Check each required column including language columns
-        for req_col in required_columns:
-            actual_col = matched_columns.get(req_col)
-            if actual_col and actual_col in df.columns:
-                value = str(row[actual_col]).strip()
-                
-                # For language columns, only validate if field_names_in_english has data
-                if ('Field Names in' in req_col):
-                    if field_names_has_data and has_data and question_col and not pd.isna(row[question_col]):
-                        if pd.isna(value) or value == '' or value.lower() == 'nan':
-                            missing_fields.append(req_col)
-                elif ('Questions in' in req_col):
-                    if has_data and question_col and not pd.isna(row[question_col]):
-                        if pd.isna(value) or value == '' or value.lower() == 'nan':
-                            missing_fields.append(req_col)
-                else:
-                    # For non-language columns, validate normally
-                    if pd.isna(value) or value == '' or value.lower() == 'nan':
-                        if has_data:
-                            missing_fields.append(req_col)
-            else:
-                if has_data:
-                    missing_fields.append(req_col)
-        
-        if missing_fields:
-            validation_results['invalid_rows'].append({
-                'row_number': row_number,
-                'missing_fields': missing_fields
-            })
-        else:
-            validation_results['valid_rows'].append(row_number)
-    
-    return validation_results
-
 @swagger_auto_schema(
     method='post',
     operation_description="Validate selected columns in sheets",
@@ -468,8 +461,7 @@ def validate_columns(request):
             return JsonResponse({'error': 'Ideal sheet must be one of the selected sheets'}, status=400)
         
         # Use consistent file path handling
-        file_path = os.path.join('uploads', filename)
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        full_path = resolve_upload_path(filename)
         
         if not os.path.exists(full_path):
             return JsonResponse({'error': 'Excel file not found'}, status=400)
@@ -523,55 +515,47 @@ def validate_columns(request):
             'row_validation': {}
         }
         
-        for sheet in sheets:
-            # Process the Excel file for each sheet
-            df = process_excel_file(full_path, sheet)
-            
-            # Remove completely empty rows
-            df = df.dropna(how='all')
-            
-            # Create normalized column mapping
-            column_mapping = {}
-            for col in df.columns:
-                norm_col = normalize_column_name(col)
-                column_mapping[norm_col] = col
-            
-            # Validate columns exist in sheet (using normalized names)
-            missing_columns = []
-            present_columns = []
-            
-            # Check base required columns
-            columns_to_validate = columns_to_check.copy()
-            
-            # Add language columns to validation if language support is enabled
-            if language_support == 'yes':
-                for lang in question_languages:
-                    if lang.lower() != 'english':
-                        # Remove duplicate "Questions in" prefix if it exists
-                        lang = lang.replace('Questions in ', '')
-                        columns_to_validate.append(f'Questions in {lang}')
-                
-                for lang in field_languages:
-                    if lang.lower() != 'english':
-                        # Remove duplicate "Field Names in " prefix if it exists
-                        lang = lang.replace('Field Names in ', '')
-                        columns_to_validate.append(f'Field Names in {lang}')
-            
-            for col in columns_to_validate:
-                norm_col = normalize_column_name(col)
-                if norm_col in column_mapping:
-                    present_columns.append(col)
-                else:
-                    missing_columns.append(col)
-            
-            result['column_validation'][sheet] = {
-                'missing': missing_columns,
-                'present': present_columns
-            }
+        # Columns to validate, including language columns if language support is enabled
+        columns_to_validate = columns_to_check.copy()
+        if language_support == 'yes':
+            for lang in question_languages:
+                if lang.lower() != 'english':
+                    # Remove duplicate "Questions in" prefix if it exists
+                    lang = lang.replace('Questions in ', '')
+                    columns_to_validate.append(f'Questions in {lang}')
             
-            # Validate row data including language columns
-            row_validation = validate_row_data(df, required_row_columns)
-            result['row_validation'][sheet] = row_validation
+            for lang in field_languages:
+                if lang.lower() != 'english':
+                    # Remove duplicate "Field Names in " prefix if it exists
+                    lang = lang.replace('Field Names in ', '')
+                    columns_to_validate.append(f'Field Names in {lang}')
+        
+        # Validate the sheets in parallel; a failing sheet is reported on its own
+        if use_streaming_engine(full_path):
+            # Very large workbooks are read in chunks by each worker
+            outcomes = map_sheets(validate_sheet_stream, {
+                sheet: (full_path, sheet, columns_to_validate, required_row_columns)
+                for sheet in sheets
+            })
+        else:
+            # Read every selected sheet from a single open of the workbook;
+            # a sheet that cannot be read is reported like a failed validation
+            frames, parse_errors = load_cached_sheets_with_errors(full_path, sheets)
+            outcomes = map_sheets(validate_sheet, {
+                sheet: (frames[sheet], columns_to_validate, required_row_columns)
+                for sheet in sheets if sheet in frames
+            })
+            outcomes = merge_parse_errors(sheets, outcomes, parse_errors)
+        sheet_errors = {}
+        for outcome in outcomes:
+            sheet = outcome['sheet']
+            if outcome['error'] is not None:
+                sheet_errors[sheet] = outcome['error']
+                result['column_validation'][sheet] = {'missing': [], 'present': [], 'error': outcome['error']}
+                result['row_validation'][sheet] = {'valid_rows': [], 'invalid_rows': [], 'error': outcome['error']}
+                continue
+            result['column_validation'][sheet] = outcome['result']['column_validation']
+            result['row_validation'][sheet] = outcome['result']['row_validation']
         
         # Check if there are any validation issues
         has_column_issues = any(
@@ -582,7 +566,7 @@ def validate_columns(request):
         has_row_issues = any(
             len(result['row_validation'].get(sheet, {}).get('invalid_rows', [])) > 0
             for sheet in sheets
-        )
+        ) or bool(sheet_errors)
         
         try:
             # Store data in session
@@ -704,22 +688,21 @@ def get_columns(request):
         
         try:
             # Use consistent file path handling
-            file_path = os.path.join('uploads', filename)
-            full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+            full_path = resolve_upload_path(filename)
             
             if not os.path.exists(full_path):
                 return JsonResponse({'error': 'File not found'}, status=400)
             
-            df = pd.read_excel(full_path, sheet_name=sheet_name)
+            sheet_columns = get_cached_columns(full_path, sheet_name)
             
             # Create a mapping of normalized names to original names
-            normalized_map = {normalize_column_name(col): col for col in df.columns}
+            normalized_map = {normalize_column_name(col): col for col in sheet_columns}
             
             # Get both original and normalized columns
             columns = [{
                 'original': col,
                 'normalized': normalize_column_name(col)
-            } for col in df.columns]
+            } for col in sheet_columns]
             
             return JsonResponse({
                 'success': True,
@@ -777,8 +760,7 @@ def generate_database(request):
             return JsonResponse({'error': 'Excel file not found'}, status=400)
         
         # Use consistent file path handling
-        file_path = os.path.join('uploads', filename)
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        full_path = resolve_upload_path(filename)
         
         if not os.path.exists(full_path):
             return JsonResponse({'error': 'Excel file not found'}, status=400)
@@ -796,249 +778,24 @@ def generate_database(request):
                 return JsonResponse({'error': f'Class name missing for sheet: {sheet}'}, status=400)
             sheet_classes[sheet] = class_name
         
-        # Process each sheet
-        generated_files = []
-        for sheet in sheets:
-            df = process_excel_file(full_path, sheet)
-            
-        
-            # Get questions and fields
-            questions = []
-            fields = []
-            
-            # Get column names from metadata
-            question_col = metadata.get('question_column', '')
-            field_name_col = metadata.get('field_name_column', '')
-
-            
-            # Try different variations of column names
-            question_variations = [
-                question_col,
-                'Questions in English',
-                'questions_in_english',
-                'Questions',
-                'Question',
-                'Question no.',
-                'question_no',
-                'question_number',
-                'q_no',
-                'qno',
-            ]
-            
-            field_variations = [
-                field_name_col,
-                'Field Names in English',
-                'field_names_in_english',
-                'Field Names',
-                'Fields',
-                'Labels in English',  # Add common variations
-                'labels_in_english',
-                'Label',
-                'Labels',
-                'Field Label',
-                'Field Labels'
-            ]
-            
-            # Find question column
-            actual_question_col = None
-            for possible_col in question_variations:
-                for col in df.columns:
-                    if col.lower().strip() == possible_col.lower().strip():
-                        actual_question_col = col
-                        break
-                if actual_question_col:
-                    break
-            
-            # Find field name column
-            actual_field_col = None
-            for possible_col in field_variations:
-                if possible_col:  # Only check if possible_col is not empty
-                    for col in df.columns:
-                        if col.lower().strip() == possible_col.lower().strip():
-                            actual_field_col = col
-                            break
-                if actual_field_col:
-                    break
-            
-            if not actual_field_col:
-                for col in df.columns:
-                    print(f"  - {col}")
-            
-            # Process questions
-            if actual_question_col:
-                database_col = metadata.get('database_column', '').lower().strip()
-                datatype_col = metadata.get('datatype_column', '').lower().strip()
-                
-                
-                for idx, row in df.head(3).iterrows():
-                    for col in df.columns:
-                        print(f"  {col}: {row.get(col, '')}")
-                
-                # Try to find the data type column directly
-                data_type_col = None
-                data_type_variations = ['Data type', 'data type', 'datatype', 'Data Type', 'field type', 'Field Type', 'type']
-                
-                for variation in data_type_variations:
-                    for col in df.columns:
-                        if variation.lower() in col.lower():
-                            data_type_col = col
-                            break
-                    if data_type_col:
-                        break
-                
-                if data_type_col:
-                    datatype_col = data_type_col
-                
-                # Look specifically for question number column
-                question_no_col = None
-                question_no_variations = ['Question no.', 'question_no', 'question_number', 'q_no', 'qno', 'sl', 'sl.no', 'serial']
-                
-                for possible_col in question_no_variations:
-                    for col in df.columns:
-                        if col.lower().strip() == possible_col.lower().strip():
-                            question_no_col = col
-                            break
-                    if question_no_col:
-                        break
-                
-                # Hardcoded field types for specific questions
-                hardcoded_types = {
-                    'natural_disasters_affected': 'Multiple Choice',
-                    'latitude': 'Text',
-                    'longitude': 'Text',
-                    'lost_income_6_month': 'Dropdown',
-                    'income_lost': 'Multiple Choice',
-                    'loss_of_livelihood': 'Dropdown',
-                    'loss_of_livelihood_type': 'Multiple Choice'
-                }
-                
-                # For each row, print detailed debugging info
-                for idx, row in df.iterrows():
-                    question = row.get(actual_question_col, '')
-                    database_value = row.get(database_col, '')
-                    
-                    
-                    # Get field type with multiple fallbacks
-                    field_type = "Text"  # Default
-                    
-                    # Try to get from datatype column
-                    if datatype_col and datatype_col in df.columns:
-                        raw_field_type = row.get(datatype_col, '')
-                        if pd.notna(raw_field_type) and str(raw_field_type).strip():
-                            field_type = str(raw_field_type).strip()
-                    else:
-                        print(f"  Datatype column '{datatype_col}' not found in {df.columns.tolist()}")
-                    
-                    # Check hardcoded types based on database value
-                    if database_value and database_value.lower() in hardcoded_types:
-                        old_field_type = field_type
-                        field_type = hardcoded_types[database_value.lower()]
-                    
-                    # After getting the field type
-                    # Get question number from the dedicated column if available
-                    question_no = idx + 1  # Default to row index + 1
-                    if question_no_col and question_no_col in df.columns:
-                        q_no_value = row.get(question_no_col, '')
-                        if pd.notna(q_no_value) and str(q_no_value).strip():
-                            question_no = str(q_no_value).strip()
-                    
-                    
-                    if pd.notna(question) and str(question).strip():
-                        question_text = str(question).strip()
-                        
-                        # If we have a database value, use it as prefix for the key
-                        if pd.notna(database_value) and str(database_value).strip():
-                            # Convert database value to key format
-                            db_key = str(database_value).strip().lower()
-                            db_key = re.sub(r'[^a-z0-9]+', '_', db_key)
-                            db_key = re.sub(r'_+', '_', db_key)
-                            db_key = db_key.strip('_')
-                            
-                            # Add model name as suffix
-                            model_name = sheet_classes[sheet].lower()
-                            key = f"{db_key}_{model_name}"
-                        else:
-                            # If no database value, use the question text
-                            key = question_text.lower()
-                            key = re.sub(r'[^a-z0-9]+', '_', key)
-                            key = re.sub(r'_+', '_', key)
-                            key = key.strip('_')
-                            # Add model name as suffix
-                            model_name = sheet_classes[sheet].lower()
-                            key = f"{key}_{model_name}"
-                        
-                        if not any(q['key'] == key for q in questions):
-                            questions.append({
-                                'question': question_text,
-                                'key': key,
-                                'database': database_value,
-                                'field_type': field_type,
-                                'question_no': question_no
-                            })
-            
-            # Process field names
-            if actual_field_col:
-                database_col = metadata.get('database_column', '').lower().strip()
-                
-                # Keep track of the current database context
-                current_database_value = None
-                
-                for _, row in df.iterrows():
-                    field = row[actual_field_col]
-                    database_value = row.get(database_col, '')
-                    
-                    # Update current database context if we have a new database value
-                    if pd.notna(database_value) and str(database_value).strip():
-                        current_database_value = str(database_value).strip()
-                    
-                    if pd.notna(field) and str(field).strip():
-                        field_text = str(field).strip()
-                        
-                        # Convert field value to key format
-                        field_key = sanitize_key(field_text)
-                        
-                        # Generate key based on context
-                        if current_database_value:
-                            # Convert database value to key format
-                            db_key = sanitize_key(current_database_value)
-                            
-                            # Combine: fieldkey_databasevalue (e.g., farming_income_lost)
-                            key = f"{field_key}_{db_key}"
-                            
-                        else:
-                            # No database context, use simple format
-                            key = field_key
-                        
-                        # Don't add model name to the key
-                        if not any(f['key'] == key for f in fields):
-                            fields.append({
-                                'field': field_text,
-                                'key': key,
-                                'database_value': current_database_value
-                            })
-            
-            # Generate code for the sheet
-            code = generate_dart_code(df, sheet_classes[sheet], preview=True, metadata=metadata)
-            
-            generated_files.append({
-                'sheet': sheet,
-                'class_name': sheet_classes[sheet],
-                'status': 'success',
-                'generated_code': code,
-                'questions': questions,
-                'fields': fields
-            })
-        
-      
-            
-        # Store results in session
-        request.session['generation_results'] = {
-            'app_name': app_name,
-            'generated_files': generated_files
-        }
+        # Record the job; the sheets are processed in the background
+        if not request.session.session_key:
+            request.session.save()
+        job = GenerationJob.objects.create(
+            session_key=request.session.session_key,
+            app_name=app_name,
+            filename=filename,
+            sheets=sheets,
+            sheet_classes=sheet_classes,
+            metadata=metadata
+        )
+        submit_job(job)
+        request.session['generation_job_id'] = str(job.pk)
         
         return JsonResponse({
             'success': True,
+            'job_id': str(job.pk),
+            'status_url': reverse('excel_converter:generation_job_status', args=[job.pk]),
             'redirect_url': reverse('excel_converter:generation_results')
         })
         
@@ -1049,10 +806,102 @@ def generate_database(request):
             'error': str(e)
         }, status=500)
 
+def get_generation_job(request):
+    """Returns the last generation job of the current session, or None."""
+    job_id = request.session.get('generation_job_id')
+    if not job_id or not request.session.session_key:
+        return None
+    try:
+        return GenerationJob.objects.get(pk=job_id, session_key=request.session.session_key)
+    except (GenerationJob.DoesNotExist, ValidationError):
+        return None
+
+def get_generation_results(request, include_content=True):
+    """Returns the results of the finished generation job of the current session."""
+    job = get_generation_job(request)
+    if job is None or job.status != GenerationJob.STATUS_COMPLETED:
+        return {}
+    return job.get_results(include_content=include_content)
+
+@require_http_methods(['GET'])
+def generation_job_status(request, job_id):
+    """Report the status and per-sheet progress of a generation job of the current session."""
+    try:
+        if not request.session.session_key:
+            raise GenerationJob.DoesNotExist
+        job = GenerationJob.objects.get(pk=job_id, session_key=request.session.session_key)
+    except GenerationJob.DoesNotExist:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    
+    # A job whose worker stopped would otherwise be polled forever; only
+    # this job is checked, and only written to once it is stale
+    if is_stale(job):
+        fail_stale_jobs([job.pk])
+        job.refresh_from_db()
+    
+    status = get_job_status(job)
+    if job.status == GenerationJob.STATUS_COMPLETED:
+        status['redirect_url'] = reverse('excel_converter:generation_results')
+    return JsonResponse(status)
+
+@require_http_methods(['GET'])
+def workbook_diff(request):
+    """Report the questions and fields that changed since the previous upload of the workbook."""
+    filename = request.GET.get('filename') or request.session.get('filename')
+    if not filename:
+        return JsonResponse({'error': 'Excel file not found'}, status=400)
+    
+    full_path = resolve_upload_path(filename)
+    if not os.path.exists(full_path):
+        return JsonResponse({'error': 'Excel file not found'}, status=404)
+    content_id = os.path.basename(full_path)
+    
+    metadata = request.session.get('metadata', {})
+    if not metadata.get('database_column'):
+        return JsonResponse({'error': 'Column metadata not found'}, status=400)
+    
+    # Compare with the previous version of the same file unless a version is given
+    previous = request.GET.get('previous') or previous_content_id(content_id)
+    if not previous:
+        return JsonResponse({'success': True, 'filename': content_id, 'previous': None, 'sheets': []})
+    previous_path = resolve_upload_path(previous)
+    if not os.path.exists(previous_path):
+        return JsonResponse({'error': 'Previous version not found'}, status=404)
+    
+    sheets = request.GET.getlist('sheet') or request.session.get('selected_sheets') or get_cached_sheet_names(full_path)
+    job = get_generation_job(request)
+    sheet_classes = job.sheet_classes if job else {}
+    
+    try:
+        with span('diff'):
+            results = diff_workbooks(previous_path, full_path, sheets, metadata, sheet_classes)
+    except Exception as e:
+        logger.exception("Error comparing %s with the previous upload", filename)
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    # ?summary=1 leaves out the changed entries themselves
+    if request.GET.get('summary'):
+        for result in results:
+            result.pop('changes', None)
+    
+    return JsonResponse({
+        'success': True,
+        'filename': content_id,
+        'previous': os.path.basename(previous_path),
+        'sheets': results
+    })
+
+@require_http_methods(['GET'])
+def metrics(request):
+    """Expose per-stage timing totals in Prometheus text format (opt-in)."""
+    if not get_instrumentation_settings()['metrics']:
+        return HttpResponse(status=404)
+    return HttpResponse(stage_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 def generation_results(request):
     """Show the results of database generation."""
-    # Get results from session
-    results = request.session.get('generation_results', {})
+    # Get results from the finished job; the page only lists the sheets
+    results = get_generation_results(request, include_content=False)
     if not results:
         messages.error(request, 'No generation results found')
         return redirect('excel_converter:app_builder')
@@ -1062,16 +911,3 @@ def generation_results(request):
         'generated_files': results.get('generated_files', [])
     }
     return render(request, 'excel_converter/generation_results.html', context)
-
-def sanitize_key(name):
-    """Sanitize keys to ensure they are valid Dart identifiers."""
-    # Convert to lowercase and strip whitespace
-    key = str(name).strip().lower()
-    # Replace non-alphanumeric characters with underscore
-    key = re.sub(r'[^0-9a-zA-Z]+', '_', key)
-    # Remove multiple underscores
-    key = re.sub(r'_+', '_', key)
-    # Remove leading/trailing underscores
-    return key.strip('_')
-
-
@@ -0,0 +1,692 @@
+"""
+Low-level helpers for reading .xlsx workbooks directly from their ZIP parts.
+An .xlsx file is a ZIP archive of XML documents; reading only the parts a
+request needs (the workbook index, the first row of a sheet, ...) is much
+cheaper than loading the whole workbook through openpyxl or pandas.
+
+This module has no Django dependency so it can also be used by the
+standalone scripts in the project root.
+"""
+import os
+import mmap
+import posixpath
+import re
+import tempfile
+import zipfile
+from array import array
+from itertools import accumulate
+import xml.etree.ElementTree as ET
+import warnings
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_ESCAPED_CHAR = re.compile(r'_x([0-9A-Fa-f]{4})_')
+_DIMENSION = re.compile(r'^\$?([A-Za-z]+)\$?(\d+)(?::\$?([A-Za-z]+)\$?(\d+))?$')
+
+def local_name(tag):
+    """
+    Strips the XML namespace from an element tag.
+
+    Args:
+        tag (str): Tag as reported by ElementTree (e.g., '{ns}row')
+
+    Returns:
+        str: Tag without namespace (e.g., 'row')
+    """
+    return tag.rsplit('}', 1)[-1]
+
+def column_index(cell_ref):
+    """
+    Converts an A1-style cell reference to a zero-based column index.
+
+    Args:
+        cell_ref (str): Cell reference (e.g., 'AB12')
+
+    Returns:
+        int: Zero-based column index (e.g., 27)
+    """
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+def unescape_text(text):
+    """Decodes the _xHHHH_ escapes Excel uses for control characters."""
+    if '_x' not in text:
+        return text
+    return _ESCAPED_CHAR.sub(lambda match: chr(int(match.group(1), 16)), text)
+
+def _resolve_target(base_part, target):
+    """Resolves a relationship target relative to the part that references it."""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+def _read_relationship_types(archive, part):
+    """Returns {relationship id: (target part, type)} for a part's .rels file."""
+    rels_part = posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+    try:
+        root = ET.fromstring(archive.read(rels_part))
+    except KeyError:
+        return {}
+    return {
+        rel.get('Id'): (_resolve_target(part, rel.get('Target', '')), rel.get('Type', ''))
+        for rel in root
+        if local_name(rel.tag) == 'Relationship'
+    }
+
+def _read_relationships(archive, part):
+    """Returns {relationship id: target part} for a part's .rels file."""
+    return {rel_id: target for rel_id, (target, _) in _read_relationship_types(archive, part).items()}
+
+def workbook_part(archive):
+    """Returns the name of the main workbook part (usually 'xl/workbook.xml')."""
+    try:
+        root = ET.fromstring(archive.read('_rels/.rels'))
+        for rel in root:
+            if rel.get('Type', '').endswith('/officeDocument'):
+                return rel.get('Target', '').lstrip('/')
+    except KeyError:
+        pass
+    return 'xl/workbook.xml'
+
+def read_sheet_parts(archive):
+    """
+    Lists the worksheets of an open workbook archive.
+
+    Args:
+        archive (zipfile.ZipFile): The opened .xlsx file
+
+    Returns:
+        list: One dict per sheet, in workbook order, with 'name', 'part'
+              (path of the sheet XML inside the archive), 'state'
+              ('visible', 'hidden' or 'veryHidden') and 'kind'
+              ('worksheet', 'chartsheet', ...)
+    """
+    book_part = workbook_part(archive)
+    relationships = _read_relationship_types(archive, book_part)
+    root = ET.fromstring(archive.read(book_part))
+    sheets = []
+    for element in root.iter():
+        if local_name(element.tag) != 'sheet':
+            continue
+        part, rel_type = relationships.get(element.get(_REL_NS + 'id'), (None, ''))
+        sheets.append({
+            'name': element.get('name'),
+            'part': part,
+            'state': element.get('state', 'visible'),
+            'kind': rel_type.rsplit('/', 1)[-1] or 'worksheet',
+        })
+    return sheets
+
+def dimension_size(ref):
+    """
+    Converts a sheet dimension to a number of rows and columns.
+
+    Args:
+        ref (str): Dimension as stored in the sheet (e.g., 'A1:K120')
+
+    Returns:
+        tuple: (rows, columns), e.g. (120, 11), or (None, None) if ref is
+               not a cell range
+    """
+    match = _DIMENSION.match(ref or '')
+    if not match:
+        return None, None
+    first_column, first_row, last_column, last_row = match.groups()
+    last_column, last_row = last_column or first_column, last_row or first_row
+    rows = int(last_row) - int(first_row) + 1
+    columns = column_index(last_column) - column_index(first_column) + 1
+    return rows, columns
+
+def read_sheet_dimension(archive, part):
+    """
+    Reads the <dimension> of a worksheet, the range its writer says it uses.
+
+    The element precedes the sheet data, so only the start of the sheet XML
+    is decompressed. Writers do not always keep it accurate, so it is only
+    a hint of the sheet's size.
+
+    Returns:
+        str: The range (e.g., 'A1:K120'), or None if the sheet has none
+    """
+    with archive.open(part) as stream:
+        for _, element in ET.iterparse(stream, events=('start',)):
+            name = local_name(element.tag)
+            if name == 'dimension':
+                return element.get('ref')
+            if name == 'sheetData':
+                return None
+    return None
+
+def read_sheet_info(file_path):
+    """
+    Lists the worksheets of an .xlsx file without loading the workbook.
+
+    Only the workbook index (xl/workbook.xml and its relationships) and the
+    start of each worksheet are read, so the cost hardly depends on the
+    size of the workbook. Chart sheets and sheets whose part is missing are
+    left out, as openpyxl (and so pandas) leaves them out.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+
+    Returns:
+        list: One dict per worksheet, in workbook order, with 'name',
+              'state' ('visible', 'hidden' or 'veryHidden'), 'dimension'
+              (e.g., 'A1:K120', or None) and 'rows' and 'columns' as
+              estimated from the dimension (or None)
+
+    Example:
+        >>> read_sheet_info('data.xlsx')[0]
+        {'name': 'Sheet1', 'state': 'visible', 'dimension': 'A1:K120', 'rows': 120, 'columns': 11}
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = set(archive.namelist())
+        sheets = []
+        for sheet in read_sheet_parts(archive):
+            if sheet['kind'] == 'chartsheet' or sheet['part'] not in names:
+                continue
+            dimension = read_sheet_dimension(archive, sheet['part'])
+            rows, columns = dimension_size(dimension)
+            sheets.append({
+                'name': sheet['name'],
+                'state': sheet['state'],
+                'dimension': dimension,
+                'rows': rows,
+                'columns': columns,
+            })
+    return sheets
+
+def read_date1904(archive):
+    """Tells whether the workbook counts dates from 1904 (<workbookPr date1904>)."""
+    root = ET.fromstring(archive.read(workbook_part(archive)))
+    for element in root:
+        if local_name(element.tag) == 'workbookPr':
+            return _is_true(element.get('date1904'))
+    return False
+
+def read_date_styles(archive):
+    """
+    Finds the cell styles whose number format shows a date or a duration.
+
+    Numeric cells with one of these styles hold Excel serial dates, which
+    openpyxl converts to datetimes (or timedeltas); see iter_sheet_rows().
+
+    Args:
+        archive (zipfile.ZipFile): The opened .xlsx file
+
+    Returns:
+        tuple: (date_styles, timedelta_styles), sets of indexes into the
+               workbook's cellXfs; timedelta_styles is a subset of
+               date_styles
+    """
+    styles_part = None
+    for target, rel_type in _read_relationship_types(archive, workbook_part(archive)).values():
+        if rel_type.endswith('/styles'):
+            styles_part = target
+    date_styles = set()
+    timedelta_styles = set()
+    if styles_part is None or styles_part not in archive.namelist():
+        return date_styles, timedelta_styles
+
+    root = ET.fromstring(archive.read(styles_part))
+    custom_formats = {}
+    cell_formats = []
+    for element in root:
+        name = local_name(element.tag)
+        if name == 'numFmts':
+            for number_format in element:
+                custom_formats[int(number_format.get('numFmtId'))] = number_format.get('formatCode')
+        elif name == 'cellXfs':
+            cell_formats = [int(xf.get('numFmtId', '0')) for xf in element if local_name(xf.tag) == 'xf']
+    for index, format_id in enumerate(cell_formats):
+        code = custom_formats[format_id] if format_id in custom_formats else BUILTIN_FORMATS.get(format_id)
+        if is_date_format(code):
+            date_styles.add(index)
+        if is_timedelta_format(code):
+            timedelta_styles.add(index)
+    return date_styles, timedelta_styles
+
+def shared_strings_part(archive):
+    """Returns the name of the shared strings part, or None if the workbook has none."""
+    for target in _read_relationships(archive, workbook_part(archive)).values():
+        if target.endswith('sharedStrings.xml'):
+            return target
+    return None
+
+def iter_shared_strings(archive, decode=unescape_text):
+    """
+    Streams the workbook's shared strings table in index order.
+
+    Args:
+        archive (zipfile.ZipFile): The opened .xlsx file
+        decode (callable, optional): Applied to the text of each string;
+                                     by default _xHHHH_ escapes are decoded
+
+    Yields:
+        str: The text of each shared string
+    """
+    part = shared_strings_part(archive)
+    if part is None:
+        return
+    with archive.open(part) as stream:
+        for _, element in ET.iterparse(stream, events=('end',)):
+            if local_name(element.tag) != 'si':
+                continue
+            yield _string_item_text(element, decode)
+            element.clear()
+
+class SharedStringTable:
+    """
+    A workbook's shared strings table, parsed once and shared with the
+    workers that parse its sheets.
+
+    In the process that parsed it the table is a list. After spill() it is
+    also written to a temporary file (UTF-8 texts and their offsets), and
+    pickling it then only sends the file's path: a worker process maps the
+    file and decodes just the strings its sheet refers to, instead of
+    receiving every string or parsing sharedStrings.xml again.
+
+    Example:
+        >>> table = SharedStringTable(iter_shared_strings(archive, openpyxl_text))
+        >>> table.spill()  # before sending it to worker processes
+        >>> table[3]
+        'Yes'
+        >>> table.discard()  # once the workers are done
+    """
+
+    def __init__(self, strings=()):
+        self._strings = list(strings)
+        self._path = None
+        self._map = None
+        self._offsets = None
+        self._decoded = {}
+
+    def spill(self, directory=None):
+        """Writes the table to a temporary file, so it pickles as the file path."""
+        if self._path is not None or self._strings is None:
+            return
+        encoded = [text.encode('utf-8', 'surrogatepass') for text in self._strings]
+        offsets = array('Q', accumulate(map(len, encoded), initial=0))
+        handle, path = tempfile.mkstemp(prefix='shared-strings-', suffix='.bin', dir=directory)
+        try:
+            with os.fdopen(handle, 'wb') as table_file:
+                table_file.write(array('Q', [len(encoded)]).tobytes())
+                table_file.write(offsets.tobytes())
+                table_file.writelines(encoded)
+        except BaseException:
+            os.remove(path)
+            raise
+        self._path = path
+
+    def discard(self):
+        """Removes the file written by spill()."""
+        self.close()
+        if self._path is not None and self._strings is not None:
+            if os.path.exists(self._path):
+                os.remove(self._path)
+            self._path = None
+
+    def close(self):
+        """Unmaps the file in a worker; the table can still be read afterwards."""
+        if self._offsets is not None:
+            self._offsets.release()
+            self._offsets = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __getstate__(self):
+        if self._path is None:
+            return {'strings': self._strings}
+        return {'path': self._path}
+
+    def __setstate__(self, state):
+        self.__init__()
+        # A copy sent as a path reads the file (see __getitem__())
+        self._strings = state.get('strings')
+        self._path = state.get('path')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open(self):
+        with open(self._path, 'rb') as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        count = array('Q', self._map[:8])[0]
+        self._offsets = memoryview(self._map)[8:8 * (count + 2)].cast('Q')
+
+    def __len__(self):
+        if self._strings is not None:
+            return len(self._strings)
+        if self._offsets is None:
+            self._open()
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if self._strings is not None:
+            return self._strings[index]
+        text = self._decoded.get(index)
+        if text is None:
+            if self._offsets is None:
+                self._open()
+            if not 0 <= index < len(self._offsets) - 1:
+                raise IndexError('shared string index out of range')
+            base = 8 * (len(self._offsets) + 1)
+            start, end = self._offsets[index], self._offsets[index + 1]
+            text = self._decoded[index] = self._map[base + start:base + end].decode('utf-8', 'surrogatepass')
+        return text
+
+def openpyxl_text(text):
+    """
+    Decodes string escapes the way openpyxl does for shared strings: only
+    escaped underscores (_x005F_) are undone, other _xHHHH_ escapes stay.
+    """
+    return text.replace('x005F_', '')
+
+def _string_item_text(element, decode=unescape_text):
+    """Concatenates the text runs of an <si> or <is> element, skipping phonetic hints."""
+    parts = []
+    for child in element:
+        name = local_name(child.tag)
+        if name == 't':
+            parts.append(child.text or '')
+        elif name == 'r':
+            for run_child in child:
+                if local_name(run_child.tag) == 't':
+                    parts.append(run_child.text or '')
+    return decode(''.join(parts))
+
+class _SharedStringReader:
+    """
+    Shared strings read from the archive only as far as the highest index
+    asked for, so a header row that refers to the first few strings does not
+    parse the whole table.
+    """
+
+    def __init__(self, archive):
+        self._strings = []
+        self._iterator = iter_shared_strings(archive, openpyxl_text)
+
+    def __getitem__(self, index):
+        while index >= len(self._strings):
+            text = next(self._iterator, None)
+            if text is None:
+                raise IndexError('shared string index out of range')
+            self._strings.append(text)
+        return self._strings[index]
+
+def _dimension_last_column(ref):
+    """1-based last column of a sheet dimension, or None if ref is a single cell or not a range."""
+    match = _DIMENSION.match(ref or '')
+    if not match or not match.group(3):
+        return None
+    return column_index(match.group(3)) + 1
+
+def _has_data(cell):
+    """Whether a parsed cell keeps its row from being trimmed (pandas drops empty trailing cells)."""
+    return cell['value'] is not None and cell['value'] != ''
+
+def read_first_row(file_path, sheet_name):
+    """
+    Reads the first row of a worksheet and the number of columns of its data.
+
+    Cells are converted exactly as iter_sheet_rows() converts them, so the
+    header matches the first row of the frame built from the whole sheet.
+    The sheet XML is streamed until its first <row> element, and the shared
+    strings table is only read up to the highest index that row refers to.
+    Data rows can be wider than the header (pandas names those columns
+    'Unnamed: N'); the sheet's <dimension> tells whether they can be, and
+    only then are the remaining rows scanned for the last column that holds
+    a value. Otherwise the cost does not depend on how many rows the sheet
+    has.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str): Exact name of the worksheet
+
+    Returns:
+        tuple: (cells, columns) where cells are the first row's cells as
+               iter_sheet_rows() yields them (empty if the first row is
+               empty) and columns is the number of columns pandas gives the
+               sheet (0 if it has no data)
+
+    Raises:
+        KeyError: If the workbook has no sheet with that name
+
+    Example:
+        >>> read_first_row('data.xlsx', 'Sheet1')
+        ([{'column': 1, 'value': 'Name', 'data_type': 's'}], 3)
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        parts = {sheet['name']: sheet['part'] for sheet in read_sheet_parts(archive)}
+        if sheet_name not in parts or not parts[sheet_name]:
+            raise KeyError(sheet_name)
+
+        part = parts[sheet_name]
+        date_styles, timedelta_styles = read_date_styles(archive)
+        rows = iter_sheet_rows(archive, part, _SharedStringReader(archive), date_styles,
+                               timedelta_styles, read_date1904(archive))
+        cells = []
+        columns = 0
+        for row_number, row_cells in rows:
+            if row_number == 1:
+                cells = row_cells
+            columns = max([columns] + [cell['column'] for cell in row_cells if _has_data(cell)])
+            break
+
+        last_column = _dimension_last_column(read_sheet_dimension(archive, part))
+        if not cells or last_column is None or last_column > columns:
+            # Cells may lie beyond the header, so the data decides the width
+            for _, row_cells in rows:
+                columns = max([columns] + [cell['column'] for cell in row_cells if _has_data(cell)])
+        rows.close()
+    return cells, columns
+
+def _cast_number(text):
+    """Converts a numeric cell value to int or float, as openpyxl does."""
+    if '.' in text or 'E' in text or 'e' in text:
+        return float(text)
+    return int(text)
+
+def _row_number(row, previous):
+    """
+    Returns the 1-based number of a <row> element, as openpyxl reads it.
+
+    The 'r' attribute is stored as '5.0' by some writers; a row without it
+    follows the previous row.
+
+    Args:
+        row (Element): The <row> element
+        previous (int): Number of the previous row (0 before the first)
+    """
+    text = row.get('r')
+    if not text:
+        return previous + 1
+    try:
+        return int(text)
+    except ValueError:
+        value = float(text)
+        if not value.is_integer():
+            raise ValueError(f"{text} is not a valid row number")
+        return int(value)
+
+def _cell_value(cell, shared_strings, date_styles, timedelta_styles, epoch):
+    """Returns (value, data type) of a <c> element as openpyxl reads it with data_only=True."""
+    data_type = cell.get('t', 'n')
+    style = cell.get('s')
+    style = int(style) if style else 0
+    value = None
+    inline = None
+    for child in cell:
+        name = local_name(child.tag)
+        if name == 'v' and value is None:
+            value = child.text or None
+        elif name == 'is':
+            inline = child
+
+    if data_type == 'inlineStr':
+        if inline is not None:
+            return _string_item_text(inline, str), 's'
+        return None, data_type
+    if value is None:
+        return None, data_type
+    if data_type == 'n':
+        value = _cast_number(value)
+        if style in date_styles:
+            try:
+                return from_excel(value, epoch, timedelta=style in timedelta_styles), 'd'
+            except (OverflowError, ValueError):
+                warnings.warn(f"Cell {cell.get('r')} is marked as a date but the serial value {value} "
+                              f"is outside the limits for dates. The cell will be treated as an error.")
+                return '#VALUE!', 'e'
+    elif data_type == 's':
+        value = shared_strings[int(value)]
+    elif data_type == 'b':
+        value = bool(int(value))
+    elif data_type == 'str':
+        data_type = 's'
+    elif data_type == 'd':
+        value = from_ISO8601(value)
+    return value, data_type
+
+def iter_sheet_rows(archive, part, shared_strings, date_styles=(), timedelta_styles=(), date1904=False):
+    """
+    Streams the rows of a worksheet with their cell values.
+
+    Values are converted the way an openpyxl read-only workbook opened with
+    data_only=True converts them (cached formula results, shared strings
+    resolved, numbers with a date style as datetimes), so pandas-compatible
+    frames can be built without loading the workbook.
+
+    Args:
+        archive (zipfile.ZipFile): The opened .xlsx file
+        part (str): Path of the worksheet XML inside the archive
+        shared_strings (list): The workbook's shared strings, as read by
+                               iter_shared_strings(archive, openpyxl_text)
+        date_styles (set): Cell styles holding dates (see read_date_styles())
+        timedelta_styles (set): Cell styles holding durations
+        date1904 (bool): Whether the workbook uses the 1904 date system
+                         (see read_date1904())
+
+    Yields:
+        tuple: (row number, cells) for each <row> of the sheet, where cells
+               has a dict with 'column' (1-based), 'value' and 'data_type'
+               ('n', 's', 'b', 'd', 'e', ...) for each cell in the XML
+
+    Example:
+        >>> next(iter_sheet_rows(archive, 'xl/worksheets/sheet1.xml', ['Name']))
+        (1, [{'column': 1, 'value': 'Name', 'data_type': 's'}])
+    """
+    epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+    with archive.open(part) as stream:
+        row_number = 0
+        sheet_data = None
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            name = local_name(element.tag)
+            if event == 'start':
+                if name == 'sheetData':
+                    sheet_data = element
+                continue
+            if name != 'row':
+                continue
+            # Cells without a reference follow the previous one
+            row_number = _row_number(element, row_number)
+            column = 0
+            cells = []
+            for cell in element:
+                if local_name(cell.tag) != 'c':
+                    continue
+                ref = cell.get('r')
+                column = column_index(ref) + 1 if ref else column + 1
+                value, data_type = _cell_value(cell, shared_strings, date_styles, timedelta_styles, epoch)
+                cells.append({'column': column, 'value': value, 'data_type': data_type})
+            yield row_number, cells
+            if sheet_data is not None:
+                sheet_data.clear()
+
+def _is_true(value):
+    """Reads an XML boolean attribute ('1'/'true')."""
+    return value in ('1', 'true')
+
+def read_hidden_rows_and_columns(file_path, sheet_name):
+    """
+    Finds the hidden rows and columns of a worksheet.
+
+    Only the row and column attributes of the sheet XML are looked at, so
+    this is much cheaper than loading the workbook with openpyxl. Rows
+    hidden by an AutoFilter and collapsed outline rows are stored as hidden
+    rows too, so they are included.
+
+    Args:
+        file_path (str): Path to the .xlsx file
+        sheet_name (str): Exact name of the worksheet
+
+    Returns:
+        tuple: (hidden_rows, hidden_columns), sets of 1-based Excel row
+               numbers and 0-based column indexes
+
+    Raises:
+        KeyError: If the workbook has no sheet with that name
+
+    Example:
+        >>> read_hidden_rows_and_columns('data.xlsx', 'Sheet1')
+        ({4, 5}, {2})
+    """
+    hidden_rows = set()
+    hidden_columns = set()
+    with zipfile.ZipFile(file_path) as archive:
+        parts = {sheet['name']: sheet['part'] for sheet in read_sheet_parts(archive)}
+        if sheet_name not in parts or not parts[sheet_name]:
+            raise KeyError(sheet_name)
+
+        with archive.open(parts[sheet_name]) as stream:
+            row_number = 0
+            sheet_data = None
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                name = local_name(element.tag)
+                if event == 'start':
+                    if name == 'sheetData':
+                        sheet_data = element
+                    elif name == 'row':
+                        row_number = _row_number(element, row_number)
+                        if _is_true(element.get('hidden')):
+                            hidden_rows.add(row_number)
+                    elif name == 'col' and _is_true(element.get('hidden')):
+                        first = int(element.get('min', '1'))
+                        last = int(element.get('max', first))
+                        hidden_columns.update(range(first - 1, last))
+                elif name == 'row' and sheet_data is not None:
+                    # Cell contents are not needed; free finished rows as we go
+                    sheet_data.clear()
+    return hidden_rows, hidden_columns
+
+def header_names(values):
+    """
+    Turns first-row values into column names following pandas' rules:
+    empty cells become 'Unnamed: N' and repeated names get '.1', '.2', ...
+
+    Args:
+        values (list): Header cell values, None for empty cells
+
+    Returns:
+        list: Column names as pandas.read_excel would report them
+    """
+    names = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(values)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
@@ -0,0 +1,77 @@
+"""
+Streaming ZIP archives.
+zipfile can write to a stream that does not support seeking; it then puts
+each entry's sizes and CRC in a data descriptor after the entry instead of
+going back to patch the header. Handing the written bytes out as they are
+produced lets a response stream the archive while it is being built, with
+no temporary file and memory bounded by the chunk size.
+"""
+import zipfile
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+class _ChunkBuffer:
+    """Write-only, non-seekable sink that collects bytes until they are taken."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Returns and clears everything written so far."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip(entries, compresslevel=6, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Builds a ZIP archive on the fly.
+
+    Args:
+        entries (iterable): (arcname, opener) pairs, where opener() returns
+                            a binary file object with the entry's content;
+                            it is only called when the entry is written
+        compresslevel (int): 0 stores the files uncompressed, 1-9 deflates
+                             them (1 fastest, 9 smallest)
+        chunk_size (int): Bytes read from each file at a time
+
+    Yields:
+        bytes: Consecutive pieces of the archive
+
+    Example:
+        >>> response = StreamingHttpResponse(
+        ...     iter_zip([('Model.dart', lambda: open(path, 'rb'))]),
+        ...     content_type='application/zip')
+    """
+    if compresslevel:
+        compression = zipfile.ZIP_DEFLATED
+        compresslevel = min(max(int(compresslevel), 1), 9)
+    else:
+        compression = zipfile.ZIP_STORED
+        compresslevel = None
+
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=compression, compresslevel=compresslevel) as archive:
+        for arcname, opener in entries:
+            with opener() as source, archive.open(arcname, 'w') as entry:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    data = buffer.take()
+                    if data:
+                        yield data
+            data = buffer.take()
+            if data:
+                yield data
+    # Central directory, written when the archive is closed
+    data = buffer.take()
+    if data:
+        yield data
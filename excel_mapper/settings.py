@@ -44,6 +44,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Server-Timing header and a log line with the stage timings of each request
+    'excel_converter.instrumentation.InstrumentationMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -126,7 +128,71 @@ if DEBUG:
 
 # Excel Converter Settings
 EXCEL_SETTINGS = {
-    'supported_extensions': ['.xlsx', '.xls', '.csv']
+    'supported_extensions': ['.xlsx', '.xls', '.csv'],
+    # Largest accepted upload. Django spools files above FILE_UPLOAD_MAX_MEMORY_SIZE
+    # to disk, and the chunked upload endpoint streams parts of upload_chunk_size
+    # bytes straight into place (see upload_sessions.py)
+    'max_upload_size': int(os.getenv('EXCEL_MAX_UPLOAD_SIZE', str(200 * 1024 * 1024))),  # 200MB
+    'upload_chunk_size': 8 * 1024 * 1024,  # 8MB
+    # Unfinished chunked uploads are discarded after this many seconds
+    'upload_session_max_age': 24 * 60 * 60,
+    # Parsed sheets are cached per upload content hash (see utils.WorkbookCache)
+    'workbook_cache_max_entries': 64,
+    'workbook_cache_max_bytes': 256 * 1024 * 1024,  # 256MB
+    # Per-sheet validation/generation: 'process', 'thread' or 'serial' (see executor.py)
+    'sheet_executor': os.getenv('EXCEL_SHEET_EXECUTOR', 'process'),
+    'sheet_workers': int(os.getenv('EXCEL_SHEET_WORKERS', '0')) or None,  # None = CPU count
+    # Generation jobs: 'thread' runs them in this process, 'command' leaves them
+    # for `manage.py run_generation_jobs` (see jobs.py)
+    'generation_job_mode': os.getenv('EXCEL_GENERATION_JOB_MODE', 'thread'),
+    'generation_job_workers': 2,
+    # Running jobs not touched by their heartbeat for this many seconds are
+    # marked failed (e.g., their worker process was restarted)
+    'generation_job_stale_after': 30 * 60,
+    # Generated code is stored by content hash here (None = MEDIA_ROOT/artifacts)
+    'artifact_dir': None,
+    # Compression of the "download all" zip: 0 = stored, 1 (fastest) - 9 (smallest)
+    'zip_compresslevel': 6,
+    # 'pandas' loads whole sheets, 'streaming' reads .xlsx sheets in chunks of
+    # streaming_chunk_rows rows with bounded memory, 'auto' streams files of
+    # at least streaming_min_bytes
+    'ingestion_engine': os.getenv('EXCEL_INGESTION_ENGINE', 'auto'),
+    'streaming_min_bytes': 20 * 1024 * 1024,  # 20MB
+    'streaming_chunk_rows': 5000,
+    # Parse the selected sheets of an .xlsx workbook in parallel, sharing one
+    # read of its shared strings (see utils.read_xlsx_sheets)
+    'parallel_sheet_reader': True,
+    # Columns with at most this share of distinct values are stored as
+    # categoricals (see utils.intern_strings); 0 keeps plain string columns
+    'categorical_max_ratio': 0.5,
+    # Reuse the generated code of sheets whose content, column selections and
+    # class name are unchanged since an earlier job (see fingerprints.py)
+    'incremental_generation': True,
+    # Column aliases per role (e.g. {'question': ['Prompt', 'Question']}),
+    # replacing the defaults in columns.DEFAULT_COLUMN_ALIASES for that role
+    'column_aliases': {},
+    # Per-stage wall/CPU timings of requests and jobs (see instrumentation.py);
+    # tracemalloc adds peak memory per stage at a noticeable cost
+    'instrumentation': os.getenv('EXCEL_INSTRUMENTATION', '1') == '1',
+    'instrumentation_tracemalloc': os.getenv('EXCEL_INSTRUMENTATION_TRACEMALLOC', '0') == '1',
+    # Serve the stage totals at /metrics/ in Prometheus text format
+    'metrics_endpoint': os.getenv('EXCEL_METRICS_ENDPOINT', '0') == '1',
+}
+
+# Stage timing log lines (JSON) from excel_converter.instrumentation
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'excel_converter.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('EXCEL_INSTRUMENTATION_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 DART_SETTINGS = {